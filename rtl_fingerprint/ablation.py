@@ -19,6 +19,22 @@ class AblationGenerator:
         self.lines.append("MSHR_CAP = 32")
         self.lines.append("")
 
+    def add_cut(self, graph, cut_nodes: List[int], section: str = "CUT"):
+        """
+        把最小点割（RmmgQueryEngine.max_flow 的 cut_nodes）写成一组切断开关，
+        每个节点一行：SEVER = <hier_name> ; width=N
+        """
+        self.lines.append(f"[{section}]")
+        for nid in cut_nodes:
+            node = graph.nodes[nid]
+            line = f"SEVER = {node.hier_name}    ; width={node.width}"
+            aliases = node.attrs.get("aliases")
+            if aliases:
+                # 收缩图上的合并节点：同一根线的其它层次名
+                line += f" ; aka {', '.join(aliases)}"
+            self.lines.append(line)
+        self.lines.append("")
+
     def dump(self, path: str):
         with open(path, "w") as f:
             f.write("\n".join(self.lines))
@@ -1,7 +1,7 @@
 # rtl_fingerprint/compiler.py
-from typing import List
+from typing import List, Optional
 from .config import Config, load_config
-from .frontend import ToyFrontend, UHDMFrontend
+from .ir import RTLIR
 from .targets import TargetSelector
 from .slicing import ConeSlicer
 from .patterns import PatternExtractor
@@ -9,6 +9,7 @@ from .constraints import ConstraintSynthesizer
 from .ablation import AblationGenerator
 from .compiler_types import Fingerprint
 from .rmmg.query import RmmgQueryEngine
+from .rmmg.stats import module_stats
 
 class FingerprintCompiler:
     def __init__(self, cfg: Config):
@@ -20,6 +21,9 @@ class FingerprintCompiler:
         return cls(cfg)
 
     def run(self, out_prefix: str = "out"):
+        # 前端在这里才导入：UHDM 绑定只在跑完整流程时需要，compile_fingerprints 单独可用
+        from .frontend import ToyFrontend, UHDMFrontend
+
         # 1) 选择前端
         if self.cfg.frontend == "uhdm":
             fe = UHDMFrontend(self.cfg)
@@ -51,9 +55,17 @@ class FingerprintCompiler:
         self.debug_module_edges(fe.graph,"work@BoomMSHRFile")
         self.debug_module_edges(fe.graph,"work@Rob")
         self.debug_module_edges(fe.graph,"work@BoomCore")
-        
-        return 
 
+        stats = module_stats(fe.graph)
+        stats.dump_json(out_prefix + ".module_stats.json")
+        stats.dump_csv(out_prefix + ".module_stats.csv", out_prefix + ".module_matrix.csv")
+
+        # 3.2) 指纹流程，impact 按 RMMG 上的 源 → 汇 路径数打分
+        self.compile_fingerprints(fe.parse(), engine, out_prefix)
+
+    def compile_fingerprints(self, ir: RTLIR, engine: Optional[RmmgQueryEngine] = None,
+                             out_prefix: str = "out") -> List[Fingerprint]:
+        """目标选择 → 切片 + 模式识别 → impact 排序 → 约束 / 消融 → 输出，返回排好序的指纹。"""
         # 3) 目标选择
         ts = TargetSelector(ir, self.cfg.analysis)
         targets = ts.select_targets()
@@ -70,6 +82,10 @@ class FingerprintCompiler:
                 if fp is not None:
                     fingerprints.append(fp)
 
+        # 4.1) 按 源 → 汇 路径数给指纹打 impact（没有 RMMG 时保留模式给的 impact）
+        if engine is not None:
+            fingerprints = engine.rank_fingerprints(fingerprints)
+
         # 5) 约束 & witness
         cs = ConstraintSynthesizer()
         cs.synthesize(fingerprints)
@@ -86,23 +102,13 @@ class FingerprintCompiler:
         ab.dump(out_prefix + ".ablation.cfg")
 
         print(f"[INFO] Fingerprints generated: {len(fingerprints)}")
+        return fingerprints
 
     def debug_module_edges(self,graph, module_name_substr: str):
-        module_nodes = [
-            (nid, n) for nid, n in graph.nodes.items()
-            if module_name_substr in n.hier_name
-        ]
-        in_cnt = out_cnt = 0
-        node_ids = {nid for nid, _ in module_nodes}
-    
-        for e in graph.edges:
-            if e.src in node_ids:
-                out_cnt += 1
-            if e.dst in node_ids:
-                in_cnt += 1
-    
+        # 基于缓存的单遍模块统计，按 module_path 子串聚合
+        nodes, in_cnt, out_cnt = module_stats(graph).debug_counts(module_name_substr)
         print(f"[DEBUG] module '{module_name_substr}': "
-              f"nodes={len(module_nodes)}, in_edges={in_cnt}, out_edges={out_cnt}")
+              f"nodes={nodes}, in_edges={in_cnt}, out_edges={out_cnt}")
 
 
     @staticmethod
@@ -14,6 +14,9 @@ class Config:
     frontend: str = "toy"  # "toy" or "uhdm"
     arch_visible_rules: List[Dict[str, Any]] = field(default_factory=list)
     uhdm_database: Optional[str] = None
+    # RMMG 构图选项（yml 里的 rmmg: 段），原样传给 build_rmmg_from_design
+    bit_precise: bool = False   # 常量位选 / 片选的位区间记到边上
+    addr_edges: bool = False    # 选择下标 / 存储器地址另建 role=addr 的边（EdgeClass.ADDR / MEM_ADDR）
 
 
 def load_config(path: str) -> Config:
@@ -21,6 +24,7 @@ def load_config(path: str) -> Config:
         cfg_raw = yaml.safe_load(f)
     rtl_cfg = cfg_raw["rtl"]
     rtl_target = cfg_raw["targets"]
+    rmmg_cfg = cfg_raw.get("rmmg") or {}
     return Config(
         rtl_filelist=rtl_cfg["filelist"],
         top_module=rtl_cfg["top_module"],
@@ -30,5 +34,7 @@ def load_config(path: str) -> Config:
         frontend=cfg_raw.get("frontend", "toy"),
         arch_visible_rules=rtl_target.get("arch_visible_rules",[]),
         uhdm_database=rtl_cfg.get("uhdm_database"),
+        bit_precise=bool(rmmg_cfg.get("bit_precise", False)),
+        addr_edges=bool(rmmg_cfg.get("addr_edges", False)),
     )
 
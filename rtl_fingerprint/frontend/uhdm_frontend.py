@@ -101,12 +101,15 @@ class UHDMFrontend:  # 如果有 FrontendBase 就写 UHDMFrontend(FrontendBase)
     def build_rmmg(self) -> RmmgGraph:
         if self.design is None:
             self._run_surelog_and_load_uhdm()
-            self.graph = build_rmmg_from_design(self.design,self.arch_visible_rules)
-            annotate_basic_semantics(self.graph,self.arch_visible_rules)
-        else:
-            self.graph = build_rmmg_from_design(self.design,self.arch_visible_rules)
-            annotate_basic_semantics(self.graph,self.arch_visible_rules)
+        # bit_precise / addr_edges 来自配置的 rmmg: 段（见 config.Config）
+        self.graph = build_rmmg_from_design(
+            self.design, self.arch_visible_rules,
+            bit_precise=getattr(self.cfg, "bit_precise", False),
+            addr_edges=getattr(self.cfg, "addr_edges", False),
+        )
+        annotate_basic_semantics(self.graph,self.arch_visible_rules)
         print("[RMMG] ", self.graph.summary())
+        return self.graph
 
     def save_rmmg(self):
         outdir = self.workdir/"RmmgGraph.txt"
@@ -0,0 +1,170 @@
+# rtl_fingerprint/rmmg/astar.py
+
+"""
+面向固定汇集合的目标导向搜索：
+  - SinkDistance: 从汇集合出发在反向图上做一次 BFS，得到每个节点到最近汇的距离
+    （-1 表示到不了任何汇），按 frozenset(sinks) 缓存在 RmmgGraph 上
+  - astar_paths_on: 以该距离作为精确（一致）启发式的 A*；
+    g + h > max_depth - 1 或 h = -1 的节点直接剪掉，正向搜索只会碰到相关的锥
+结果语义与 bfs_paths 一致：每个可达 target 一条最短路径，target 不再向外扩展，
+按路径长度非降序返回。
+"""
+
+from __future__ import annotations
+import heapq
+from array import array
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from .budget import BudgetMeter, CancelToken, QueryBudget, QueryResult
+from .csr import CsrGraph
+from .masks import CompiledMask
+
+
+class SinkDistance:
+    def __init__(self, dist: array, sinks: FrozenSet[int]):
+        self.dist = dist          # node -> 到最近汇的边数，-1 不可达
+        self.sinks = sinks
+
+    @property
+    def cone_size(self) -> int:
+        """能到达某个汇的节点数（反向锥大小）。"""
+        return sum(1 for d in self.dist if d >= 0)
+
+    @classmethod
+    def compute(cls, csr: CsrGraph, sinks: Iterable[int]) -> "SinkDistance":
+        sinks = frozenset(sinks)
+        rptr, ridx = csr.rindptr, csr.rindices
+        dist = array("i", [-1]) * csr.num_nodes
+        q = deque()
+        for t in sinks:
+            dist[t] = 0
+            q.append(t)
+        while q:
+            v = q.popleft()
+            d = dist[v] + 1
+            for j in range(rptr[v], rptr[v + 1]):
+                u = ridx[j]
+                if dist[u] < 0:
+                    dist[u] = d
+                    q.append(u)
+        return cls(dist, sinks)
+
+
+def sink_distance(g, sinks: Iterable[int]) -> SinkDistance:
+    """RmmgGraph 上按汇集合缓存的距离表；传 CsrGraph 则现算。"""
+    sinks = frozenset(sinks)
+    if isinstance(g, CsrGraph):
+        return SinkDistance.compute(g, sinks)
+    tables: Dict[FrozenSet[int], SinkDistance] = g.cached("sink_distance", dict)
+    table = tables.get(sinks)
+    if table is None:
+        table = tables[sinks] = SinkDistance.compute(g.freeze(), sinks)
+    return table
+
+
+def astar_paths_on(
+    csr: CsrGraph,
+    heuristic: SinkDistance,
+    sources: Iterable[int],
+    max_depth: int = 50,
+    max_paths: Optional[int] = None,
+    budget: Optional[QueryBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    mask: Optional[CompiledMask] = None,
+    profile: bool = False,
+) -> QueryResult:
+    """
+    heuristic.sinks 就是 targets。h 是精确的最短距离，满足一致性，
+    因此节点第一次出堆时 g 已最优，出堆的 target 按 g 非降序出现。
+    mask 下距离表仍按全图计算：只会更乐观，启发式依旧一致。
+    """
+    h = heuristic.dist
+    target_set = heuristic.sinks
+    indptr, indices = csr.indptr, csr.indices
+    limit = max_depth - 1               # 路径节点数 <= max_depth
+    found = QueryResult()
+    meter = BudgetMeter(budget, cancel)
+    checking = meter.active
+    check_every = meter.check_every
+    max_expanded = meter.budget.max_expanded
+    reason = None
+    expanded = 0
+    depth_reached = 0
+
+    best: Dict[int, int] = {}
+    parent: Dict[int, int] = {}
+    heap: List[tuple] = []
+    for s in set(sources):
+        if 0 <= h[s] <= limit:
+            best[s] = 0
+            parent[s] = -1
+            heap.append((h[s], 0, s))
+    heapq.heapify(heap)
+    closed = set()
+    pruned = set()
+    skipped_slots = 0
+    scanned = peak = 0
+
+    while heap:
+        if max_paths is not None and len(found) >= max_paths:
+            break
+        f, neg_g, u = heapq.heappop(heap)
+        g = -neg_g
+        if u in closed or g != best[u]:
+            continue                    # 过期的堆项
+        closed.add(u)
+        if g + 1 > depth_reached:
+            depth_reached = g + 1
+
+        if u in target_set:
+            path = [u]
+            while parent[path[-1]] >= 0:
+                path.append(parent[path[-1]])
+            path.reverse()
+            found.append(path)
+            continue
+
+        if checking and (expanded % check_every == 0 or expanded == max_expanded):
+            reason = meter.exceeded(expanded, len(heap) * 80 + len(best) * 120)
+            if reason is not None:
+                break
+        expanded += 1
+
+        if mask is not None and not mask.expand_ok[u]:
+            pruned.add(u)
+            continue
+        ng = g + 1
+        if profile:
+            scanned += indptr[u + 1] - indptr[u]
+            if len(heap) > peak:
+                peak = len(heap)
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            if mask is not None:
+                if not mask.slot_ok[j]:
+                    skipped_slots += 1
+                    continue
+                if not mask.node_ok[v]:
+                    pruned.add(v)
+                    continue
+            hv = h[v]
+            if hv < 0 or ng + hv > limit or v in closed:
+                continue
+            old = best.get(v)
+            if old is None or ng < old:
+                best[v] = ng
+                parent[v] = u
+                heapq.heappush(heap, (ng + hv, -ng, v))
+
+    found.truncated = reason is not None
+    found.reason = reason
+    found.expanded = expanded
+    found.depth_reached = depth_reached
+    found.frontier_left = len(heap) + 1 if reason is not None else 0
+    found.elapsed_s = meter.elapsed()
+    found.pruned_nodes = len(pruned)
+    found.pruned_edges = skipped_slots + sum(indptr[v + 1] - indptr[v] for v in pruned)
+    found.edges_scanned = scanned
+    found.peak_frontier = peak
+    return found
@@ -0,0 +1,319 @@
+# rtl_fingerprint/rmmg/bits.py
+
+"""
+位区间精确的依赖传播（builder 的 bit_precise 模式）：
+  - 边可带 attrs["src_bits"] / attrs["dst_bits"] = (lo, hi)（闭区间，相对声明 LSB 的偏移，
+    0 = LSB，见 select_offsets），来自 RHS / LHS 上的常量 bit-select、part-select；
+    缺省表示整个信号。这样 logic [31:16] x、logic [0:7] y 的位号和 IntervalSet.full(width) 一致
+  - attrs["bits_aligned"] = True 表示逐位直连（RHS 就是这个 select，且两边宽度相同），
+    src 的第 lo+i 位只流向 dst 的第 lo'+i 位；否则 src 区间里任一位被污染，dst 区间整体被污染
+  - 节点上不拆成逐位节点，只在搜索时为每个节点维护一个 IntervalSet（已到达的位）
+传播是带增量的 worklist 不动点：节点只把“新增的位”往下推，
+所以同一个节点可能被多次扩展，但每次推的位集合严格变大，总次数受区间端点数约束。
+va[11:6] -> idx 这类只用部分位的依赖，不再把 va 的其余位带到 idx 的下游。
+"""
+
+from __future__ import annotations
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .budget import BudgetMeter, CancelToken, QueryBudget, QueryResult
+from .masks import CompiledMask
+
+Interval = Tuple[int, int]
+
+
+class IntervalSet:
+    """有序、互不相交、不相邻的闭区间列表（不可变）。"""
+
+    __slots__ = ("spans",)
+
+    def __init__(self, spans: Iterable[Interval] = ()):
+        self.spans: Tuple[Interval, ...] = _normalize(spans)
+
+    @classmethod
+    def full(cls, width: int) -> "IntervalSet":
+        return cls([(0, max(width, 1) - 1)])
+
+    @classmethod
+    def of(cls, lo: int, hi: Optional[int] = None) -> "IntervalSet":
+        return cls([(lo, lo if hi is None else hi)])
+
+    def __bool__(self) -> bool:
+        return bool(self.spans)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, IntervalSet) and self.spans == other.spans
+
+    def __hash__(self) -> int:
+        return hash(self.spans)
+
+    def __iter__(self):
+        return iter(self.spans)
+
+    def __contains__(self, bit: int) -> bool:
+        return any(lo <= bit <= hi for lo, hi in self.spans)
+
+    def __repr__(self) -> str:
+        body = ",".join(f"{hi}:{lo}" if hi != lo else str(lo) for lo, hi in reversed(self.spans))
+        return f"IntervalSet[{body}]"
+
+    @property
+    def count(self) -> int:
+        """覆盖的位数。"""
+        return sum(hi - lo + 1 for lo, hi in self.spans)
+
+    def __or__(self, other: "IntervalSet") -> "IntervalSet":
+        if not other.spans:
+            return self
+        if not self.spans:
+            return other
+        return IntervalSet(self.spans + other.spans)
+
+    def __and__(self, other: "IntervalSet") -> "IntervalSet":
+        out, i, j = [], 0, 0
+        a, b = self.spans, other.spans
+        while i < len(a) and j < len(b):
+            lo, hi = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+            if lo <= hi:
+                out.append((lo, hi))
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+        return _raw(out)
+
+    def __sub__(self, other: "IntervalSet") -> "IntervalSet":
+        out = []
+        b = other.spans
+        j = 0
+        for lo, hi in self.spans:
+            while j < len(b) and b[j][1] < lo:
+                j += 1
+            k = j
+            while lo <= hi and k < len(b) and b[k][0] <= hi:
+                if b[k][0] > lo:
+                    out.append((lo, b[k][0] - 1))
+                lo = max(lo, b[k][1] + 1)
+                k += 1
+            if lo <= hi:
+                out.append((lo, hi))
+        return _raw(out)
+
+    def overlaps(self, lo: int, hi: int) -> bool:
+        return any(a <= hi and lo <= b for a, b in self.spans)
+
+    def shift(self, delta: int) -> "IntervalSet":
+        return _raw([(lo + delta, hi + delta) for lo, hi in self.spans])
+
+
+def _raw(spans: List[Interval]) -> IntervalSet:
+    """spans 已经有序且不相交（由 & / - / shift 保证），只需合并相邻区间。"""
+    s = IntervalSet.__new__(IntervalSet)
+    s.spans = _normalize(spans, presorted=True)
+    return s
+
+
+def _normalize(spans: Iterable[Interval], presorted: bool = False) -> Tuple[Interval, ...]:
+    items = [(min(lo, hi), max(lo, hi)) for lo, hi in spans]
+    if not presorted:
+        items.sort()
+    out: List[Interval] = []
+    for lo, hi in items:
+        if out and lo <= out[-1][1] + 1:
+            if hi > out[-1][1]:
+                out[-1] = (out[-1][0], hi)
+        else:
+            out.append((lo, hi))
+    return tuple(out)
+
+
+BitsLike = Union[IntervalSet, Interval, None]
+
+
+def select_offsets(select: Optional[Interval], declared: Optional[Interval],
+                   width: int) -> Optional[Interval]:
+    """
+    select 是源码里的位号（x[23:20] -> (20, 23)），declared 是声明的 [left:right]；
+    换算成相对 LSB（即 right）的偏移，降序 / 升序声明都适用：offset = |i - right|。
+    不知道声明范围、或换算后超出 0..width-1 时返回 None（按整个信号处理，宁可多连不漏连）。
+    """
+    if select is None or declared is None:
+        return None
+    left, right = declared
+    if abs(left - right) + 1 != max(width, 1):
+        return None
+    lo_decl, hi_decl = min(left, right), max(left, right)
+    a, b = select
+    if not (lo_decl <= a <= hi_decl and lo_decl <= b <= hi_decl):
+        return None
+    a, b = abs(a - right), abs(b - right)
+    return (min(a, b), max(a, b))
+
+
+def _as_bits(g, v: int, bits: BitsLike) -> IntervalSet:
+    if bits is None:
+        return IntervalSet.full(g.nodes[v].width)
+    if isinstance(bits, IntervalSet):
+        return bits
+    return IntervalSet.of(*bits)
+
+
+def edge_bit_table(g) -> List[Optional[Tuple[Optional[Interval], Optional[Interval], bool]]]:
+    """边下标 -> (src_bits, dst_bits, aligned)，整信号边为 None；按图缓存。"""
+    def _build():
+        table = []
+        for e in g.edges:
+            a = e.attrs
+            sb, db = a.get("src_bits"), a.get("dst_bits")
+            if sb is None and db is None:
+                table.append(None)
+            else:
+                table.append((tuple(sb) if sb is not None else None,
+                              tuple(db) if db is not None else None,
+                              bool(a.get("bits_aligned"))))
+        return table
+    return g.cached("edge_bits", _build, attrs=True)
+
+
+class BitReachability:
+    """propagate_bits 的结果：每个到达节点的位集合，以及首次到达时的前驱（用于还原路径）。"""
+
+    def __init__(self, bits: Dict[int, IntervalSet], parent: Dict[int, int], stats: QueryResult):
+        self.bits = bits
+        self.parent = parent
+        self.stats = stats          # 只用执行状态字段（truncated / expanded / ...），不含路径
+
+    def __contains__(self, v: int) -> bool:
+        return v in self.bits
+
+    def path_to(self, v: int) -> List[int]:
+        path = []
+        while v >= 0:
+            path.append(v)
+            v = self.parent[v]
+        path.reverse()
+        return path
+
+    def paths(self, targets: Iterable[int], max_paths: Optional[int] = None) -> QueryResult:
+        """到达的 targets 各一条路径，按长度非降序（与 bfs_paths 一致）；执行状态拷自 stats。"""
+        found = sorted((self.path_to(t) for t in set(targets) if t in self.bits),
+                       key=lambda p: (len(p), p[-1]))
+        st = self.stats
+        out = QueryResult(found[:max_paths] if max_paths is not None else found,
+                          truncated=st.truncated, reason=st.reason, expanded=st.expanded,
+                          depth_reached=st.depth_reached, frontier_left=st.frontier_left,
+                          elapsed_s=st.elapsed_s, pruned_nodes=st.pruned_nodes,
+                          pruned_edges=st.pruned_edges, edges_scanned=st.edges_scanned,
+                          peak_frontier=st.peak_frontier)
+        return out
+
+
+def propagate_bits(
+    g,
+    sources: Union[Mapping[int, BitsLike], Sequence[int]],
+    max_depth: Optional[int] = None,
+    budget: Optional[QueryBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    mask: Optional[CompiledMask] = None,
+) -> BitReachability:
+    """
+    从 sources（节点列表 = 整个信号；或 {节点: 位区间 / IntervalSet}）出发的位级污染传播。
+    max_depth 按首次到达的路径节点数计，与 bfs_paths 一致；mask 的含义也相同。
+    """
+    csr = g.freeze()
+    indptr, indices, pos = csr.indptr, csr.indices, csr.edge_pos
+    ebits = edge_bit_table(g)
+    if not isinstance(sources, Mapping):
+        sources = {s: None for s in sources}
+
+    meter = BudgetMeter(budget, cancel)
+    checking = meter.active
+    check_every = meter.check_every
+    max_expanded = meter.budget.max_expanded
+    reason = None
+    expanded = scanned = peak = 0
+
+    reach: Dict[int, IntervalSet] = {}
+    pending: Dict[int, IntervalSet] = {}      # 已到达但还没往下推的新增位
+    depth: Dict[int, int] = {}
+    parent: Dict[int, int] = {}
+    q = deque()
+    for s in sorted(sources):
+        b = _as_bits(g, s, sources[s])
+        if not b:
+            continue
+        reach[s] = pending[s] = b
+        depth[s] = 1
+        parent[s] = -1
+        q.append(s)
+    pruned = set()
+    skipped_slots = 0
+
+    while q:
+        if checking and (expanded % check_every == 0 or expanded == max_expanded):
+            reason = meter.exceeded(expanded, len(reach) * 200)
+            if reason is not None:
+                break
+        u = q.popleft()
+        delta = pending.pop(u)
+        du = depth[u]
+        if max_depth is not None and du >= max_depth:
+            continue
+        if mask is not None and not mask.expand_ok[u]:
+            pruned.add(u)
+            continue
+        expanded += 1
+        scanned += indptr[u + 1] - indptr[u]
+        if len(q) > peak:
+            peak = len(q)
+
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            if mask is not None:
+                if not mask.slot_ok[j]:
+                    skipped_slots += 1
+                    continue
+                if not mask.node_ok[v]:
+                    pruned.add(v)
+                    continue
+            spec = ebits[pos[j]]
+            if spec is None:
+                out = IntervalSet.full(g.nodes[v].width)
+            else:
+                sb, db, aligned = spec
+                if sb is None:
+                    sb = (0, max(g.nodes[u].width, 1) - 1)
+                if db is None:
+                    db = (0, max(g.nodes[v].width, 1) - 1)
+                hit = delta & IntervalSet.of(*sb)
+                if not hit:
+                    continue
+                if aligned:
+                    out = hit.shift(db[0] - sb[0]) & IntervalSet.of(*db)
+                else:
+                    out = IntervalSet.of(*db)
+            old = reach.get(v)
+            new = out if old is None else out - old
+            if not new:
+                continue
+            if old is None:
+                reach[v] = new
+                parent[v] = u
+                depth[v] = du + 1
+            else:
+                reach[v] = old | new
+            if v in pending:
+                pending[v] = pending[v] | new
+            else:
+                pending[v] = new
+                q.append(v)
+
+    stats = QueryResult(truncated=reason is not None, reason=reason, expanded=expanded,
+                        depth_reached=max(depth.values(), default=0),
+                        frontier_left=len(q) if reason is not None else 0,
+                        elapsed_s=meter.elapsed(), pruned_nodes=len(pruned),
+                        pruned_edges=skipped_slots + sum(indptr[v + 1] - indptr[v]
+                                                         for v in pruned),
+                        edges_scanned=scanned, peak_frontier=peak)
+    return BitReachability(reach, parent, stats)
@@ -0,0 +1,109 @@
+# rtl_fingerprint/rmmg/budget.py
+
+"""
+查询执行预算 + 协作式取消：
+  - QueryBudget: 墙钟超时、最多扩展节点数、最大（估算）内存
+  - CancelToken: 其它线程 / 信号处理函数调用 cancel()，查询在下一个检查点退出
+  - QueryResult: list 子类（对调用方仍是 List[List[int]]），额外带 truncated 等字段，
+    预算耗尽或被取消时返回已经找到的部分结果
+"""
+
+from __future__ import annotations
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+
+@dataclass
+class QueryBudget:
+    deadline_s: Optional[float] = None        # 从查询开始算起的秒数
+    max_expanded: Optional[int] = None        # 最多出队扩展的节点数
+    max_memory_bytes: Optional[int] = None    # 搜索状态（队列 + visited）的估算上限
+    check_every: int = 256                    # 每扩展多少个节点检查一次时钟/取消
+
+
+class CancelToken:
+    """线程安全的取消标记，可以挂到 SIGINT 等信号上。"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @contextmanager
+    def on_signal(self, signum: int = signal.SIGINT) -> Iterator["CancelToken"]:
+        """
+        with token.on_signal(): engine.query_custom(..., cancel=token)
+        期间收到信号只置取消标记，查询返回部分结果而不是抛 KeyboardInterrupt。
+        只能在主线程使用（Python 信号处理的限制）。
+        """
+        def _handler(sig, frame):
+            self.cancel(f"signal {signal.Signals(sig).name}")
+        old = signal.signal(signum, _handler)
+        try:
+            yield self
+        finally:
+            signal.signal(signum, old)
+
+
+class QueryResult(list):
+    """带执行状态的路径列表。"""
+
+    def __init__(self, paths=(), truncated: bool = False, reason: Optional[str] = None,
+                 expanded: int = 0, depth_reached: int = 0, frontier_left: int = 0,
+                 elapsed_s: float = 0.0, pruned_nodes: int = 0, pruned_edges: int = 0,
+                 edges_scanned: int = 0, peak_frontier: int = 0):
+        super().__init__(paths)
+        self.truncated = truncated          # 因预算 / 取消提前结束
+        self.reason = reason                # "deadline" / "max_expanded" / "max_memory" / 取消原因
+        self.expanded = expanded            # 已扩展节点数
+        self.depth_reached = depth_reached  # 已到达的最大路径长度（节点数）
+        self.frontier_left = frontier_left  # 结束时队列里还剩多少未扩展状态
+        self.elapsed_s = elapsed_s
+        self.pruned_nodes = pruned_nodes    # 被掩码挡住（跳过 / 只到达不扩展）的节点数
+        self.pruned_edges = pruned_edges    # 因此没有扫描的边数
+        self.edges_scanned = edges_scanned  # 扫描过的边数（Python 后端仅 profile 时统计）
+        self.peak_frontier = peak_frontier  # 队列 / frontier 的峰值长度（同上）
+
+
+class BudgetMeter:
+    """单次查询的预算计量，搜索循环里按 check_every 的节奏调用 exceeded()。"""
+
+    def __init__(self, budget: Optional[QueryBudget], cancel: Optional[CancelToken]):
+        self.budget = budget or QueryBudget()
+        self.cancel = cancel
+        self.started = time.perf_counter()
+        self.deadline = (self.started + self.budget.deadline_s
+                         if self.budget.deadline_s is not None else None)
+        self.check_every = max(1, self.budget.check_every)
+
+    @property
+    def active(self) -> bool:
+        b = self.budget
+        return (self.cancel is not None or b.deadline_s is not None or
+                b.max_expanded is not None or b.max_memory_bytes is not None)
+
+    def exceeded(self, expanded: int, memory_bytes: int = 0) -> Optional[str]:
+        if self.cancel is not None and self.cancel.cancelled:
+            return self.cancel.reason or "cancelled"
+        b = self.budget
+        if b.max_expanded is not None and expanded >= b.max_expanded:
+            return "max_expanded"
+        if b.max_memory_bytes is not None and memory_bytes >= b.max_memory_bytes:
+            return "max_memory"
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return "deadline"
+        return None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
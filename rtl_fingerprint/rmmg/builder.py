@@ -3,17 +3,26 @@
 from __future__ import annotations
 import re
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-from ..uhdm_compat import get_uhdm
+from ..uhdm_compat import CachedVpi, get_uhdm, handle_key
 
-uhdm, util = get_uhdm()
+# 构图只读 UHDM，同一对象的属性 / handle / 子对象列表会被反复查询，统一走带缓存的访问层，
+# 每次 build_rmmg_from_design 开始和结束时清空
+uhdm = CachedVpi(*get_uhdm())
+util = uhdm.util
 
+from .bits import select_offsets
 from .graph import RmmgGraph, RmmgNode
 
 ASSIGN_TYPES = []
 _KNOWN_WIDTHS: Dict[str, int] = {}
 _SOURCE_CACHE: Dict[str, List[str]] = {}
+# 宽度解析的记忆化，和 CachedVpi 一样按 handle_key（底层指针）记，没有指针的对象不缓存
+_WIDTH_CACHE: Dict[int, int] = {}                   # handle_key(obj) -> _get_width 结果
+_TS_WIDTHS: Dict[int, Optional[int]] = {}           # handle_key(typespec) -> _width_from_typespec 结果
+# (vpiType, fullName) of parent -> (ports, 连接名 -> 首个端口下标, 连接 handle_key -> 首个端口下标)
+_PORT_INDEX: Dict[object, Tuple[List[object], Dict[str, int], Dict[int, int]]] = {}
 
 # vpiAssignment 通常一定有
 
@@ -26,7 +35,9 @@ for _name in ("vpiBlockingAssign", "vpiNonBlockingAssign"):
         ASSIGN_TYPES.append(_val)
 
 def build_rmmg_from_design(design,
-                           arch_visible_rules: Optional[List[Dict[str, str]]] = None
+                           arch_visible_rules: Optional[List[Dict[str, str]]] = None,
+                           bit_precise: bool = False,
+                           addr_edges: bool = False,
                            ) -> RmmgGraph:
     """
     给定 UHDM design，对整个设计构建一张“单图版” RMMG。
@@ -34,35 +45,53 @@ def build_rmmg_from_design(design,
     - 组合 + 时序边
     - 节点附带 module_path / signal_name
     - 用简单规则打 is_arch_visible / is_micro_state
+    - bit_precise=True 时，常量 bit-select / part-select 的位区间记到边上
+      （attrs["src_bits"] / ["dst_bits"]，见 rmmg/bits.py），节点数不变
+    - addr_edges=True 时，选择下标 / 存储器地址到 dst 的依赖另建 attrs["role"] = "addr" 的边
+      （见 _add_addr_edges 和 masks.EdgeClass.ADDR），默认不建
     """
     g = RmmgGraph()
+    _reset_build_caches()
 
     # 1) 遍历所有 module 实例
     module_count = 0
     for top in util.vpi_iterate_gen(uhdm.uhdmallModules, design):
         module_count += 1
-        _build_instance_recursive(g, top)
+        _build_instance_recursive(g, top, bit_precise=bit_precise, addr_edges=addr_edges)
     print(f"[RMMG]:visited {module_count} modules")
+    print(f"[RMMG]:{uhdm.summary()}")
     # 2) 语义标注：micro_state / arch_visible
     _annotate_micro_state(g)
     if arch_visible_rules:
         _annotate_arch_visible(g, arch_visible_rules)
 
+    _reset_build_caches()
     return g
 
-def _build_instance_recursive(g: RmmgGraph, inst) -> None:
+
+def _reset_build_caches() -> None:
+    """VPI 缓存和宽度缓存一起清：handle 指针只在一次构图内有效。"""
+    uhdm.clear()
+    _WIDTH_CACHE.clear()
+    _TS_WIDTHS.clear()
+    _PORT_INDEX.clear()
+
+def _build_instance_recursive(g: RmmgGraph, inst, bit_precise: bool = False,
+                              addr_edges: bool = False) -> None:
     """
     inst: 某个 module 实例（带层次路径的那个对象）
     """
-    _build_module_into_graph(g, inst)  # 这里的 mod 就是实例，不是 definition
+    # 这里的 mod 就是实例，不是 definition
+    _build_module_into_graph(g, inst, bit_precise=bit_precise, addr_edges=addr_edges)
 
     # 对该实例内部再递归处理下一级实例
     for child_inst in util.vpi_iterate_gen(uhdm.vpiModule, inst):
-        _build_instance_recursive(g, child_inst)
+        _build_instance_recursive(g, child_inst, bit_precise=bit_precise, addr_edges=addr_edges)
 
 # ==== Module 内构图逻辑 =====================================================
 
-def _build_module_into_graph(g: RmmgGraph, mod) -> None:
+def _build_module_into_graph(g: RmmgGraph, mod, bit_precise: bool = False,
+                             addr_edges: bool = False) -> None:
     """把一个 module_inst 全部对象和依赖关系加到同一张图里。"""
     # 1) 端口
     for port in util.vpi_iterate_gen(uhdm.vpiPort, mod):
@@ -83,20 +112,22 @@ def _build_module_into_graph(g: RmmgGraph, mod) -> None:
 
     # 4) 连续赋值：组合依赖
     for ca in util.vpi_iterate_gen(uhdm.vpiContAssign, mod):
-        _handle_cont_assign(g, ca)
+        _handle_cont_assign(g, ca, bit_precise=bit_precise, addr_edges=addr_edges)
 
     # 5) 过程赋值：组合 / 时序依赖
     for proc in util.vpi_iterate_gen(uhdm.vpiProcess, mod):
-        _handle_process(g, proc)
+        _handle_process(g, proc, bit_precise=bit_precise, addr_edges=addr_edges)
     for alw in util.vpi_iterate_gen(uhdm.vpiAlways, mod):
-        _handle_process(g, alw)
+        _handle_process(g, alw, bit_precise=bit_precise, addr_edges=addr_edges)
 
 def _connect_port_bindings(g: RmmgGraph, mod) -> None:
     """
     对一个 module_inst，把它的 vpiPort 的 HighConn / LowConn 转成图边。
     这样可以把父模块信号和子模块内部信号桥接起来。
+    这些边带 attrs["role"] = "port"，遍历时可以用 EdgeClass.PORT 屏蔽 / 识别。
     """
-    for port in util.vpi_iterate_gen(uhdm.vpiPort, mod):
+    for port, high, low in uhdm.iterate_handles(uhdm.vpiPort, mod,
+                                                uhdm.vpiHighConn, uhdm.vpiLowConn):
         # 端口自己是一个节点
         port_name = _get_full_name(port)
         port_id = g.get_node_id(port_name)
@@ -104,7 +135,6 @@ def _connect_port_bindings(g: RmmgGraph, mod) -> None:
             port_id = _ensure_port_node(g, port)
 
         # HighConn: 父模块中的实际连接
-        high = uhdm.vpi_handle(uhdm.vpiHighConn, port)
         high_id = None
         if high is not None:
             high_name = _get_full_name(high)
@@ -114,7 +144,6 @@ def _connect_port_bindings(g: RmmgGraph, mod) -> None:
                     high_id = _ensure_signal_node(g, high)
 
         # LowConn: 子模块内部连到的 net（formal）
-        low = uhdm.vpi_handle(uhdm.vpiLowConn, port)
         low_id = None
         if low is not None:
             low_name = _get_full_name(low)
@@ -129,27 +158,35 @@ def _connect_port_bindings(g: RmmgGraph, mod) -> None:
         # input: parent -> port -> child
         if dir_val == uhdm.vpiInput:
             if high_id is not None:
-                g.add_edge(high_id, port_id, is_seq=False, cond=None, src_loc=None)
+                g.add_edge(high_id, port_id, is_seq=False, cond=None, src_loc=None,
+                           attrs={"role": "port"})
             if low_id is not None:
-                g.add_edge(port_id, low_id, is_seq=False, cond=None, src_loc=None)
+                g.add_edge(port_id, low_id, is_seq=False, cond=None, src_loc=None,
+                           attrs={"role": "port"})
 
         # output: child -> port -> parent
         elif dir_val == uhdm.vpiOutput:
             if low_id is not None:
-                g.add_edge(low_id, port_id, is_seq=False, cond=None, src_loc=None)
+                g.add_edge(low_id, port_id, is_seq=False, cond=None, src_loc=None,
+                           attrs={"role": "port"})
             if high_id is not None:
-                g.add_edge(port_id, high_id, is_seq=False, cond=None, src_loc=None)
+                g.add_edge(port_id, high_id, is_seq=False, cond=None, src_loc=None,
+                           attrs={"role": "port"})
 
         # inout: 先双向全连，后续如果需要再精细化方向
         else:
             if high_id is not None:
-                g.add_edge(high_id, port_id, is_seq=False, cond=None, src_loc=None)
+                g.add_edge(high_id, port_id, is_seq=False, cond=None, src_loc=None,
+                           attrs={"role": "port"})
                 if low_id is not None:
-                    g.add_edge(high_id, low_id, is_seq=False, cond=None, src_loc=None)
+                    g.add_edge(high_id, low_id, is_seq=False, cond=None, src_loc=None,
+                               attrs={"role": "port"})
             if low_id is not None:
-                g.add_edge(low_id, port_id, is_seq=False, cond=None, src_loc=None)
+                g.add_edge(low_id, port_id, is_seq=False, cond=None, src_loc=None,
+                           attrs={"role": "port"})
                 if high_id is not None:
-                    g.add_edge(low_id, high_id, is_seq=False, cond=None, src_loc=None)
+                    g.add_edge(low_id, high_id, is_seq=False, cond=None, src_loc=None,
+                               attrs={"role": "port"})
 
 
 # ==== 节点构建辅助 =========================================================
@@ -298,6 +335,19 @@ def _resolve_actual_typespec(ts):
 
 
 def _width_from_typespec(ts) -> int | None:
+    """_typespec_width 的记忆化版本（同一个 typespec handle 只算一次）。"""
+    if ts is None:
+        return None
+    key = handle_key(ts)
+    if key is None:
+        return _typespec_width(ts)
+    if key in _TS_WIDTHS:
+        return _TS_WIDTHS[key]
+    width = _TS_WIDTHS[key] = _typespec_width(ts)
+    return width
+
+
+def _typespec_width(ts) -> int | None:
     """
     从 vpiTypespec 树计算拍扁后的 bit 宽度。
     覆盖常见几类：
@@ -424,29 +474,55 @@ def _width_net_like(obj) -> int:
 
 
 def _width_via_parent_port(obj) -> int | None:
+    """obj 连到的第一个父模块端口的宽度（按端口顺序，同一个端口上 lowConn / highConn 都算）。"""
     parent = uhdm.vpi_handle(uhdm.vpiParent, obj)
     if parent is None:
         return None
 
+    ports, by_name, by_key = _port_connection_index(parent)
     target_name = _get_full_name(obj)
-    for port in util.vpi_iterate_gen(uhdm.vpiPort, parent):
+    hits = [by_key.get(handle_key(obj))]
+    if target_name:
+        hits.append(by_name.get(target_name))
+    hits = [i for i in hits if i is not None]
+    if not hits:
+        return None
+    return _width_port(ports[min(hits)])
+
+
+def _port_connection_index(parent) -> Tuple[List[object], Dict[str, int], Dict[int, int]]:
+    """
+    每个模块实例建一次：连接对象（lowConn / highConn 及其 vpiActual）的名字和 handle
+    -> 首个连到它的端口下标。端口下标取最小值，和逐个端口扫描的“第一个命中”一致。
+    """
+    name = _get_full_name(parent)
+    key = (uhdm.vpi_get(uhdm.vpiType, parent), name) if name else handle_key(parent)
+    index = _PORT_INDEX.get(key) if key is not None else None
+    if index is not None:
+        return index
+
+    ports = list(util.vpi_iterate_gen(uhdm.vpiPort, parent))
+    by_name: Dict[str, int] = {}
+    by_key: Dict[int, int] = {}
+    for i, port in enumerate(ports):
         for tag in (uhdm.vpiLowConn, uhdm.vpiHighConn):
             conn = uhdm.vpi_handle(tag, port)
             if conn is None:
                 continue
-            if conn is obj:
-                return _width_port(port)
-            conn_name = _get_full_name(conn)
-            if target_name and conn_name == target_name:
-                return _width_port(port)
             actual = uhdm.vpi_handle(uhdm.vpiActual, conn)
-            if actual is obj:
-                return _width_port(port)
-            if target_name and actual is not None:
-                actual_name = _get_full_name(actual)
-                if actual_name == target_name:
-                    return _width_port(port)
-    return None
+            for o in (conn, actual):
+                if o is None:
+                    continue
+                o_key = handle_key(o)
+                if o_key is not None:
+                    by_key.setdefault(o_key, i)
+                o_name = _get_full_name(o)
+                if o_name:
+                    by_name.setdefault(o_name, i)
+    index = (ports, by_name, by_key)
+    if key is not None:
+        _PORT_INDEX[key] = index
+    return index
 
 
 def _width_from_source(obj) -> int | None:
@@ -589,21 +665,29 @@ def _get_width(obj) -> int:
     if obj is None:
         return 1
 
+    # 端口递归保护生效时结果可能被截断成 1，只在最外层读写缓存
+    key = handle_key(obj) if not _PORT_RESOLVE_GUARD else None
+    if key is not None and key in _WIDTH_CACHE:
+        return _WIDTH_CACHE[key]
+
     obj_type = uhdm.vpi_get(uhdm.vpiType, obj)
 
     if obj_type == uhdm.vpiPort:
-        return _width_port(obj)
-
-    if obj_type in (uhdm.vpiNet, uhdm.vpiReg, uhdm.vpiLogicVar, uhdm.vpiMemory):
-        return _width_net_like(obj)
-
-    return 1
+        width = _width_port(obj)
+    elif obj_type in (uhdm.vpiNet, uhdm.vpiReg, uhdm.vpiLogicVar, uhdm.vpiMemory):
+        width = _width_net_like(obj)
+    else:
+        width = 1
+    if key is not None:
+        _WIDTH_CACHE[key] = width
+    return width
 
 
 
 # ==== 连续赋值（组合边） ====================================================
 
-def _handle_cont_assign(g: RmmgGraph, ca) -> None:
+def _handle_cont_assign(g: RmmgGraph, ca, bit_precise: bool = False,
+                        addr_edges: bool = False) -> None:
     lhs = uhdm.vpi_handle(uhdm.vpiLhs, ca)
     rhs = uhdm.vpi_handle(uhdm.vpiRhs, ca)
     if lhs is None or rhs is None:
@@ -621,12 +705,16 @@ def _handle_cont_assign(g: RmmgGraph, ca) -> None:
         if src_id is None:
             src_id = _ensure_signal_node(g, src_obj)
         g.add_edge(src_id, dst_id, is_seq=False, cond=None,
-                   src_loc=_get_src_loc(ca))
+                   src_loc=_get_src_loc(ca),
+                   attrs=_bit_attrs(g, src_obj, src_id, lhs, dst_id, rhs) if bit_precise else None)
+    if addr_edges:
+        _add_addr_edges(g, lhs, rhs, dst_id, is_seq=False, src_loc=_get_src_loc(ca))
 
 
 # ==== 过程赋值（组合 / 时序边） ============================================
 
-def _handle_process(g: RmmgGraph, proc) -> None:
+def _handle_process(g: RmmgGraph, proc, bit_precise: bool = False,
+                    addr_edges: bool = False) -> None:
     """
     对 vpiProcess / vpiAlways：
     - 判定是否 clocked（时序过程）
@@ -637,7 +725,8 @@ def _handle_process(g: RmmgGraph, proc) -> None:
     stmt = uhdm.vpi_handle(uhdm.vpiStmt, proc)
     if stmt is None:
         return
-    _traverse_stmt_for_assign(g, stmt, is_seq=is_seq, clock_name=clock_name)
+    _traverse_stmt_for_assign(g, stmt, is_seq=is_seq, clock_name=clock_name,
+                              bit_precise=bit_precise, addr_edges=addr_edges)
 
 
 def _is_clocked_process(proc) -> Tuple[bool, Optional[str]]:
@@ -678,7 +767,9 @@ def _is_clocked_process(proc) -> Tuple[bool, Optional[str]]:
 def _traverse_stmt_for_assign(g: RmmgGraph,
                               stmt,
                               is_seq: bool,
-                              clock_name: Optional[str]) -> None:
+                              clock_name: Optional[str],
+                              bit_precise: bool = False,
+                              addr_edges: bool = False) -> None:
     """
     在 stmt 树中找赋值语句（blocking/non-blocking），生成边。
     只关注数据依赖，不展开条件逻辑（condition 可以以后再加到 edge 上）。
@@ -714,12 +805,17 @@ def _traverse_stmt_for_assign(g: RmmgGraph,
                 src_id = _ensure_signal_node(g, src_obj)
             g.add_edge(src_id, dst_id, is_seq=is_seq,
                        cond=None,  # TODO: 以后加 if/case 条件
-                       src_loc=_get_src_loc(stmt))
+                       src_loc=_get_src_loc(stmt),
+                       attrs=_bit_attrs(g, src_obj, src_id, lhs, dst_id, rhs)
+                       if bit_precise else None)
+        if addr_edges:
+            _add_addr_edges(g, lhs, rhs, dst_id, is_seq=is_seq, src_loc=_get_src_loc(stmt))
         return
 
     # 容器语句：begin / if / case / for / while 等，递归子 stmt
     for child in _iter_stmt_children(stmt):
-        _traverse_stmt_for_assign(g, child, is_seq=is_seq, clock_name=clock_name)
+        _traverse_stmt_for_assign(g, child, is_seq=is_seq, clock_name=clock_name,
+                                  bit_precise=bit_precise, addr_edges=addr_edges)
 
 
 def _iter_stmt_children(stmt) -> Iterable:
@@ -799,6 +895,135 @@ def _iter_expr_leaves(expr) -> Iterable:
     yield expr
 
 
+def _const_value(expr) -> int | None:
+    if expr is None or uhdm.vpi_get(uhdm.vpiType, expr) != uhdm.vpiConstant:
+        return None
+    return _literal_to_int(uhdm.vpi_get_str(uhdm.vpiDecompile, expr))
+
+
+def _select_bits(expr) -> Optional[Tuple[int, int]]:
+    """常量 bit-select a[3] / part-select a[11:6] 选中的位区间 (lo, hi)；其他情况返回 None（整个信号）。"""
+    if expr is None:
+        return None
+    t = uhdm.vpi_get(uhdm.vpiType, expr)
+    if t == uhdm.vpiBitSelect:
+        i = _const_value(uhdm.vpi_handle(uhdm.vpiIndex, expr))
+        return None if i is None else (i, i)
+    if t == uhdm.vpiPartSelect:
+        left = _const_value(uhdm.vpi_handle(uhdm.vpiLeftRange, expr))
+        right = _const_value(uhdm.vpi_handle(uhdm.vpiRightRange, expr))
+        if left is None or right is None:
+            return None
+        return (min(left, right), max(left, right))
+    return None
+
+
+def _declared_range(obj) -> Optional[Tuple[int, int]]:
+    """
+    信号声明的 [left:right]（只有一维 packed range 时；多维 packed 的下标不是位号，返回 None）。
+    先看 typespec，再看对象自己挂的 range；ref 先解析到 vpiActual。
+    """
+    if obj is None:
+        return None
+    actual = uhdm.vpi_handle(uhdm.vpiActual, obj)
+    if actual is not None:
+        obj = actual
+    ts = _resolve_actual_typespec(uhdm.vpi_handle(uhdm.vpiTypespec, obj))
+    for holder in (ts, obj):
+        if holder is None:
+            continue
+        ranges = list(util.vpi_iterate_gen(uhdm.vpiRange, holder))
+        if not ranges:
+            continue
+        if len(ranges) != 1:
+            return None
+        left = _const_value(uhdm.vpi_handle(uhdm.vpiLeftRange, ranges[0]))
+        right = _const_value(uhdm.vpi_handle(uhdm.vpiRightRange, ranges[0]))
+        if left is None or right is None:
+            return None
+        return (left, right)
+    return None
+
+
+def _node_bits(g: RmmgGraph, node_id: int, expr) -> Optional[Tuple[int, int]]:
+    """expr 上常量 select 的位区间，换算成相对节点声明 LSB 的偏移（见 bits.select_offsets）。"""
+    node = g.nodes[node_id]
+    if node.kind == "memory":
+        return None
+    select = _select_bits(expr)
+    if select is None:
+        return None
+    if "bit_range" not in node.attrs:
+        node.attrs["bit_range"] = _declared_range(node.uhdm_obj)
+    return select_offsets(select, node.attrs["bit_range"], node.width)
+
+
+def _bit_attrs(g: RmmgGraph, src_obj, src_id: int, lhs, dst_id: int,
+               rhs) -> Optional[Dict[str, object]]:
+    """
+    bit_precise 模式下数据边的位区间（相对声明 LSB 的偏移）。memory 上的 [idx] 选的是字而不是位，不记；
+    声明范围拿不到的一侧按整个信号处理。
+    RHS 就是这个 select 本身、且两边位数相同，才算逐位对齐（见 rmmg/bits.py）。
+    """
+    src_bits = _node_bits(g, src_id, src_obj)
+    dst_bits = _node_bits(g, dst_id, lhs)
+    if src_bits is None and dst_bits is None:
+        return None
+    attrs: Dict[str, object] = {}
+    if src_bits is not None:
+        attrs["src_bits"] = src_bits
+    if dst_bits is not None:
+        attrs["dst_bits"] = dst_bits
+    # 有 select 但换不成偏移的一侧位置不明，不能逐位对齐
+    exact = all(_select_bits(o) is None or bits is not None
+                for o, bits in ((src_obj, src_bits), (lhs, dst_bits)))
+    if src_obj is rhs and exact:
+        sw = src_bits[1] - src_bits[0] + 1 if src_bits else g.nodes[src_id].width
+        dw = dst_bits[1] - dst_bits[0] + 1 if dst_bits else g.nodes[dst_id].width
+        if sw == dw:
+            attrs["bits_aligned"] = True
+    return attrs
+
+
+def _iter_select_index_leaves(expr) -> Iterable:
+    """
+    expr 里 mem[idx] / vec[idx] 这类选择的非常量下标叶子（地址角色）。
+    part-select 的上下界通常是常量，这里不展开。
+    """
+    if expr is None:
+        return
+    t = uhdm.vpi_get(uhdm.vpiType, expr)
+    if t in (uhdm.vpiBitSelect, uhdm.vpiVarSelect):
+        if t == uhdm.vpiBitSelect:
+            indices = [uhdm.vpi_handle(uhdm.vpiIndex, expr)]
+        else:
+            indices = list(util.vpi_iterate_gen(uhdm.vpiIndex, expr))
+        for idx in indices:
+            for leaf in _iter_expr_leaves(idx):
+                if uhdm.vpi_get(uhdm.vpiType, leaf) != uhdm.vpiConstant:
+                    yield leaf
+        return
+    if t == uhdm.vpiOperation:
+        for opnd in util.vpi_iterate_gen(uhdm.vpiOperand, expr):
+            yield from _iter_select_index_leaves(opnd)
+
+
+def _add_addr_edges(g: RmmgGraph, lhs, rhs, dst_id: int,
+                    is_seq: bool, src_loc) -> None:
+    """
+    读地址（RHS 里的 mem[raddr]）和写地址（LHS 的 mem[waddr]）都会影响 dst，
+    这类依赖单独建边并标 attrs["role"] = "addr"，和数据依赖区分开（见 rmmg/masks.py）。
+    """
+    for expr in (rhs, lhs):
+        for src_obj in _iter_select_index_leaves(expr):
+            src_name = _get_full_name(src_obj)
+            src_id = g.get_node_id(src_name)
+            if src_id is None:
+                src_id = _ensure_signal_node(g, src_obj)
+            g.add_edge(src_id, dst_id, is_seq=is_seq, cond=None,
+                       src_loc=src_loc, attrs={"role": "addr"})
+
+
 def _get_src_loc(obj) -> Optional[Tuple[str, int]]:
     """从 UHDM 对象上提取 (file, line) 源位置，用于 debug / 消融。"""
     if obj is None:
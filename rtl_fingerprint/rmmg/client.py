@@ -0,0 +1,115 @@
+# rtl_fingerprint/rmmg/client.py
+
+"""
+RMMG 查询服务的轻量客户端（同步 socket，无额外依赖）。
+
+命令行用法：
+  python -m rtl_fingerprint.rmmg.client --socket /tmp/rmmg.sock ping
+  python -m rtl_fingerprint.rmmg.client --port 8765 find prefix:work@Rob.io_commit_
+  python -m rtl_fingerprint.rmmg.client --socket /tmp/rmmg.sock \
+      query exact:work@MSHR.meta_tag substr:io_schedule_bits_b_bits_tag --max-depth 10
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import socket
+import sys
+from typing import Any, Dict, Optional
+
+
+def parse_pred_arg(text: str) -> Dict[str, str]:
+    """'prefix:work@Rob.io_commit_' -> {"type": "prefix", "value": ...}；无前缀按 substr。"""
+    rtype, sep, value = text.partition(":")
+    if sep and rtype in ("prefix", "substr", "regex", "exact", "attr"):
+        return {"type": rtype, "value": value}
+    return {"type": "substr", "value": text}
+
+
+class RmmgQueryClient:
+    def __init__(self, socket_path: Optional[str] = None,
+                 host: str = "127.0.0.1", port: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        if socket_path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(socket_path)
+        else:
+            self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._rfile = self._sock.makefile("rb")
+        self._next_id = 0
+
+    def request(self, op: str, **params: Any) -> Dict[str, Any]:
+        """发送一个请求并等待响应；服务端报错时抛 RuntimeError。"""
+        self._next_id += 1
+        req = dict(params, op=op, id=self._next_id)
+        self._sock.sendall(json.dumps(req).encode() + b"\n")
+        line = self._rfile.readline()
+        if not line:
+            raise ConnectionError("RMMG server closed the connection")
+        resp = json.loads(line)
+        if not resp.get("ok"):
+            raise RuntimeError(resp.get("error", "unknown server error"))
+        return resp
+
+    def ping(self) -> str:
+        return self.request("ping")["result"]
+
+    def stats(self) -> Dict[str, Any]:
+        return self.request("stats")["result"]
+
+    def find(self, pred: Any, limit: Optional[int] = None):
+        return self.request("find", pred=pred, limit=limit)["result"]
+
+    def query(self, source: Any, target: Any, max_depth: int = 50,
+              max_paths: Optional[int] = None, **budget: Any) -> Dict[str, Any]:
+        """budget: deadline_s / max_expanded / max_memory_bytes，超限时结果带 truncated。"""
+        return self.request("query", source=source, target=target,
+                            max_depth=max_depth, max_paths=max_paths, **budget)["result"]
+
+    def close(self) -> None:
+        self._rfile.close()
+        self._sock.close()
+
+    def __enter__(self) -> "RmmgQueryClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RMMG query client")
+    parser.add_argument("--socket", help="Unix socket path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    sub = parser.add_subparsers(dest="op", required=True)
+    sub.add_parser("ping")
+    sub.add_parser("stats")
+    p_find = sub.add_parser("find")
+    p_find.add_argument("pred", help="TYPE:VALUE, e.g. prefix:work@Rob.io_commit_")
+    p_find.add_argument("--limit", type=int)
+    p_query = sub.add_parser("query")
+    p_query.add_argument("source", help="TYPE:VALUE source predicate")
+    p_query.add_argument("target", help="TYPE:VALUE target predicate")
+    p_query.add_argument("--max-depth", type=int, default=50)
+    p_query.add_argument("--max-paths", type=int)
+    p_query.add_argument("--deadline", type=float, help="Wall-clock budget in seconds")
+    p_query.add_argument("--max-expanded", type=int, help="Expanded-node budget")
+    args = parser.parse_args()
+
+    with RmmgQueryClient(args.socket, args.host, args.port) as client:
+        if args.op == "find":
+            result = client.find(parse_pred_arg(args.pred), limit=args.limit)
+        elif args.op == "query":
+            result = client.query(parse_pred_arg(args.source), parse_pred_arg(args.target),
+                                  max_depth=args.max_depth, max_paths=args.max_paths,
+                                  deadline_s=args.deadline, max_expanded=args.max_expanded)
+        else:
+            result = client.request(args.op)["result"]
+    json.dump(result, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
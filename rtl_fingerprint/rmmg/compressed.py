@@ -0,0 +1,255 @@
+# rtl_fingerprint/rmmg/compressed.py
+
+"""
+WebGraph 风格的压缩邻接表，给多 tile SoC 这种 dict / CSR 邻接本身就上 GB 的图用：
+  - 每个节点的后继排序去重（平行边合并成一条，遍历只关心后继集合）
+  - 引用压缩：可以引用窗口内（前 window 个节点）某个相似的后继表，
+    用 copy block（交替的“复制 / 跳过”段长）说明抄哪些元素，引用链长度不超过 max_ref_chain
+  - 剩下的 residual 做差分编码：第一个相对 u 用 zigzag，之后是相邻差 - 1，全部 varint（LEB128）
+  - 所有节点的编码拼在一个 bytearray 里，offsets 记每个节点的起点
+每个节点的编码：varint ref（0 = 不引用），ref > 0 时 varint 段数 + 各段长，
+然后 varint residual 个数 + residual。
+读取时现场解码；可选的块缓存按 block_size 个连续节点为单位解码并 LRU 保留 cache_blocks 块
+（引用多半落在同一块内，整块解码顺带复用）。
+get(u, default) 与 dict 邻接表一致，可以直接交给 bfs_paths_on；
+同一层内后继按节点 ID 升序而不是边插入顺序，所以 BFS 选出的最短路径可能不同，长度相同。
+"""
+
+from __future__ import annotations
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .csr import CsrGraph
+
+
+# ===== varint ===============================================================
+
+def _put_varint(buf: bytearray, x: int) -> None:
+    while x >= 0x80:
+        buf.append((x & 0x7F) | 0x80)
+        x >>= 7
+    buf.append(x)
+
+
+def _get_varint(data, pos: int) -> Tuple[int, int]:
+    x = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        x |= (b & 0x7F) << shift
+        if b < 0x80:
+            return x, pos
+        shift += 7
+
+
+def _zigzag(x: int) -> int:
+    return x << 1 if x >= 0 else (-x << 1) - 1
+
+
+def _unzigzag(z: int) -> int:
+    return z >> 1 if not z & 1 else -((z + 1) >> 1)
+
+
+# ===== 编码 =================================================================
+
+def _encode_residuals(buf: bytearray, u: int, res: Sequence[int]) -> None:
+    _put_varint(buf, len(res))
+    prev = None
+    for x in res:
+        _put_varint(buf, _zigzag(x - u) if prev is None else x - prev - 1)
+        prev = x
+
+
+def _encode_node(u: int, succ: Sequence[int], ref: int,
+                 ref_succ: Optional[Sequence[int]]) -> bytearray:
+    buf = bytearray()
+    _put_varint(buf, ref)
+    if not ref:
+        _encode_residuals(buf, u, succ)
+        return buf
+    mine = set(succ)
+    blocks: List[int] = []
+    copying, run = True, 0
+    copied = set()
+    for x in ref_succ:
+        take = x in mine
+        if take:
+            copied.add(x)
+        if take == copying:
+            run += 1
+        else:
+            blocks.append(run)
+            copying, run = take, 1
+    if copying:
+        blocks.append(run)          # 结尾的跳过段省略不写
+    _put_varint(buf, len(blocks))
+    for b in blocks:
+        _put_varint(buf, b)
+    _encode_residuals(buf, u, [x for x in succ if x not in copied])
+    return buf
+
+
+class CompressedAdjacency:
+    """只读压缩邻接表。from_csr / from_graph 构建，get / successors / iter_successors 读取。"""
+
+    def __init__(self, num_nodes: int, data: bytes, offsets: array,
+                 block_size: int = 64, cache_blocks: int = 16):
+        self.num_nodes = num_nodes
+        self.data = data
+        self.offsets = offsets
+        self.block_size = max(1, block_size)
+        self.cache_blocks = cache_blocks
+        self._blocks: "OrderedDict[int, List[List[int]]]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @classmethod
+    def from_csr(cls, csr: CsrGraph, reverse: bool = False, window: int = 7,
+                 max_ref_chain: int = 3, **kwargs) -> "CompressedAdjacency":
+        """reverse=True 时压缩前驱表（rindptr / rindices）。"""
+        ptr, idx = (csr.rindptr, csr.rindices) if reverse else (csr.indptr, csr.indices)
+        n = csr.num_nodes
+        data = bytearray()
+        offsets = [0] * (n + 1)
+        recent: List[List[int]] = []        # 最近 window 个节点的后继表
+        chain: List[int] = []               # 对应的引用链长度
+        for u in range(n):
+            succ = sorted(set(idx[ptr[u]:ptr[u + 1]]))
+            best, best_chain = _encode_node(u, succ, 0, None), 0
+            if succ:
+                mine = set(succ)
+                for r in range(1, min(window, len(recent)) + 1):
+                    cand = recent[-r]
+                    if chain[-r] >= max_ref_chain or not mine.intersection(cand):
+                        continue
+                    enc = _encode_node(u, succ, r, cand)
+                    if len(enc) < len(best):
+                        best, best_chain = enc, chain[-r] + 1
+            data += best
+            offsets[u + 1] = len(data)
+            recent.append(succ)
+            chain.append(best_chain)
+            if len(recent) > window:
+                del recent[0], chain[0]
+        # 4 GB 以内的编码用 32 位偏移
+        return cls(n, bytes(data), array("I" if len(data) < 1 << 32 else "q", offsets),
+                   **kwargs)
+
+    @classmethod
+    def from_graph(cls, g, reverse: bool = False, **kwargs) -> "CompressedAdjacency":
+        return cls.from_csr(g.freeze(), reverse=reverse, **kwargs)
+
+    # ===== 解码 =============================================================
+
+    def _decode(self, u: int, local: Optional[Dict[int, List[int]]] = None) -> List[int]:
+        if local is not None and u in local:
+            return local[u]
+        data = self.data
+        pos = self.offsets[u]
+        ref, pos = _get_varint(data, pos)
+        out: List[int] = []
+        if ref:
+            v = u - ref
+            base = self._lookup(v, local)
+            nblocks, pos = _get_varint(data, pos)
+            i, copying = 0, True
+            for _ in range(nblocks):
+                run, pos = _get_varint(data, pos)
+                if copying:
+                    out.extend(base[i:i + run])
+                i += run
+                copying = not copying
+        k, pos = _get_varint(data, pos)
+        if k:
+            res = []
+            z, pos = _get_varint(data, pos)
+            x = u + _unzigzag(z)
+            res.append(x)
+            for _ in range(k - 1):
+                gap, pos = _get_varint(data, pos)
+                x += gap + 1
+                res.append(x)
+            out = sorted(out + res) if out else res
+        return out
+
+    def _lookup(self, v: int, local: Optional[Dict[int, List[int]]]) -> List[int]:
+        """被引用的后继表：先看正在解码的块，再看块缓存，最后现场解码。"""
+        if local is not None and v in local:
+            return local[v]
+        block = self._blocks.get(v // self.block_size)
+        if block is not None:
+            return block[v % self.block_size]
+        return self._decode(v)
+
+    def _block(self, b: int) -> List[List[int]]:
+        block = self._blocks.get(b)
+        if block is not None:
+            self.cache_hits += 1
+            self._blocks.move_to_end(b)
+            return block
+        self.cache_misses += 1
+        lo = b * self.block_size
+        local: Dict[int, List[int]] = {}
+        for u in range(lo, min(lo + self.block_size, self.num_nodes)):
+            local[u] = self._decode(u, local)
+        block = list(local.values())
+        self._blocks[b] = block
+        if len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        return block
+
+    # ===== 邻接访问 =========================================================
+
+    def successors(self, u: int) -> List[int]:
+        if self.cache_blocks > 0:
+            return self._block(u // self.block_size)[u % self.block_size]
+        return self._decode(u)
+
+    def iter_successors(self, u: int) -> Iterator[int]:
+        """不引用其他表的节点边读边产出，不物化整张表。"""
+        data = self.data
+        pos = self.offsets[u]
+        ref, pos = _get_varint(data, pos)
+        if ref:
+            yield from self.successors(u)
+            return
+        k, pos = _get_varint(data, pos)
+        x = u
+        for i in range(k):
+            z, pos = _get_varint(data, pos)
+            x = x + _unzigzag(z) if i == 0 else x + z + 1
+            yield x
+
+    def get(self, u: int, default: Iterable[int] = ()) -> Sequence[int]:
+        """兼容 Dict[int, List[int]] 邻接表的取法。"""
+        if 0 <= u < self.num_nodes:
+            return self.successors(u)
+        return default
+
+    def out_degree(self, u: int) -> int:
+        """去重后的后继数。"""
+        return len(self.successors(u))
+
+    def clear_cache(self) -> None:
+        self._blocks.clear()
+
+    # ===== 统计 =============================================================
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + len(self.offsets) * self.offsets.itemsize
+
+    def stats(self, csr: Optional[CsrGraph] = None) -> Dict[str, float]:
+        """压缩后字节数；给 csr 时和其 indptr + indices 的字节数对比。"""
+        out: Dict[str, float] = {
+            "nodes": self.num_nodes,
+            "bytes": self.nbytes,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+        if csr is not None:
+            raw = len(csr.indptr) * 8 + len(csr.indices) * 4
+            out["csr_bytes"] = raw
+            out["ratio"] = raw / max(1, self.nbytes)
+        return out
@@ -0,0 +1,308 @@
+# rtl_fingerprint/rmmg/contract.py
+
+"""
+图收缩：在不改原图的前提下生成一张更小的图，查询结果可以展开回原图节点。
+  - 流水线寄存器链（contract_pipelines）：单入单出、被时序赋值、位宽不变的寄存器
+    首尾相接形成的链 a -> r1 -> ... -> rk -> b 收缩成一条边 a -> b，
+    边 attrs 记 delay（链上时序边条数）和 members（r1..rk 的原图 ID）
+  - 层次直通（contract_passthrough）：端口绑定（attrs["role"] == "port"）把父模块信号、
+    端口节点、子模块内部 net 串成别名链，用并查集把它们合并成一个节点，
+    合并节点 attrs["aliases"] 记下其余成员的层次名
+  - Contraction 保存收缩图与原图之间的映射，expand_path 把收缩图上的路径
+    还原成原图上的完整节点序列；两种收缩可以叠加（把上一步的 Contraction 当输入）
+默认保留 is_arch_visible / is_micro_state 节点（查询的源 / 汇）：
+不会被收进链里，也不会被合并进别的节点（但可以作为合并组的代表）。
+"""
+
+from __future__ import annotations
+from array import array
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .graph import RmmgGraph, RmmgNode
+
+NodePred = Callable[[RmmgNode], bool]
+
+
+def _default_keep(node: RmmgNode) -> bool:
+    return bool(node.attrs.get("is_arch_visible") or node.attrs.get("is_micro_state"))
+
+
+class Contraction:
+    def __init__(self, original: RmmgGraph, graph: RmmgGraph, orig_of: array, new_of: array,
+                 groups: Optional[List[List[int]]] = None,
+                 base: Optional["Contraction"] = None):
+        self.original = original
+        self.graph = graph            # 收缩后的图
+        self.orig_of = orig_of        # 收缩图节点 -> 原图节点（合并组的代表）
+        self.new_of = new_of          # 原图节点 -> 收缩图节点，-1 表示被收进了某条边
+        self.groups = groups          # 收缩图节点 -> 合并的原图节点（代表在前）；None 表示没有合并
+        self.base = base              # 叠加收缩时的上一步，expand_path 继续往回展开
+        # (u, v) -> 展开时插入的原图节点；有普通边时为 []，否则取最短的一条链
+        self._members: Dict[Tuple[int, int], List[int]] = {}
+        for e in graph.edges:
+            m = e.attrs.get("members", [])
+            cur = self._members.get((e.src, e.dst))
+            if cur is None or len(m) < len(cur):
+                self._members[(e.src, e.dst)] = list(m)
+
+    @property
+    def absorbed(self) -> int:
+        """被收进边里 / 合并进别的节点的原图节点数（只算这一步）。"""
+        return len(self.new_of) - len(self.orig_of)
+
+    @property
+    def root(self) -> RmmgGraph:
+        """最初的原图（叠加收缩时沿 base 往回找）。"""
+        return self.base.root if self.base is not None else self.original
+
+    def alias_table(self) -> Dict[str, List[str]]:
+        """代表节点名 -> 被合并掉的层次名。"""
+        if not self.groups:
+            return {}
+        names = self.original.nodes
+        return {names[grp[0]].hier_name: [names[v].hier_name for v in grp[1:]]
+                for grp in self.groups if len(grp) > 1}
+
+    def expand_path(self, path: Sequence[int]) -> List[int]:
+        """收缩图上的路径 -> 最初原图上的节点序列（链成员 / 合并组内部的跳按原顺序插回）。"""
+        if self.groups is None:
+            out: List[int] = []
+            for i, v in enumerate(path):
+                if i:
+                    out.extend(self._members[(path[i - 1], v)])
+                out.append(self.orig_of[v])
+        else:
+            out = self._expand_groups(path)
+        return self.base.expand_path(out) if self.base is not None else out
+
+    def _expand_groups(self, path: Sequence[int]) -> List[int]:
+        """
+        在原图上对 (路径位置 i, 第 i 个合并组的成员) 做 BFS：组内边停在 i，
+        进入下一组的边前进到 i + 1。从第一组的代表出发，到最后一组的代表结束。
+        """
+        if not path:
+            return []
+        csr = self.original.freeze()
+        new_of = self.new_of
+        k = len(path) - 1
+        start = (0, self.orig_of[path[0]])
+        goal = (k, self.orig_of[path[-1]])
+        parent: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {start: None}
+        q = deque([start])
+        while q and goal not in parent:
+            i, x = q.popleft()
+            for j in range(csr.indptr[x], csr.indptr[x + 1]):
+                y = csr.indices[j]
+                if new_of[y] == path[i]:
+                    nxt = (i, y)
+                elif i < k and new_of[y] == path[i + 1]:
+                    nxt = (i + 1, y)
+                else:
+                    continue
+                if nxt not in parent:
+                    parent[nxt] = (i, x)
+                    q.append(nxt)
+        if goal not in parent:
+            raise ValueError("path is not a walk in the contracted graph")
+        out, st = [], goal
+        while st is not None:
+            out.append(st[1])
+            st = parent[st]
+        out.reverse()
+        return out
+
+    def expand_paths(self, paths: Sequence[Sequence[int]]) -> List[List[int]]:
+        return [self.expand_path(p) for p in paths]
+
+
+GraphLike = Union[RmmgGraph, Contraction]
+
+
+def _unwrap(g: GraphLike) -> Tuple[RmmgGraph, Optional[Contraction]]:
+    """输入可以是原图，也可以是上一步的 Contraction（在其收缩图上继续收缩）。"""
+    if isinstance(g, Contraction):
+        return g.graph, g
+    return g, None
+
+
+def _copy_node(dst: RmmgGraph, node: RmmgNode) -> int:
+    nid = dst.add_node(node.hier_name, node.kind, node.width, node.uhdm_obj)
+    dst.nodes[nid].attrs.update(node.attrs)
+    return nid
+
+
+def contract_pipelines(
+    g: GraphLike,
+    keep: Optional[NodePred] = None,
+    min_length: int = 1,
+) -> Contraction:
+    """
+    识别纯流水线寄存器并收缩。寄存器 r 可收缩当且仅当：
+      - kind == "reg"（或 attrs["seq"]），keep(r) 为假
+      - 去重后恰好一个前驱、一个后继，且都不是它自己
+      - 入边全是时序边，出入边都不是地址依赖（attrs["role"] == "addr"）
+      - 前驱位宽已知时与 r 相同（值原样向后传）
+    min_length: 少于这么多个寄存器的链不收缩。
+    """
+    g, base = _unwrap(g)
+    keep = keep or _default_keep
+    csr = g.freeze()
+    edges = g.edges
+    n = csr.num_nodes
+    ptr, idx, pos = csr.indptr, csr.indices, csr.edge_pos
+    rptr, ridx, rpos = csr.rindptr, csr.rindices, csr.redge_pos
+
+    pred = array("i", [-1]) * n
+    succ = array("i", [-1]) * n
+    cand = bytearray(n)
+    for v in range(n):
+        node = g.nodes[v]
+        if not (node.kind == "reg" or node.attrs.get("seq")) or keep(node):
+            continue
+        ps = {ridx[j] for j in range(rptr[v], rptr[v + 1])}
+        ss = {idx[j] for j in range(ptr[v], ptr[v + 1])}
+        if len(ps) != 1 or len(ss) != 1 or v in ps or v in ss:
+            continue
+        if not all(edges[rpos[j]].is_seq for j in range(rptr[v], rptr[v + 1])):
+            continue
+        if any(edges[rpos[j]].attrs.get("role") == "addr" for j in range(rptr[v], rptr[v + 1])) \
+                or any(edges[pos[j]].attrs.get("role") == "addr" for j in range(ptr[v], ptr[v + 1])):
+            continue
+        (p,), (s,) = ps, ss
+        pw = g.nodes[p].width
+        if pw > 0 and node.width > 0 and pw != node.width:
+            continue
+        pred[v], succ[v], cand[v] = p, s, 1
+
+    # 链从“前驱不是候选”的候选开始；全由候选组成的环不收缩
+    chains: List[List[int]] = []
+    for v in range(n):
+        if not cand[v] or cand[pred[v]]:
+            continue
+        chain = [v]
+        while cand[succ[chain[-1]]]:
+            chain.append(succ[chain[-1]])
+        if len(chain) >= min_length:
+            chains.append(chain)
+
+    absorbed = bytearray(n)
+    for chain in chains:
+        for v in chain:
+            absorbed[v] = 1
+
+    out = RmmgGraph()
+    new_of = array("i", [-1]) * n
+    orig_of = array("i")
+    for v in range(n):
+        if not absorbed[v]:
+            new_of[v] = _copy_node(out, g.nodes[v])
+            orig_of.append(v)
+    for e in edges:
+        if absorbed[e.src] or absorbed[e.dst]:
+            continue
+        out.add_edge(new_of[e.src], new_of[e.dst], is_seq=e.is_seq, cond=e.cond,
+                     src_loc=e.src_loc, attrs=dict(e.attrs))
+
+    def _seq(a: int, b: int) -> bool:
+        return any(edges[pos[j]].is_seq for j in range(ptr[a], ptr[a + 1]) if idx[j] == b)
+
+    for chain in chains:
+        head, tail = pred[chain[0]], succ[chain[-1]]
+        hops = [head] + chain + [tail]
+        delay = sum(1 for a, b in zip(hops, hops[1:]) if _seq(a, b))
+        first = next(edges[pos[j]] for j in range(ptr[head], ptr[head + 1])
+                     if idx[j] == chain[0])
+        out.add_edge(new_of[head], new_of[tail], is_seq=delay > 0, src_loc=first.src_loc,
+                     attrs={"delay": delay, "members": list(chain)})
+    return Contraction(g, out, orig_of, new_of, base=base)
+
+
+# ===== 层次直通合并 ==========================================================
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = array("i", range(n))
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union_into(self, x: int, root: int) -> None:
+        """把 x 所在的组挂到 root 所在的组下（root 一侧的代表保持不变）。"""
+        rx, rr = self.find(x), self.find(root)
+        if rx != rr:
+            self.parent[rx] = rr
+
+
+def contract_passthrough(
+    g: GraphLike,
+    keep: Optional[NodePred] = None,
+    roles: Sequence[str] = ("port",),
+) -> Contraction:
+    """
+    沿端口绑定边 u -> v 合并别名：v 去重后只有 u 一个前驱、且 keep(v) 为假时，
+    v 并入 u 所在的组。这样每个组都是以代表为根的树（或一个环）：
+    进入组只能经过代表，代表能到达组内所有成员，合并后可达关系与原图完全一致。
+    组内的边被丢掉；组间的平行边按 (is_seq, role, delay) 去重。
+    """
+    g, base = _unwrap(g)
+    keep = keep or _default_keep
+    csr = g.freeze()
+    n = csr.num_nodes
+    edges = g.edges
+    rptr, ridx = csr.rindptr, csr.rindices
+    roles = set(roles)
+
+    uf = _UnionFind(n)
+    for e in edges:
+        u, v = e.src, e.dst
+        if u == v or e.attrs.get("role") not in roles or keep(g.nodes[v]):
+            continue
+        if any(ridx[j] != u for j in range(rptr[v], rptr[v + 1])):
+            continue
+        uf.union_into(v, u)
+
+    members: Dict[int, List[int]] = {}
+    for v in range(n):
+        members.setdefault(uf.find(v), []).append(v)
+
+    out = RmmgGraph()
+    new_of = array("i", [-1]) * n
+    orig_of = array("i")
+    groups: List[List[int]] = []
+    for v in range(n):
+        root = uf.find(v)
+        if root != v:
+            continue
+        grp = [root] + [m for m in members[root] if m != root]
+        nid = _copy_node(out, g.nodes[root])
+        if len(grp) > 1:
+            attrs = out.nodes[nid].attrs
+            attrs["aliases"] = [g.nodes[m].hier_name for m in grp[1:]]
+            for m in grp[1:]:
+                for key in ("is_arch_visible", "is_micro_state"):
+                    if g.nodes[m].attrs.get(key):
+                        attrs[key] = True
+        for m in grp:
+            new_of[m] = nid
+        orig_of.append(root)
+        groups.append(grp)
+
+    seen = set()
+    for e in edges:
+        a, b = new_of[e.src], new_of[e.dst]
+        if a == b and e.src != e.dst:
+            continue                      # 组内的桥接边
+        key = (a, b, bool(e.is_seq), e.attrs.get("role"), e.attrs.get("delay"))
+        if key in seen:
+            continue
+        seen.add(key)
+        out.add_edge(a, b, is_seq=e.is_seq, cond=e.cond, src_loc=e.src_loc,
+                     attrs=dict(e.attrs))
+    return Contraction(g, out, orig_of, new_of, groups=groups, base=base)
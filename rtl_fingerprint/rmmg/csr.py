@@ -0,0 +1,100 @@
+# rtl_fingerprint/rmmg/csr.py
+
+"""
+RmmgGraph 的冻结（只读）数组表示：CSR 正向邻接 + 反向邻接。
+  - 节点 ID 沿用 RmmgGraph 的稠密编号 0..N-1
+  - 同一源节点的出边保持插入顺序，和 build_adj_list() 的遍历顺序一致
+  - 数组只用标准库 array / memoryview，方便放进共享内存、交给 NumPy 零拷贝
+"""
+
+from __future__ import annotations
+from array import array
+from typing import Dict, Iterable, List, Sequence
+
+from .graph import RmmgGraph
+
+
+# 各数组字段及 typecode，SharedCsrGraph 按这个顺序排布
+CSR_FIELDS = (
+    ("indptr", "q"),     # N+1，正向行指针
+    ("indices", "i"),    # E，正向目的节点
+    ("edge_pos", "q"),   # E，正向 slot -> graph.edges 下标
+    ("rindptr", "q"),    # N+1，反向行指针
+    ("rindices", "i"),   # E，反向源节点
+    ("redge_pos", "q"),  # E，反向 slot -> graph.edges 下标
+    ("seq", "b"),        # E，按 graph.edges 顺序的 is_seq
+    ("width", "q"),      # N，节点位宽（-1 未知）
+)
+
+
+class CsrGraph:
+    """
+    只读 CSR 图。各字段可以是 array，也可以是共享内存上的 memoryview。
+    提供和 dict 邻接表相同的 get(u, default) 接口，bfs_paths 可直接使用。
+    """
+
+    def __init__(self, num_nodes: int, **arrays: Sequence[int]):
+        self.num_nodes = num_nodes
+        for name, _ in CSR_FIELDS:
+            setattr(self, name, arrays[name])
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_graph(cls, g: RmmgGraph) -> "CsrGraph":
+        n = len(g.nodes)
+        if n and max(g.nodes) != n - 1:
+            raise ValueError("RmmgGraph node ids must be dense (0..N-1) to freeze")
+        edges = g.edges
+
+        def _build(keys: List[int], vals: List[int]):
+            # 计数排序：稳定，保持每行内的边插入顺序
+            ptr = array("q", [0]) * (n + 1)
+            for k in keys:
+                ptr[k + 1] += 1
+            for i in range(n):
+                ptr[i + 1] += ptr[i]
+            fill = array("q", ptr[:n])
+            idx = array("i", [0]) * len(keys)
+            pos = array("q", [0]) * len(keys)
+            for eid, k in enumerate(keys):
+                slot = fill[k]
+                fill[k] = slot + 1
+                idx[slot] = vals[eid]
+                pos[slot] = eid
+            return ptr, idx, pos
+
+        srcs = [e.src for e in edges]
+        dsts = [e.dst for e in edges]
+        indptr, indices, edge_pos = _build(srcs, dsts)
+        rindptr, rindices, redge_pos = _build(dsts, srcs)
+        seq = array("b", [1 if e.is_seq else 0 for e in edges])
+        width = array("q", [g.nodes[i].width for i in range(n)])
+        return cls(n, indptr=indptr, indices=indices, edge_pos=edge_pos,
+                   rindptr=rindptr, rindices=rindices, redge_pos=redge_pos,
+                   seq=seq, width=width)
+
+    # ===== 邻接访问 =========================================================
+
+    def successors(self, u: int) -> Sequence[int]:
+        return self.indices[self.indptr[u]:self.indptr[u + 1]]
+
+    def predecessors(self, u: int) -> Sequence[int]:
+        return self.rindices[self.rindptr[u]:self.rindptr[u + 1]]
+
+    def get(self, u: int, default: Iterable[int] = ()) -> Sequence[int]:
+        """兼容 Dict[int, List[int]] 邻接表的取法。"""
+        if 0 <= u < self.num_nodes:
+            return self.successors(u)
+        return default
+
+    def out_degree(self, u: int) -> int:
+        return self.indptr[u + 1] - self.indptr[u]
+
+    def in_degree(self, u: int) -> int:
+        return self.rindptr[u + 1] - self.rindptr[u]
+
+    def arrays(self) -> Dict[str, Sequence[int]]:
+        return {name: getattr(self, name) for name, _ in CSR_FIELDS}
@@ -0,0 +1,171 @@
+# rtl_fingerprint/rmmg/dominators.py
+
+"""
+支配树 / 后支配树（Cooper–Harvey–Kennedy 迭代算法，跑在 CsrGraph 数组上）：
+  - 支配：加一个虚拟根连向所有源，d 支配 v ⇔ 从任一源到 v 的路径都经过 d
+  - 后支配：在反向图上做同样的事，虚拟根连向所有汇
+对每个 arch-visible 汇，common_dominators(sources, sink) 给出所有泄漏路径
+都必须经过的节点（choke point），这些就是最便宜的消融 / 监控位置，不需要枚举路径。
+树按 (方向, 根集合) 缓存在 RmmgGraph 上，图结构变化后自动失效。
+"""
+
+from __future__ import annotations
+from array import array
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .csr import CsrGraph
+
+
+class DominatorTree:
+    """
+    idom[v]: v 的直接支配者；== root 表示只被虚拟根支配，-1 表示从根不可达。
+    root 是虚拟节点 num_nodes，不对应图里任何节点。
+    """
+
+    def __init__(self, idom: array, roots: FrozenSet[int], post: bool):
+        self.idom = idom
+        self.roots = roots
+        self.post = post
+        self.root = len(idom)
+
+    def reachable(self, v: int) -> bool:
+        return self.idom[v] != -1
+
+    def idom_of(self, v: int) -> Optional[int]:
+        d = self.idom[v]
+        return None if d < 0 or d == self.root else d
+
+    def dominators(self, v: int) -> List[int]:
+        """v 的全部支配者（含 v 自身），从 v 往根排列；不可达返回 []。"""
+        if self.idom[v] < 0:
+            return []
+        chain = [v]
+        d = self.idom[v]
+        while d != self.root:
+            chain.append(d)
+            d = self.idom[d]
+        return chain
+
+    def dominates(self, a: int, b: int) -> bool:
+        if self.idom[b] < 0:
+            return False
+        d = b
+        while d != self.root:
+            if d == a:
+                return True
+            d = self.idom[d]
+        return False
+
+
+def _compute(csr: CsrGraph, roots: Iterable[int], post: bool) -> DominatorTree:
+    n = csr.num_nodes
+    if post:
+        succ_ptr, succ_idx = csr.rindptr, csr.rindices
+        pred_ptr, pred_idx = csr.indptr, csr.indices
+    else:
+        succ_ptr, succ_idx = csr.indptr, csr.indices
+        pred_ptr, pred_idx = csr.rindptr, csr.rindices
+    roots = frozenset(roots)
+
+    # 1) 从虚拟根出发的迭代 DFS，得到逆后序（root 的 RPO 编号为 0）
+    order: List[int] = []            # 后序
+    seen = bytearray(n)
+    for r in sorted(roots):
+        if seen[r]:
+            continue
+        seen[r] = 1
+        work = [[r, succ_ptr[r]]]
+        while work:
+            frame = work[-1]
+            v, pos = frame
+            if pos < succ_ptr[v + 1]:
+                frame[1] = pos + 1
+                w = succ_idx[pos]
+                if not seen[w]:
+                    seen[w] = 1
+                    work.append([w, succ_ptr[w]])
+                continue
+            work.pop()
+            order.append(v)
+    order.reverse()
+    m = len(order) + 1               # 加上虚拟根
+    rpo = array("i", [-1]) * n
+    for i, v in enumerate(order):
+        rpo[v] = i + 1
+
+    # 2) RPO 编号空间里的前驱表（虚拟根 -> roots）
+    preds: List[List[int]] = [[] for _ in range(m)]
+    for i, v in enumerate(order, 1):
+        p = preds[i]
+        if v in roots:
+            p.append(0)
+        for j in range(pred_ptr[v], pred_ptr[v + 1]):
+            k = rpo[pred_idx[j]]
+            if k >= 0:
+                p.append(k)
+
+    # 3) CHK 迭代到不动点
+    idom = [-1] * m
+    idom[0] = 0
+    changed = True
+    while changed:
+        changed = False
+        for b in range(1, m):
+            new = -1
+            for p in preds[b]:
+                if idom[p] < 0:
+                    continue
+                if new < 0:
+                    new = p
+                    continue
+                x, y = p, new
+                while x != y:
+                    while x > y:
+                        x = idom[x]
+                    while y > x:
+                        y = idom[y]
+                new = x
+            if idom[b] != new:
+                idom[b] = new
+                changed = True
+
+    out = array("i", [-1]) * n
+    for i, v in enumerate(order, 1):
+        d = idom[i]
+        out[v] = n if d == 0 else order[d - 1]
+    return DominatorTree(out, roots, post)
+
+
+def _tree(g, roots: Iterable[int], post: bool) -> DominatorTree:
+    """RmmgGraph 上按 (方向, 根集合) 缓存；传 CsrGraph 则现算。"""
+    roots = frozenset(roots)
+    if isinstance(g, CsrGraph):
+        return _compute(g, roots, post)
+    trees: Dict[Tuple[bool, FrozenSet[int]], DominatorTree] = g.cached("dominators", dict)
+    key = (post, roots)
+    tree = trees.get(key)
+    if tree is None:
+        tree = trees[key] = _compute(g.freeze(), roots, post)
+    return tree
+
+
+def dominator_tree(g, sources: Iterable[int]) -> DominatorTree:
+    return _tree(g, sources, post=False)
+
+
+def post_dominator_tree(g, sinks: Iterable[int]) -> DominatorTree:
+    return _tree(g, sinks, post=True)
+
+
+def common_dominators(g, sources: Iterable[int], sink: int) -> List[int]:
+    """
+    任一 source 到 sink 的所有路径都经过的节点（不含 sink 自身），按从源到汇的顺序。
+    sink 从 sources 不可达时返回 []。
+    """
+    chain = dominator_tree(g, sources).dominators(sink)
+    return chain[:0:-1]
+
+
+def common_post_dominators(g, source: int, sinks: Iterable[int]) -> List[int]:
+    """source 到任一 sink 的所有路径都经过的节点（不含 source 自身），按从源到汇的顺序。"""
+    return post_dominator_tree(g, sinks).dominators(source)[1:]
@@ -0,0 +1,249 @@
+# rtl_fingerprint/rmmg/flow.py
+
+"""
+按位宽加权的最大流 / 最小点割：估计 micro_state → arch_visible 的泄漏带宽上界。
+  - 节点拆分：v_in -> v_out 容量 = 节点位宽（未知位宽按 unknown_width），
+    原图的边 u -> v 变成 u_out -> v_in，容量无穷
+  - 超级源 S 连所有源的 v_in，所有汇的 v_out 连超级汇 T
+  - 只在“源可达 ∩ 可达汇”的节点上建网络，其余节点对流没有贡献
+  - Dinic：残量网络（tail / head / cap / rev）全部是 NumPy 数组，弧按 tail 排好序；
+    每个阶段的分层 BFS 按层向量化，顺带按层收集层图弧，再从 T 按层反向剪掉死路，
+    不再对全体弧做筛选排序；只有阻塞流的迭代 DFS 在剪枝后的层图（本地编号）上逐弧进行，
+    阶段结束后把流量批量写回；最后一次 BFS 到不了 T，直接给出最小割的源侧
+  - 每阶段的开销大致是一次残量网络 BFS，总时间 ≈ 阶段数 × 可达弧数
+最小割里的节点就是“切断它们即可切断全部泄漏”的最便宜位置，可直接喂给 AblationGenerator。
+需要 NumPy（可选依赖）。
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # 没装 numpy 时仍可 import 本模块，调用时报错
+    np = None
+
+from .csr import CsrGraph
+from .kernels import _gather_slots, _require_numpy, numpy_view
+
+
+@dataclass
+class FlowResult:
+    value: int                                          # 最大流 = 最小割容量（bit）
+    cut_nodes: List[int] = field(default_factory=list)  # 最小点割
+    num_arcs: int = 0                                   # 流网络规模（剪枝后）
+    phases: int = 0                                     # Dinic 分层次数
+
+
+def _claim(nxt: "np.ndarray", claim: "np.ndarray") -> "np.ndarray":
+    """nxt 去重（不排序）：每个节点只保留最后一次写入 claim 的那个位置。"""
+    pos = np.arange(nxt.size)
+    claim[nxt] = pos
+    return nxt[claim[nxt] == pos]
+
+
+def _cone(ptr: "np.ndarray", idx: "np.ndarray", n: int, seeds: Iterable[int]) -> "np.ndarray":
+    mark = np.zeros(n, dtype=bool)
+    claim = np.empty(n, dtype=np.int64)
+    frontier = np.unique(np.fromiter(seeds, dtype=np.int64))
+    mark[frontier] = True
+    while frontier.size:
+        slots, _ = _gather_slots(ptr, frontier)
+        nxt = idx[slots].astype(np.int64)
+        nxt = _claim(nxt[~mark[nxt]], claim)
+        mark[nxt] = True
+        frontier = nxt
+    return mark
+
+
+def _arc_slots(first: "np.ndarray", rows: "np.ndarray") -> "np.ndarray":
+    """rows 的全部出弧下标（_gather_slots 去掉 owners，BFS 里用不到）。"""
+    starts = first[rows]
+    counts = first[rows + 1] - starts
+    total = int(counts.sum())
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return offsets + np.arange(total, dtype=np.int64)
+
+
+class _FlowNetwork:
+    """弧按 tail 排好序的残量网络：first[u]..first[u+1] 是 u 的出弧，rev[a] 是 a 的反向弧。"""
+
+    def __init__(self, num_vertices: int, tail: "np.ndarray", head: "np.ndarray",
+                 cap: "np.ndarray"):
+        # 输入是正向弧；交错插入容量为 0 的反向弧（2i / 2i+1 互为反向），再按 tail 稳定排序
+        m = len(tail)
+        tails = np.empty(2 * m, dtype=np.int64)
+        heads = np.empty(2 * m, dtype=np.int64)
+        caps = np.zeros(2 * m, dtype=np.int64)
+        tails[0::2], tails[1::2] = tail, head
+        heads[0::2], heads[1::2] = head, tail
+        caps[0::2] = cap
+        order = np.argsort(tails, kind="stable")
+        where = np.empty(2 * m, dtype=np.int64)
+        where[order] = np.arange(2 * m)
+        self.n = num_vertices
+        self.tail, self.head, self.cap = tails[order], heads[order], caps[order]
+        self.open = self.cap > 0          # 残量 > 0 的弧；BFS 读 1 字节的 bool 比读 cap 省带宽
+        self.rev = where[order ^ 1]
+        self.first = np.zeros(num_vertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tails, minlength=num_vertices), out=self.first[1:])
+        self.phases = 0
+        self.source_side: Optional["np.ndarray"] = None   # dinic 结束后残量网络里 s 可达的顶点
+
+    def levels(self, s: int, stop: Optional[int] = None, segments: Optional[list] = None):
+        """
+        残量网络上从 s 出发的 BFS 层号（-1 不可达）；到达 stop 所在层即停。
+        segments 不为 None 时顺带收集层图：每层一段“cap > 0 且进入下一层”的弧。
+        """
+        level = np.full(self.n, -1, dtype=np.int64)
+        level[s] = 0
+        claim = np.empty(self.n, dtype=np.int64)
+        frontier = np.array([s], dtype=np.int64)
+        d = 0
+        while frontier.size:
+            arcs = _arc_slots(self.first, frontier)
+            arcs = arcs[self.open[arcs]]
+            nxt = self.head[arcs]
+            fresh = level[nxt] < 0          # 这些 head 全部落在下一层
+            new = _claim(nxt[fresh], claim)
+            d += 1
+            level[new] = d
+            if segments is not None:
+                segments.append(arcs[fresh])
+            if stop is not None and level[stop] >= 0:
+                break
+            frontier = new
+        return level
+
+    def _level_graph(self, s: int, t: int):
+        """
+        层图里能走到 t 的弧，从 t 按层反向剪掉死路。
+        返回 (arcs, 本地 CSR 行指针, 本地 head, 本地 s)：每个顶点的弧在 BFS 里是连续一段，
+        所以按出现顺序给 tail 编本地号即可，t 编在最后；t 不可达返回 None。
+        """
+        segments: list = []
+        level = self.levels(s, stop=t, segments=segments)
+        if level[t] < 0:
+            # t 不可达时这次 BFS 走完了整张残量网络：就是最小割的源侧
+            self.source_side = level >= 0
+            return None
+        tail, head = self.tail, self.head
+        good = np.zeros(self.n, dtype=bool)
+        good[t] = True
+        keep = []
+        for seg in reversed(segments):
+            seg = seg[good[head[seg]]]
+            good[tail[seg]] = True
+            keep.append(seg)
+        arcs = np.concatenate(keep[::-1])
+        tails = tail[arcs]
+        starts = np.flatnonzero(np.r_[True, tails[1:] != tails[:-1]])
+        local = np.empty(self.n, dtype=np.int64)
+        local[tails[starts]] = np.arange(starts.size)
+        local[t] = starts.size
+        return arcs, np.r_[starts, arcs.size, arcs.size], local[head[arcs]], local[s]
+
+    def dinic(self, s: int, t: int) -> int:
+        total = 0
+        self.phases = 0
+        while True:
+            lg = self._level_graph(s, t)
+            if lg is None:
+                return total
+            self.phases += 1
+            arcs, ptr, heads, s_local = lg
+            t_local = len(ptr) - 2
+
+            # 层图的本地 CSR（Python list，DFS 逐弧访问时比 NumPy 标量索引快）
+            start = ptr.tolist()
+            head = heads.tolist()
+            cap = self.cap[arcs].tolist()
+            before = np.array(cap, dtype=np.int64)
+            it = start[:-1]
+            dead = bytearray(len(it))
+            path: List[int] = []   # 当前增广路径上的弧（本地下标）
+            u = s_local
+            while True:
+                if u == t_local:
+                    push = min(cap[k] for k in path)
+                    total += push
+                    cut = len(path)
+                    for i, k in enumerate(path):
+                        cap[k] -= push
+                        if cap[k] == 0 and i < cut:
+                            cut = i
+                    del path[cut:]
+                    u = head[path[-1]] if path else s_local
+                    continue
+                end = start[u + 1]
+                k = it[u]
+                while k < end and (cap[k] == 0 or dead[head[k]]):
+                    k += 1
+                it[u] = k
+                if k < end:
+                    path.append(k)
+                    u = head[k]
+                    continue
+                if u == s_local:
+                    break
+                dead[u] = 1            # 死点，本阶段不再访问
+                path.pop()
+                u = head[path[-1]] if path else s_local
+
+            # 流量写回残量网络（层图弧两两不同，且不含彼此的反向弧）
+            flow = before - np.array(cap, dtype=np.int64)
+            rev = self.rev[arcs]
+            self.cap[arcs] -= flow
+            self.cap[rev] += flow
+            self.open[arcs] = self.cap[arcs] > 0
+            self.open[rev] = self.cap[rev] > 0
+
+
+
+def max_flow_min_cut(
+    csr: CsrGraph,
+    sources: Iterable[int],
+    sinks: Iterable[int],
+    unknown_width: int = 1,
+) -> FlowResult:
+    """sources → sinks 的位宽加权最大流及对应最小点割。"""
+    _require_numpy()
+    a = numpy_view(csr)
+    n = a.num_nodes
+    sources = np.unique(np.fromiter(sources, dtype=np.int64))
+    sinks = np.unique(np.fromiter(sinks, dtype=np.int64))
+    fwd = _cone(a.indptr, a.indices, n, sources)
+    bwd = _cone(a.rindptr, a.rindices, n, sinks)
+    live = np.flatnonzero(fwd & bwd)
+    if live.size == 0:
+        return FlowResult(0)
+
+    k = live.size
+    local = np.full(n, -1, dtype=np.int64)
+    local[live] = np.arange(k)
+    width = np.frombuffer(csr.width, dtype=np.int64)[live]
+    caps = np.where(width > 0, width, unknown_width)
+    inf = int(caps.sum()) + 1
+    S = 2 * k
+    T = S + 1
+
+    slots, owners = _gather_slots(a.indptr, live)
+    i = local[owners]
+    w = local[a.indices[slots]]
+    keep = (w >= 0) & (w != i)
+    i, w = i[keep], w[keep]
+    src = local[sources]
+    src = src[src >= 0]
+    dst = local[sinks]
+    dst = dst[dst >= 0]
+    cat = np.concatenate
+    tail = cat([2 * np.arange(k), 2 * i + 1, np.full(src.size, S), 2 * dst + 1])
+    head = cat([2 * np.arange(k) + 1, 2 * w, 2 * src, np.full(dst.size, T)])
+    cap = cat([caps, np.full(i.size + src.size + dst.size, inf)])
+    net = _FlowNetwork(S + 2, tail, head, cap)
+
+    value = net.dinic(S, T)
+    reach = net.source_side
+    cut = live[reach[0:S:2] & ~reach[1:S:2]]
+    return FlowResult(value, cut.tolist(), num_arcs=len(net.head), phases=net.phases)
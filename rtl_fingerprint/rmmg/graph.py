@@ -1,6 +1,7 @@
 # rtl_fingerprint/rmmg/graph.py
 
 from __future__ import annotations
+import json
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Set, Tuple
 
@@ -15,18 +16,26 @@ class RmmgNode:
         self.attrs: Dict[str, Any] = {}  # module_path / signal_name / is_arch_visible / is_micro_state 等
 
 class RmmgEdge:
-    def __init__(self, src, dst, is_seq=False, cond=None, src_loc=None):
+    def __init__(self, src, dst, is_seq=False, cond=None, src_loc=None, attrs=None):
         self.src = src
         self.dst = dst
         self.is_seq = is_seq
         self.cond = cond
         self.src_loc = src_loc
+        self.attrs: Dict[str, Any] = attrs or {}  # role: "addr"（存储器/选择下标）/ "port"（端口绑定）等
 
 class RmmgGraph:
     def __init__(self):
         self.nodes: Dict[int, RmmgNode] = {}
         self.name_to_id: Dict[str, int] = {}
-        self.edges = []  # {src, dst, is_seq, cond, src_loc}
+        self.edges = []  # {src, dst, is_seq, cond, src_loc, attrs}
+        # 结构版本号：add_node/add_edge 会递增，派生结构（CSR 等）据此失效
+        self._version = 0
+        # attrs 版本号：只改 attrs 时由 invalidate_attrs() 递增，cached(..., attrs=True) 的结果据此失效
+        self._attrs_version = 0
+        self._cache: Dict[str, Tuple[int, Optional[int], Any]] = {}
+        self.cache_hits = 0        # cached() 命中 / 重建次数，供查询 profile 统计
+        self.cache_misses = 0
 
     # 根据 hier_name 获取 / 创建节点
     def get_node_id(self, hier_name: str) -> Optional[int]:
@@ -41,11 +50,79 @@ class RmmgGraph:
         node = RmmgNode(node_id, hier_name, kind, width, uhdm_obj)
         self.nodes[node_id] = node
         self.name_to_id[hier_name] = node_id
+        self._version += 1
         return node_id
 
-    def add_edge(self, src_id, dst_id, is_seq=False, cond=None, src_loc=None):
-        edge = RmmgEdge(src_id, dst_id, is_seq=is_seq, cond=cond, src_loc=src_loc)
+    def add_edge(self, src_id, dst_id, is_seq=False, cond=None, src_loc=None, attrs=None):
+        edge = RmmgEdge(src_id, dst_id, is_seq=is_seq, cond=cond, src_loc=src_loc, attrs=attrs)
         self.edges.append(edge)
+        self._version += 1
+
+    # ===== 派生结构缓存 =====================================================
+
+    def cached(self, key: str, factory, attrs: bool = False):
+        """
+        按 key 缓存由图派生出的结构（CSR、统计、支配树等），
+        图结构变化（版本号变化）后自动重建。
+        attrs=True 表示结果还依赖节点 / 边的 attrs，invalidate_attrs() 之后也重建。
+        """
+        stamp = self._attrs_version if attrs else None
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] == self._version and hit[1] == stamp:
+            self.cache_hits += 1
+            return hit[2]
+        self.cache_misses += 1
+        value = factory()
+        self._cache[key] = (self._version, stamp, value)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        """手动丢掉指定的派生结构（例如压缩邻接表之后释放 CSR）。"""
+        for key in keys:
+            self._cache.pop(key, None)
+
+    def invalidate_attrs(self) -> None:
+        """只改了 attrs（不改结构）之后调用：所有以 attrs=True 登记的派生结构失效。"""
+        self._attrs_version += 1
+
+    def freeze(self):
+        """返回（缓存的）CSR 冻结版本，见 rmmg/csr.py。"""
+        from .csr import CsrGraph
+        return self.cached("csr", lambda: CsrGraph.from_graph(self))
 
     def summary(self) -> str:
         return f"RMMG: {len(self.nodes)} nodes, {len(self.edges)} edges"
+
+    # ===== 持久化：供常驻查询服务等直接加载，避免重新跑 Surelog/构图 =====
+
+    def save_json(self, path: str) -> None:
+        """把节点/边/attrs 存成 JSON（不含 uhdm_obj）。"""
+        data = {
+            "nodes": [
+                [n.id, n.hier_name, n.kind, n.width, n.attrs]
+                for n in self.nodes.values()
+            ],
+            "edges": [
+                [e.src, e.dst, bool(e.is_seq), e.cond, e.src_loc, e.attrs]
+                for e in self.edges
+            ],
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, default=str)
+
+    @classmethod
+    def load_json(cls, path: str) -> "RmmgGraph":
+        with open(path) as f:
+            data = json.load(f)
+        g = cls()
+        for node_id, hier_name, kind, width, attrs in data["nodes"]:
+            node = RmmgNode(node_id, hier_name, kind, width)
+            node.attrs.update(attrs or {})
+            g.nodes[node_id] = node
+            g.name_to_id[hier_name] = node_id
+        g._version += 1
+        for src, dst, is_seq, cond, src_loc, *rest in data["edges"]:
+            g.add_edge(src, dst, is_seq=is_seq, cond=cond,
+                       src_loc=tuple(src_loc) if src_loc else None,
+                       attrs=rest[0] if rest else None)
+        return g
@@ -0,0 +1,93 @@
+# rtl_fingerprint/rmmg/hubs.py
+
+"""
+高扇出枢纽（hub）识别：clock / reset / 全局使能这类节点连着设计的很大一部分，
+BFS 一碰到就会淹没整张图。
+  - 一遍度数统计（出度 / 入度的均值、标准差、分位数、最大值）
+  - 出度 >= max(min_degree, mean + sigma * std) 的节点记为 hub
+  - 名字像 clock / reset 的节点（NodeClass.CLOCK / RESET）出度 >= clock_reset_degree 即为 hub
+  - allow（永不算 hub）/ deny（永远算 hub）按 fnmatch glob 匹配 hier_name，allow 优先
+结果写进 node.attrs["is_hub"]，遍历时用 TraversalMask.hubs("skip" / "terminal")。
+"""
+
+from __future__ import annotations
+import math
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Tuple
+
+from .masks import NodeClass, graph_classes
+
+
+@dataclass(frozen=True)
+class HubPolicy:
+    min_degree: int = 256             # 出度低于这个值的节点一律不算 hub
+    sigma: float = 6.0                # 出度 > mean + sigma * std 才算离群
+    clock_reset_degree: int = 8       # 名字像时钟 / 复位时的出度门槛
+    allow: Tuple[str, ...] = ()       # 永不算 hub 的 hier_name glob
+    deny: Tuple[str, ...] = ()        # 永远算 hub 的 hier_name glob
+
+
+@dataclass
+class HubReport:
+    policy: HubPolicy
+    out_degree: Dict[str, float]      # mean / std / p50 / p99 / max
+    in_degree: Dict[str, float]
+    threshold: float                  # 实际使用的出度门槛
+    hubs: List[int] = field(default_factory=list)
+    reasons: Dict[int, str] = field(default_factory=dict)   # "degree" / "clock_reset" / "deny"
+
+    def to_dict(self, graph) -> Dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "out_degree": self.out_degree,
+            "in_degree": self.in_degree,
+            "hubs": [{"name": graph.nodes[v].hier_name, "reason": self.reasons[v]}
+                     for v in self.hubs],
+        }
+
+
+def _degree_summary(degs: List[int]) -> Dict[str, float]:
+    if not degs:
+        return {"mean": 0.0, "std": 0.0, "p50": 0, "p99": 0, "max": 0}
+    n = len(degs)
+    mean = sum(degs) / n
+    var = sum((d - mean) ** 2 for d in degs) / n
+    ranked = sorted(degs)
+    return {"mean": mean, "std": math.sqrt(var), "p50": ranked[n // 2],
+            "p99": ranked[min(n - 1, int(0.99 * n))], "max": ranked[-1]}
+
+
+def detect_hubs(g, policy: HubPolicy = HubPolicy()) -> HubReport:
+    """按 policy 给所有节点写 attrs["is_hub"]，返回度数统计和 hub 列表。"""
+    csr = g.freeze()
+    ptr, rptr = csr.indptr, csr.rindptr
+    n = csr.num_nodes
+    out_deg = [ptr[v + 1] - ptr[v] for v in range(n)]
+    in_deg = [rptr[v + 1] - rptr[v] for v in range(n)]
+    out_stats = _degree_summary(out_deg)
+    threshold = max(policy.min_degree, out_stats["mean"] + policy.sigma * out_stats["std"])
+
+    ncls = graph_classes(g).node_class
+    clk = NodeClass.CLOCK | NodeClass.RESET
+    report = HubReport(policy, out_stats, _degree_summary(in_deg), threshold)
+    for v in range(n):
+        node = g.nodes[v]
+        name = node.hier_name
+        reason = None
+        if any(fnmatchcase(name, p) for p in policy.allow):
+            reason = None
+        elif any(fnmatchcase(name, p) for p in policy.deny):
+            reason = "deny"
+        elif out_deg[v] >= threshold:
+            reason = "degree"
+        elif ncls[v] & clk and out_deg[v] >= policy.clock_reset_degree:
+            reason = "clock_reset"
+        node.attrs["is_hub"] = reason is not None
+        if reason is not None:
+            report.hubs.append(v)
+            report.reasons[v] = reason
+
+    # is_hub 只改了 attrs，依赖 attrs 的派生结构（节点类别、掩码等）要重建
+    g.invalidate_attrs()
+    return report
@@ -0,0 +1,220 @@
+# rtl_fingerprint/rmmg/kernels.py
+
+"""
+NumPy 向量化图遍历内核（基于 CsrGraph 数组，零拷贝 np.frombuffer）：
+  - level_bfs: 按层同步的多源 BFS，每一层用数组 gather + mask 一次性扩展整个 frontier，
+    frontier 变大时切换为 bottom-up 扩展（Beamer direction-optimizing BFS）
+NumPy 是可选依赖，只有调用这些内核时才需要。
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # 没装 numpy 时仍可 import 本模块，调用时报错
+    np = None
+
+from .budget import BudgetMeter, CancelToken, QueryBudget
+from .csr import CsrGraph
+from .masks import CompiledMask
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("the vectorized RMMG kernels need numpy (pip install numpy)")
+
+
+class CsrNumpy:
+    """CsrGraph 各数组的 NumPy 视图（不拷贝）。"""
+
+    def __init__(self, csr: CsrGraph):
+        _require_numpy()
+        self.num_nodes = csr.num_nodes
+        self.indptr = np.frombuffer(csr.indptr, dtype=np.int64)
+        self.indices = np.frombuffer(csr.indices, dtype=np.int32)
+        self.rindptr = np.frombuffer(csr.rindptr, dtype=np.int64)
+        self.rindices = np.frombuffer(csr.rindices, dtype=np.int32)
+        self.out_deg = np.diff(self.indptr)
+        self.in_deg = np.diff(self.rindptr)
+
+
+def numpy_view(g_or_csr) -> CsrNumpy:
+    """RmmgGraph 上缓存一份 NumPy 视图；直接给 CsrGraph 则现建。"""
+    if isinstance(g_or_csr, CsrGraph):
+        return CsrNumpy(g_or_csr)
+    return g_or_csr.cached("csr_numpy", lambda: CsrNumpy(g_or_csr.freeze()))
+
+
+@dataclass
+class BfsResult:
+    dist: "np.ndarray"       # int32，-1 表示不可达
+    parent: "np.ndarray"     # int32，源节点 / 不可达为 -1
+    levels: int              # 实际扩展的层数
+    topdown_steps: int
+    bottomup_steps: int
+    expanded: int = 0            # 已扩展的 frontier 节点总数
+    truncated: bool = False      # 预算耗尽 / 被取消时为 True
+    reason: Optional[str] = None
+    frontier_left: int = 0
+    elapsed_s: float = 0.0
+    pruned_nodes: int = 0        # 掩码挡住 / 只到达不扩展的节点数（仅 mask 时统计）
+    pruned_edges: int = 0        # 因此没有扫描的边数
+    edges_scanned: int = 0       # gather 过的邻接 slot 总数
+    peak_frontier: int = 0       # 单层 frontier 的最大节点数
+
+    def reached(self) -> "np.ndarray":
+        return np.flatnonzero(self.dist >= 0)
+
+    def path_to(self, v: int) -> List[int]:
+        path = [int(v)]
+        while self.parent[path[-1]] >= 0:
+            path.append(int(self.parent[path[-1]]))
+        path.reverse()
+        return path
+
+
+def _gather_slots(ptr: "np.ndarray", rows: "np.ndarray"):
+    """rows 的所有邻接 slot 下标（CSR 分段展开），以及每个 slot 所属的 row。"""
+    starts = ptr[rows]
+    counts = ptr[rows + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.astype(rows.dtype)
+    owners = np.repeat(rows, counts)
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return offsets + np.arange(total, dtype=np.int64), owners
+
+
+def level_bfs(
+    csr,
+    sources: Iterable[int],
+    max_depth: Optional[int] = None,
+    terminal: Optional[Iterable[int]] = None,
+    direction_optimizing: bool = True,
+    alpha: float = 14.0,
+    beta: float = 24.0,
+    budget: Optional[QueryBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    mask: Optional[CompiledMask] = None,
+) -> BfsResult:
+    """
+    多源、按层同步 BFS。
+    - csr: CsrGraph / CsrNumpy / RmmgGraph
+    - max_depth: 最多扩展到距离 max_depth（None 不限）
+    - terminal: 可以被到达、但不再向外扩展的节点（例如查询的 target）
+    - direction_optimizing: frontier 出边数 > 未访问节点入边数 / alpha 时改用 bottom-up，
+      frontier 节点数 < N / beta 时切回 top-down
+    - budget / cancel: 每层开始前检查一次，超限时返回已完成各层的结果（truncated=True）
+    - mask: compile_mask() 的结果，被屏蔽的边 / 节点在 gather 之后直接按表剔除
+    """
+    _require_numpy()
+    a = csr if isinstance(csr, CsrNumpy) else numpy_view(csr)
+    n = a.num_nodes
+
+    dist = np.full(n, -1, dtype=np.int32)
+    parent = np.full(n, -1, dtype=np.int32)
+    if mask is not None:
+        node_ok, expand_ok, slot_ok, rslot_ok = mask.numpy()
+        expandable = expand_ok.copy()
+    else:
+        expandable = np.ones(n, dtype=bool)
+    term = None
+    if terminal is not None:
+        term = np.fromiter(terminal, dtype=np.int64)
+        expandable[term] = False
+
+    frontier = np.unique(np.fromiter(sources, dtype=np.int64))
+    dist[frontier] = 0
+    unvisited_in_edges = int(a.in_deg.sum() - a.in_deg[frontier].sum())
+
+    meter = BudgetMeter(budget, cancel)
+    level = 0
+    td_steps = bu_steps = 0
+    expanded = 0
+    scanned = peak = 0
+    reason = None
+    bottom_up = False
+    filtered = -1                # 最后一次按 expandable 过滤 frontier 的层
+    while frontier.size:
+        if max_depth is not None and level >= max_depth:
+            break
+        frontier = frontier[expandable[frontier]]
+        filtered = level
+        if frontier.size == 0:
+            break
+        if meter.active:
+            # 按层检查；内存按 dist/parent/frontier 数组估算
+            reason = meter.exceeded(expanded, 8 * n + 8 * int(frontier.size))
+            if reason is None and budget is not None and budget.max_expanded is not None \
+                    and expanded + frontier.size > budget.max_expanded:
+                reason = "max_expanded"
+            if reason is not None:
+                break
+        expanded += int(frontier.size)
+        if frontier.size > peak:
+            peak = int(frontier.size)
+
+        if direction_optimizing:
+            frontier_edges = int(a.out_deg[frontier].sum())
+            if not bottom_up and frontier_edges > unvisited_in_edges / alpha:
+                bottom_up = True
+            elif bottom_up and frontier.size < n / beta:
+                bottom_up = False
+
+        if bottom_up:
+            bu_steps += 1
+            in_frontier = np.zeros(n, dtype=bool)
+            in_frontier[frontier] = True
+            unvisited = dist < 0
+            if mask is not None:
+                unvisited &= node_ok
+            cand = np.flatnonzero(unvisited)
+            slots, owners = _gather_slots(a.rindptr, cand)
+            hits = in_frontier[a.rindices[slots]]
+            if mask is not None:
+                hits &= rslot_ok[slots]
+            scanned += int(slots.size)
+            new, first = np.unique(owners[hits], return_index=True)
+            par = a.rindices[slots[hits]][first]
+        else:
+            td_steps += 1
+            slots, owners = _gather_slots(a.indptr, frontier)
+            scanned += int(slots.size)
+            nbrs = a.indices[slots]
+            fresh = dist[nbrs] < 0
+            if mask is not None:
+                fresh &= slot_ok[slots] & node_ok[nbrs]
+            new, first = np.unique(nbrs[fresh], return_index=True)
+            par = owners[fresh][first]
+
+        level += 1
+        dist[new] = level
+        parent[new] = par
+        unvisited_in_edges -= int(a.in_deg[new].sum())
+        frontier = new.astype(np.int64)
+
+    pruned_nodes = pruned_edges = 0
+    if mask is not None:
+        # 事后一遍统计剪枝：已扩展层里被挡住的邻居 + 到达了但因掩码不扩展的节点
+        reached = dist >= 0
+        done = reached & (dist < level)
+        held = reached & (dist <= filtered) & ~expand_ok
+        if term is not None:
+            held[term] = False
+        slots, _ = _gather_slots(a.indptr, np.flatnonzero(done & expandable))
+        nbrs = a.indices[slots]
+        ok = slot_ok[slots]
+        blocked = np.unique(nbrs[ok & ~node_ok[nbrs]])
+        pruned_nodes = int(held.sum()) + int(blocked.size)
+        pruned_edges = (int(slots.size - ok.sum()) + int(a.out_deg[held].sum())
+                        + int(a.out_deg[blocked].sum()))
+
+    return BfsResult(dist, parent, level, td_steps, bu_steps,
+                     expanded=expanded, truncated=reason is not None, reason=reason,
+                     frontier_left=int(frontier.size) if reason is not None else 0,
+                     elapsed_s=meter.elapsed(),
+                     pruned_nodes=pruned_nodes, pruned_edges=pruned_edges,
+                     edges_scanned=scanned, peak_frontier=peak)
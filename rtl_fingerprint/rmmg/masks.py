@@ -0,0 +1,350 @@
+# rtl_fingerprint/rmmg/masks.py
+
+"""
+遍历掩码：在搜索内层循环里直接跳过某类边 / 节点，不复制图、不事后过滤路径。
+  - 预计算：每条边一个 EdgeClass 位集、每个节点一个 NodeClass 位集（按图缓存）
+  - TraversalMask 描述“排除哪些边类 / 节点类、哪些节点类只可到达不再扩展”，
+    可以用 | 组合；compile_mask() 把它编译成按 CSR slot / 节点下标的 0/1 表（按掩码缓存）
+  - MaskedAdjacency 提供 get(u, default)，可以直接交给 bfs_paths_on；
+    NumPy 内核 / A* / 时间展开图直接读编译后的表
+  - masked_view 给整图分析（SCC 凝聚、支配树、路径计数、流、中心性、锥估计）一个按掩码过滤的图视图
+常用组合：
+  TraversalMask.comb_only()                      只走组合边
+  TraversalMask(exclude_nodes=NodeClass.CLOCK | NodeClass.RESET)
+  TraversalMask(exclude_edges=EdgeClass.FROM_MEMORY)
+  TraversalMask(exclude_edges=EdgeClass.MEM_ADDR)  只看数据依赖，不看地址依赖
+地址依赖边（role == "addr"）只有 build_rmmg_from_design(..., addr_edges=True) 时才会建。
+"""
+
+from __future__ import annotations
+import re
+from array import array
+from dataclasses import dataclass
+from enum import IntFlag
+from typing import Dict, List, Optional
+
+from .csr import CsrGraph
+
+
+class EdgeClass(IntFlag):
+    SEQ = 1 << 0            # is_seq
+    COMB = 1 << 1
+    ADDR = 1 << 2           # attrs["role"] == "addr"：选择下标 / 存储器地址依赖
+    DATA = 1 << 3           # 非地址依赖
+    FROM_MEMORY = 1 << 4    # 源节点是 memory
+    TO_MEMORY = 1 << 5      # 目的节点是 memory
+    PORT = 1 << 6           # attrs["role"] == "port"：端口绑定（层次桥接）
+    CLOCK_RESET = 1 << 7    # 源节点是时钟 / 复位
+
+    MEM_ADDR = 1 << 8       # 存储器的地址依赖（ADDR 且两端之一是 memory）
+    MEM_DATA = 1 << 9       # 存储器的数据读写（DATA 且两端之一是 memory）
+
+
+class NodeClass(IntFlag):
+    INPUT = 1 << 0
+    OUTPUT = 1 << 1
+    INOUT = 1 << 2
+    NET = 1 << 3
+    LOGIC = 1 << 4
+    REG = 1 << 5
+    MEMORY = 1 << 6
+    INTERNAL = 1 << 7       # 其它 kind
+    CLOCK = 1 << 8
+    RESET = 1 << 9
+    MICRO_STATE = 1 << 10
+    ARCH_VISIBLE = 1 << 11
+    SEQ = 1 << 12           # 被时序过程写过（attrs["seq"]）
+    HUB = 1 << 13           # 高扇出枢纽（attrs["is_hub"]，见 rmmg/hubs.py）
+
+    PORT = INPUT | OUTPUT | INOUT
+
+
+_KIND_CLASS = {
+    "input": NodeClass.INPUT, "output": NodeClass.OUTPUT, "inout": NodeClass.INOUT,
+    "net": NodeClass.NET, "logic": NodeClass.LOGIC, "reg": NodeClass.REG,
+    "memory": NodeClass.MEMORY,
+}
+_CLOCK_RE = re.compile(r"(^|_)(clock|clk)(_|$|\d)", re.IGNORECASE)
+_RESET_RE = re.compile(r"(^|_)(reset|rst)(_?n)?(_|$|\d)", re.IGNORECASE)
+
+
+class GraphClasses:
+    """node_class[v] / edge_class[eid]（eid 为 graph.edges 下标）。"""
+
+    def __init__(self, node_class: array, edge_class: array):
+        self.node_class = node_class
+        self.edge_class = edge_class
+
+    @classmethod
+    def compute(cls, g) -> "GraphClasses":
+        n = len(g.nodes)
+        clock_names = {nd.attrs["clock"] for nd in g.nodes.values() if nd.attrs.get("clock")}
+        node_class = array("I", [0]) * n
+        for v in range(n):
+            nd = g.nodes[v]
+            c = _KIND_CLASS.get(nd.kind, NodeClass.INTERNAL)
+            sig = nd.attrs.get("signal_name") or nd.hier_name.rpartition(".")[2]
+            if nd.hier_name in clock_names or _CLOCK_RE.search(sig):
+                c |= NodeClass.CLOCK
+            if _RESET_RE.search(sig):
+                c |= NodeClass.RESET
+            if nd.attrs.get("is_micro_state"):
+                c |= NodeClass.MICRO_STATE
+            if nd.attrs.get("is_arch_visible"):
+                c |= NodeClass.ARCH_VISIBLE
+            if nd.attrs.get("seq"):
+                c |= NodeClass.SEQ
+            if nd.attrs.get("is_hub"):
+                c |= NodeClass.HUB
+            node_class[v] = c
+
+        mem, clk = NodeClass.MEMORY, NodeClass.CLOCK | NodeClass.RESET
+        edge_class = array("I", [0]) * len(g.edges)
+        for eid, e in enumerate(g.edges):
+            sc, dc = node_class[e.src], node_class[e.dst]
+            role = e.attrs.get("role")
+            c = EdgeClass.SEQ if e.is_seq else EdgeClass.COMB
+            c |= EdgeClass.ADDR if role == "addr" else EdgeClass.DATA
+            if role == "port":
+                c |= EdgeClass.PORT
+            if sc & clk:
+                c |= EdgeClass.CLOCK_RESET
+            touches_mem = False
+            if sc & mem:
+                c |= EdgeClass.FROM_MEMORY
+                touches_mem = True
+            if dc & mem:
+                c |= EdgeClass.TO_MEMORY
+                touches_mem = True
+            if touches_mem:
+                c |= EdgeClass.MEM_ADDR if role == "addr" else EdgeClass.MEM_DATA
+            edge_class[eid] = c
+        return cls(node_class, edge_class)
+
+
+def graph_classes(g) -> GraphClasses:
+    return g.cached("classes", lambda: GraphClasses.compute(g), attrs=True)
+
+
+@dataclass(frozen=True)
+class TraversalMask:
+    exclude_edges: EdgeClass = EdgeClass(0)    # 命中任一位的边不走
+    exclude_nodes: NodeClass = NodeClass(0)    # 命中任一位的节点不进入（源节点除外）
+    terminal_nodes: NodeClass = NodeClass(0)   # 可以到达，但不再向外扩展
+
+    def __or__(self, other: "TraversalMask") -> "TraversalMask":
+        return TraversalMask(self.exclude_edges | other.exclude_edges,
+                             self.exclude_nodes | other.exclude_nodes,
+                             self.terminal_nodes | other.terminal_nodes)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.exclude_edges or self.exclude_nodes or self.terminal_nodes)
+
+    @classmethod
+    def comb_only(cls) -> "TraversalMask":
+        return cls(exclude_edges=EdgeClass.SEQ)
+
+    @classmethod
+    def no_clock_reset(cls) -> "TraversalMask":
+        return cls(exclude_edges=EdgeClass.CLOCK_RESET,
+                   exclude_nodes=NodeClass.CLOCK | NodeClass.RESET)
+
+    @classmethod
+    def hubs(cls, mode: str = "skip") -> "TraversalMask":
+        """mode="skip"：不进入枢纽节点；"terminal"：可以到达枢纽但不从它继续扩展。"""
+        if mode == "skip":
+            return cls(exclude_nodes=NodeClass.HUB)
+        if mode == "terminal":
+            return cls(terminal_nodes=NodeClass.HUB)
+        raise ValueError(f"unknown hub mode: {mode!r}")
+
+
+class CompiledMask:
+    """
+    按 CsrGraph 下标展开的 0/1 表（bytearray）：
+      node_ok[v] / expand_ok[v] / slot_ok[j]（正向 slot）/ rslot_ok[j]（反向 slot）
+    """
+
+    def __init__(self, csr: CsrGraph, node_ok: bytearray, expand_ok: bytearray,
+                 slot_ok: bytearray, rslot_ok: bytearray):
+        self.csr = csr
+        self.node_ok = node_ok
+        self.expand_ok = expand_ok
+        self.slot_ok = slot_ok
+        self.rslot_ok = rslot_ok
+        self._np = None
+
+    def successors(self, u: int) -> List[int]:
+        if not self.expand_ok[u]:
+            return []
+        csr = self.csr
+        indices, slot_ok, node_ok = csr.indices, self.slot_ok, self.node_ok
+        return [indices[j] for j in range(csr.indptr[u], csr.indptr[u + 1])
+                if slot_ok[j] and node_ok[indices[j]]]
+
+    def numpy(self):
+        """(node_ok, expand_ok, slot_ok, rslot_ok) 的 NumPy bool 视图（不拷贝）。"""
+        if self._np is None:
+            import numpy as np
+            self._np = tuple(np.frombuffer(b, dtype=np.bool_) for b in
+                             (self.node_ok, self.expand_ok, self.slot_ok, self.rslot_ok))
+        return self._np
+
+
+def _compile(g, mask: TraversalMask) -> CompiledMask:
+    csr = g.freeze()
+    cls = graph_classes(g)
+    ncls, ecls = cls.node_class, cls.edge_class
+    xn, tn, xe = int(mask.exclude_nodes), int(mask.terminal_nodes), int(mask.exclude_edges)
+    n = csr.num_nodes
+    node_ok = bytearray(0 if ncls[v] & xn else 1 for v in range(n))
+    expand_ok = bytearray(0 if ncls[v] & tn else 1 for v in range(n))
+    slot_ok = bytearray(0 if ecls[eid] & xe else 1 for eid in csr.edge_pos)
+    rslot_ok = bytearray(0 if ecls[eid] & xe else 1 for eid in csr.redge_pos)
+    return CompiledMask(csr, node_ok, expand_ok, slot_ok, rslot_ok)
+
+
+def compile_mask(g, mask) -> Optional[CompiledMask]:
+    """
+    空掩码返回 None（调用方走无掩码的快路径）；结果按掩码缓存在图上。
+    已经编译好的 CompiledMask（例如 restrict_nodes 的结果）原样返回。
+    """
+    if isinstance(mask, CompiledMask):
+        return mask
+    if mask is None or mask.empty:
+        return None
+    memo: Dict[TraversalMask, CompiledMask] = g.cached("masks", dict, attrs=True)
+    cm = memo.get(mask)
+    if cm is None:
+        cm = memo[mask] = _compile(g, mask)
+    return cm
+
+
+def restrict_nodes(g, mask, node_filter: bytearray) -> CompiledMask:
+    """在 mask（TraversalMask / CompiledMask / None）基础上再只允许 node_filter 为 1 的节点。"""
+    cm = compile_mask(g, mask)
+    if cm is None:
+        csr = g.freeze()
+        ones_e = bytearray(b"\x01") * csr.num_edges
+        return CompiledMask(csr, bytearray(node_filter), bytearray(b"\x01") * csr.num_nodes,
+                            ones_e, bytearray(ones_e))
+    node_ok = bytearray(a & b for a, b in zip(cm.node_ok, node_filter))
+    return CompiledMask(cm.csr, node_ok, cm.expand_ok, cm.slot_ok, cm.rslot_ok)
+
+
+class MaskedAdjacency:
+    """
+    带掩码的邻接视图，接口与 dict 邻接表的 get(u, default) 一致，可直接给 bfs_paths_on。
+    顺带统计剪枝：pruned 是被挡住 / 只到达不扩展的节点，skipped_slots 是被屏蔽的边。
+    """
+
+    def __init__(self, cm: CompiledMask):
+        self.cm = cm
+        self.pruned = set()
+        self.skipped_slots = 0
+
+    def get(self, u: int, default=None):
+        cm = self.cm
+        if not cm.expand_ok[u]:
+            self.pruned.add(u)
+            return []
+        csr = cm.csr
+        indices, slot_ok, node_ok = csr.indices, cm.slot_ok, cm.node_ok
+        out = []
+        for j in range(csr.indptr[u], csr.indptr[u + 1]):
+            v = indices[j]
+            if not slot_ok[j]:
+                self.skipped_slots += 1
+            elif not node_ok[v]:
+                self.pruned.add(v)
+            else:
+                out.append(v)
+        return out
+
+    def pruned_edges(self) -> int:
+        """没有扫描的边：被屏蔽的 slot + 被剪掉节点的出边。"""
+        ptr = self.cm.csr.indptr
+        return self.skipped_slots + sum(ptr[v + 1] - ptr[v] for v in self.pruned)
+
+
+# ===== 掩码视图：给整图分析（SCC / 支配树 / 路径计数 / 流 / 中心性）用 ========
+
+def masked_csr(cm: CompiledMask) -> CsrGraph:
+    """
+    按掩码过滤后的 CSR：只保留“可扩展的 u 经未屏蔽的边进入允许的 v”这种 slot。
+    被排除的节点仍保留出边（没有入边，所以只有作为源时才可达，和搜索里“源节点除外”一致），
+    只到达不扩展的节点没有出边；edge_pos / seq / width 沿用原图。
+    """
+    csr = cm.csr
+    node_ok, expand_ok = cm.node_ok, cm.expand_ok
+
+    def _filter(ptr, idx, pos, ok, forward: bool):
+        n = csr.num_nodes
+        new_ptr = array("q", [0]) * (n + 1)
+        new_idx = array("i")
+        new_pos = array("q")
+        for u in range(n):
+            for j in range(ptr[u], ptr[u + 1]):
+                w = idx[j]
+                src, dst = (u, w) if forward else (w, u)
+                if ok[j] and expand_ok[src] and node_ok[dst]:
+                    new_idx.append(w)
+                    new_pos.append(pos[j])
+            new_ptr[u + 1] = len(new_idx)
+        return new_ptr, new_idx, new_pos
+
+    indptr, indices, edge_pos = _filter(csr.indptr, csr.indices, csr.edge_pos,
+                                        cm.slot_ok, True)
+    rindptr, rindices, redge_pos = _filter(csr.rindptr, csr.rindices, csr.redge_pos,
+                                           cm.rslot_ok, False)
+    return CsrGraph(csr.num_nodes, indptr=indptr, indices=indices, edge_pos=edge_pos,
+                    rindptr=rindptr, rindices=rindices, redge_pos=redge_pos,
+                    seq=csr.seq, width=csr.width)
+
+
+class MaskedGraph:
+    """
+    RmmgGraph 的掩码视图：nodes / edges 就是原图的，freeze() 返回 masked_csr，
+    cached() 有自己的一份缓存。按 g.freeze() / g.cached() 工作的分析
+    （condensation、支配树、path_stats、leakage_matrix、centrality、estimate_cones）
+    传入视图即在掩码后的图上计算，SCC 凝聚也是掩码后的。视图本身由 masked_view 按掩码缓存在原图上，
+    原图结构变化或 invalidate_attrs() 后整体重建。
+    """
+
+    def __init__(self, g, cm: CompiledMask):
+        self.graph = g
+        self.cm = cm
+        self.nodes = g.nodes
+        self.edges = g.edges
+        self._cache: Dict[str, object] = {}
+
+    def cached(self, key: str, factory, attrs: bool = False):
+        # attrs 变化时视图本身随 "masked_views" 一起重建，这里不必区分
+        if key in self._cache:
+            self.graph.cache_hits += 1
+            return self._cache[key]
+        self.graph.cache_misses += 1
+        value = self._cache[key] = factory()
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.pop(key, None)
+
+    def freeze(self) -> CsrGraph:
+        return self.cached("csr", lambda: masked_csr(self.cm))
+
+
+def masked_view(g, mask):
+    """空掩码返回 g 本身；TraversalMask 的视图按掩码缓存，CompiledMask 现建一个视图。"""
+    cm = compile_mask(g, mask)
+    if cm is None:
+        return g
+    if isinstance(mask, CompiledMask):
+        return MaskedGraph(g, cm)
+    views: Dict[TraversalMask, MaskedGraph] = g.cached("masked_views", dict, attrs=True)
+    view = views.get(mask)
+    if view is None:
+        view = views[mask] = MaskedGraph(g, cm)
+    return view
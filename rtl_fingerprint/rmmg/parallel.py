@@ -0,0 +1,296 @@
+# rtl_fingerprint/rmmg/parallel.py
+
+"""
+多进程查询执行：
+  - SharedCsrGraph: 把冻结后的 CSR 数组拷进一块 multiprocessing.shared_memory，
+    worker 只按名字 attach，拿到 memoryview，不拷贝、不 pickle 整张图
+  - ParallelQueryEngine: 进程池并行执行
+      * run_queries: 多个独立查询分发给不同 worker
+      * bfs_paths:   单个查询按 source 切分成若干分区并行 BFS，再合并
+    返回类型和 RmmgQueryEngine 相同（QueryResult），各 worker 的执行状态合并进去；
+    budget / cancel / mask 参数也和 RmmgQueryEngine.bfs_paths 一致。
+谓词（lambda）和掩码编译只在主进程做，worker 之间只传 node_id 列表和掩码的 0/1 表。
+取消 / 超时由主进程盯着，通过进程池共享的一个 Event 通知所有 worker。
+"""
+
+from __future__ import annotations
+import os
+from array import array
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .csr import CSR_FIELDS, CsrGraph
+from .budget import BudgetMeter, CancelToken, QueryBudget, QueryResult
+from .graph import RmmgGraph
+from .masks import CompiledMask, MaskedAdjacency, TraversalMask, compile_mask
+from .query import NodePred, RmmgQueryEngine, bfs_paths_on
+
+# (sources, targets, max_depth, max_paths)
+QuerySpec = Tuple[Sequence[int], Sequence[int], int, Optional[int]]
+
+# 发给 worker 的完整任务：QuerySpec + (budget, 掩码 0/1 表或 None, 是否监听取消)
+_Task = Tuple[Sequence[int], Sequence[int], int, Optional[int],
+              Optional[QueryBudget], Optional[Tuple[bytes, bytes, bytes, bytes]], bool]
+
+_ALIGN = 8
+_POLL_S = 0.02   # 主进程检查取消 / deadline 的间隔
+
+
+class SharedCsrGraph:
+    """
+    一块共享内存承载 CsrGraph 的全部数组。
+    meta 是一个很小的 dict（名字 + 各字段偏移），可以安全地传给子进程。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, meta: Dict[str, Any], owner: bool):
+        self.shm = shm
+        self.meta = meta
+        self.owner = owner
+        self.csr = self._view(shm, meta)
+
+    @classmethod
+    def create(cls, csr: CsrGraph) -> "SharedCsrGraph":
+        layout = []
+        offset = 0
+        for name, code in CSR_FIELDS:
+            arr = getattr(csr, name)
+            nbytes = len(arr) * array(code).itemsize
+            layout.append((name, code, offset, len(arr)))
+            offset += (nbytes + _ALIGN - 1) // _ALIGN * _ALIGN
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, _ALIGN))
+        for name, _, off, _ in layout:
+            raw = memoryview(getattr(csr, name)).cast("B")
+            shm.buf[off:off + len(raw)] = raw
+        meta = {"name": shm.name, "num_nodes": csr.num_nodes, "layout": layout}
+        return cls(shm, meta, owner=True)
+
+    @classmethod
+    def attach(cls, meta: Dict[str, Any]) -> "SharedCsrGraph":
+        try:
+            shm = shared_memory.SharedMemory(name=meta["name"], track=False)
+        except TypeError:
+            # Python < 3.13 没有 track 参数：attach 也会向 resource_tracker 注册，
+            # 但进程池子进程共用 owner 的 tracker，注册是幂等的，由 owner unlink 时注销
+            shm = shared_memory.SharedMemory(name=meta["name"])
+        return cls(shm, meta, owner=False)
+
+    @staticmethod
+    def _view(shm: shared_memory.SharedMemory, meta: Dict[str, Any]) -> CsrGraph:
+        arrays = {}
+        for name, code, off, length in meta["layout"]:
+            nbytes = length * array(code).itemsize
+            arrays[name] = shm.buf[off:off + nbytes].cast(code)
+        return CsrGraph(meta["num_nodes"], **arrays)
+
+    def close(self) -> None:
+        # 先释放 memoryview，否则 SharedMemory.close() 会报 BufferError
+        for name, _ in CSR_FIELDS:
+            view = getattr(self.csr, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ===== worker 侧 =============================================================
+
+_WORKER_GRAPH: Optional[SharedCsrGraph] = None
+_WORKER_CANCEL = None   # 主进程置位的 multiprocessing.Event
+
+
+class _SharedCancel:
+    """worker 侧的取消标记：只读共享 Event，接口与 CancelToken 相同。"""
+
+    reason = "cancelled"     # 真正的原因由主进程合并时填
+
+    def __init__(self, event):
+        self._event = event
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+def _worker_init(meta: Dict[str, Any], cancel_event=None) -> None:
+    global _WORKER_GRAPH, _WORKER_CANCEL
+    _WORKER_GRAPH = SharedCsrGraph.attach(meta)
+    _WORKER_CANCEL = cancel_event
+
+
+def _worker_bfs(task: _Task) -> QueryResult:
+    sources, targets, max_depth, max_paths, budget, tables, watch = task
+    assert _WORKER_GRAPH is not None, "worker not attached to shared graph"
+    adj: Any = _WORKER_GRAPH.csr
+    if tables is not None:
+        adj = MaskedAdjacency(CompiledMask(adj, *map(bytearray, tables)))
+    cancel = _SharedCancel(_WORKER_CANCEL) if watch and _WORKER_CANCEL is not None else None
+    res = bfs_paths_on(adj, sources, targets, max_depth=max_depth, max_paths=max_paths,
+                       budget=budget, cancel=cancel)
+    if tables is not None:
+        res.pruned_nodes = len(adj.pruned)
+        res.pruned_edges = adj.pruned_edges()
+    return res
+
+
+# ===== 主进程侧 ==============================================================
+
+def merge_partition_paths(parts: Iterable[List[List[int]]],
+                          max_paths: Optional[int] = None) -> QueryResult:
+    """
+    合并各分区的 BFS 结果，语义对齐串行 bfs_paths：
+      - 每个 target 只保留一条最短路径（长度相同时取分区靠前者）
+      - 按路径长度排序，再截断到 max_paths
+    各分区本身也截断到 max_paths，全局最短的 max_paths 个 target 不会因此丢失。
+    分区是 QueryResult 时合并执行状态：truncated 取或，reason 取第一个，
+    expanded / frontier_left / 剪枝 / 扫描边数求和，depth_reached / peak_frontier /
+    elapsed_s 取最大。
+    """
+    parts = list(parts)
+    best: Dict[int, Tuple[int, int, int, List[int]]] = {}
+    for pi, paths in enumerate(parts):
+        for k, p in enumerate(paths):
+            key = (len(p), pi, k)
+            cur = best.get(p[-1])
+            if cur is None or key < cur[:3]:
+                best[p[-1]] = key + (p,)
+    merged = [v[3] for v in sorted(best.values(), key=lambda v: v[:3])]
+    if max_paths is not None:
+        merged = merged[:max_paths]
+    res = QueryResult(merged)
+    for part in parts:
+        if not isinstance(part, QueryResult):
+            continue
+        if part.truncated and not res.truncated:
+            res.truncated, res.reason = True, part.reason
+        res.expanded += part.expanded
+        res.frontier_left += part.frontier_left
+        res.pruned_nodes += part.pruned_nodes
+        res.pruned_edges += part.pruned_edges
+        res.edges_scanned += part.edges_scanned
+        res.depth_reached = max(res.depth_reached, part.depth_reached)
+        res.peak_frontier = max(res.peak_frontier, part.peak_frontier)
+        res.elapsed_s = max(res.elapsed_s, part.elapsed_s)
+    return res
+
+
+class ParallelQueryEngine:
+    """
+    进程池版查询引擎。典型用法：
+      with ParallelQueryEngine(graph, workers=16) as pe:
+          paths = pe.query_custom(src_pred, dst_pred, max_depth=60)
+    """
+
+    def __init__(self, graph: RmmgGraph, workers: Optional[int] = None, mp_context=None):
+        self.graph = graph
+        self.engine = RmmgQueryEngine(graph)
+        self.workers = workers or os.cpu_count() or 1
+        self.shared = SharedCsrGraph.create(graph.freeze())
+        self._cancel = (mp_context or multiprocessing).Event()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp_context,
+            initializer=_worker_init,
+            initargs=(self.shared.meta, self._cancel),
+        )
+
+    def run_queries(
+        self,
+        specs: Sequence[QuerySpec],
+        budget: Optional[QueryBudget] = None,
+        cancel: Optional[CancelToken] = None,
+        mask: Optional[TraversalMask] = None,
+    ) -> List[QueryResult]:
+        """
+        并行执行多个独立查询，结果顺序和 specs 一致。
+        budget / mask 作用于每个查询；deadline 和 cancel 由主进程统一判定，
+        触发后所有 worker 尽快返回部分结果，reason 取主进程判定的原因。
+        同一个引擎上的并发调用共享取消 Event，取消会波及其它调用。
+        """
+        cm = compile_mask(self.graph, mask)
+        tables = None if cm is None else tuple(
+            bytes(b) for b in (cm.node_ok, cm.expand_ok, cm.slot_ok, cm.rslot_ok))
+        meter = BudgetMeter(QueryBudget(deadline_s=budget.deadline_s) if budget else None,
+                            cancel)
+        watch = meter.active
+        reason = meter.exceeded(0) if watch else None
+        if reason is not None:          # 调用前就已取消：worker 一开始就停
+            self._cancel.set()
+        try:
+            futures = [self._pool.submit(_worker_bfs,
+                                         (list(s), list(t), d, m, budget, tables, watch))
+                       for s, t, d, m in specs]
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=_POLL_S if watch else None,
+                                  return_when=FIRST_COMPLETED)
+                if watch and reason is None and pending:
+                    reason = meter.exceeded(0)
+                    if reason is not None:
+                        self._cancel.set()
+            results = [f.result() for f in futures]
+        finally:
+            self._cancel.clear()
+        if reason is not None:
+            for res in results:
+                if res.truncated:
+                    res.reason = reason
+        return results
+
+    def bfs_paths(
+        self,
+        sources: Iterable[int],
+        targets: Iterable[int],
+        max_depth: int = 50,
+        max_paths: Optional[int] = None,
+        partitions: Optional[int] = None,
+        budget: Optional[QueryBudget] = None,
+        cancel: Optional[CancelToken] = None,
+        mask: Optional[TraversalMask] = None,
+    ) -> QueryResult:
+        """
+        把 sources 切成 partitions 份并行 BFS，合并规则见 merge_partition_paths；
+        budget / cancel / mask 同 RmmgQueryEngine.bfs_paths（max_expanded 等按分区计），
+        elapsed_s 是主进程看到的整体耗时。
+        """
+        sources = list(sources)
+        targets = list(targets)
+        if not sources or not targets:
+            return QueryResult()
+        meter = BudgetMeter(None, None)
+        k = max(1, min(partitions or self.workers, len(sources)))
+        chunk = (len(sources) + k - 1) // k
+        specs = [(sources[i:i + chunk], targets, max_depth, max_paths)
+                 for i in range(0, len(sources), chunk)]
+        res = merge_partition_paths(
+            self.run_queries(specs, budget=budget, cancel=cancel, mask=mask), max_paths)
+        res.elapsed_s = meter.elapsed()
+        return res
+
+    def query_custom(
+        self,
+        source_pred: NodePred,
+        target_pred: NodePred,
+        max_depth: int = 50,
+        max_paths: Optional[int] = None,
+        budget: Optional[QueryBudget] = None,
+        cancel: Optional[CancelToken] = None,
+        mask: Optional[TraversalMask] = None,
+    ) -> QueryResult:
+        src_nodes = self.engine.find_nodes(source_pred)
+        dst_nodes = self.engine.find_nodes(target_pred)
+        print(f"[RMMG-QUERY] parallel custom sources: {len(src_nodes)}, targets: {len(dst_nodes)}")
+        return self.bfs_paths(src_nodes, dst_nodes, max_depth=max_depth, max_paths=max_paths,
+                              budget=budget, cancel=cancel, mask=mask)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        self.shared.close()
+
+    def __enter__(self) -> "ParallelQueryEngine":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,154 @@
+# rtl_fingerprint/rmmg/pathcount.py
+
+"""
+路径计数 + 影响力统计：在 SCC 凝聚图上做 DP，不枚举路径。
+  - to_sink[c]   : 分量 c 到汇集合的不同路径数（c 本身含汇时，空路径也算一条）
+  - from_src[c]  : 源集合到分量 c 的不同路径数
+  - fan_out[c]   : 同上，但每条路径按终点汇的位宽加权（“能影响多少架构位”）
+  - fan_in[c]    : 同上，但每条路径按起点源的位宽加权（“汇进来多少状态位”）
+  - through(v)   = from_src × to_sink：经过 v 的 源 → 汇 路径数
+四个量在同一个按拓扑序的循环里算完：正向部分用编号 i 的分量往后推，
+反向部分用编号 N-1-i 的分量从后继拉。
+环按分量折叠：一个强连通分量内部的多条路线只算一次（否则路径数无穷），
+平行边也只算一条。
+计数默认是 Python 大整数（精确），log_space=True 时改存 log2 值，适合超大图。
+"""
+
+from __future__ import annotations
+import math
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from .scc import condensation
+
+Count = Union[int, float]
+_NEG_INF = float("-inf")
+
+
+def _log_add(a: float, b: float) -> float:
+    if a == _NEG_INF:
+        return b
+    if b == _NEG_INF:
+        return a
+    if a < b:
+        a, b = b, a
+    return a + math.log2(1.0 + 2.0 ** (b - a))
+
+
+class PathStats:
+    def __init__(self, comp, log_space: bool, to_sink: List[Count], from_src: List[Count],
+                 fan_out: List[Count], fan_in: List[Count], total: Count):
+        self.comp = comp
+        self.log_space = log_space
+        self._to_sink = to_sink
+        self._from_src = from_src
+        self._fan_out = fan_out
+        self._fan_in = fan_in
+        self.total = total               # 源 → 汇 的路径总数
+
+    def paths_to_sinks(self, v: int) -> Count:
+        return self._to_sink[self.comp[v]]
+
+    def paths_from_sources(self, v: int) -> Count:
+        return self._from_src[self.comp[v]]
+
+    def fan_out(self, v: int) -> Count:
+        return self._fan_out[self.comp[v]]
+
+    def fan_in(self, v: int) -> Count:
+        return self._fan_in[self.comp[v]]
+
+    def through(self, v: int) -> Count:
+        c = self.comp[v]
+        if self.log_space:
+            return self._from_src[c] + self._to_sink[c]
+        return self._from_src[c] * self._to_sink[c]
+
+    def log2(self, x: Count) -> float:
+        """计数统一换成 log2(1 + x)，0 对应 0.0，方便打分 / 排序。"""
+        if self.log_space:
+            return _log_add(x, 0.0)
+        return math.log2(1 + x)
+
+    def impact(self, nodes: Iterable[int]) -> Optional[float]:
+        """
+        一组节点（例如同一 module_path）的影响力分数，[0, 1]：
+        log(1 + max through) / log(1 + total)。没有源 → 汇路径时返回 None。
+        """
+        nodes = list(nodes)
+        denom = self.log2(self.total)
+        if not nodes or denom <= 0.0:
+            return None
+        best = max(self.log2(self.through(v)) for v in nodes)
+        return min(1.0, best / denom)
+
+
+def _node_weight(graph, v: int, log_space: bool) -> Count:
+    w = graph.nodes[v].width
+    w = w if w and w > 0 else 1
+    return math.log2(w) if log_space else w
+
+
+def compute_path_stats(graph, sources: Iterable[int], sinks: Iterable[int],
+                       log_space: bool = False) -> PathStats:
+    cond = condensation(graph)
+    ncomp = cond.num_comps
+    comp = cond.comp
+    zero: Count = _NEG_INF if log_space else 0
+    add = _log_add if log_space else (lambda a, b: a + b)
+
+    src_cnt = [zero] * ncomp    # 分量内源的个数 / 位宽和（种子）
+    src_w = [zero] * ncomp
+    for s in set(sources):
+        c = comp[s]
+        src_cnt[c] = add(src_cnt[c], 0.0 if log_space else 1)
+        src_w[c] = add(src_w[c], _node_weight(graph, s, log_space))
+    sink_cnt = [zero] * ncomp
+    sink_w = [zero] * ncomp
+    sinks_per_comp: Dict[int, int] = {}
+    for t in set(sinks):
+        c = comp[t]
+        sinks_per_comp[c] = sinks_per_comp.get(c, 0) + 1
+        sink_cnt[c] = add(sink_cnt[c], 0.0 if log_space else 1)
+        sink_w[c] = add(sink_w[c], _node_weight(graph, t, log_space))
+
+    from_src, fan_in = src_cnt, src_w              # 原地累加
+    to_sink, fan_out = sink_cnt, sink_w
+    succ_ptr, succ = cond.dag_indptr, cond.dag_indices
+    for i in range(ncomp):
+        # 正向：分量 i 的前驱都已处理完，把结果推给后继
+        f, w = from_src[i], fan_in[i]
+        if f != zero:
+            for j in range(succ_ptr[i], succ_ptr[i + 1]):
+                d = succ[j]
+                from_src[d] = add(from_src[d], f)
+                fan_in[d] = add(fan_in[d], w)
+        # 反向：分量 r 的后继都已处理完，从后继拉
+        r = ncomp - 1 - i
+        t, o = to_sink[r], fan_out[r]
+        for j in range(succ_ptr[r], succ_ptr[r + 1]):
+            d = succ[j]
+            if to_sink[d] != zero:
+                t = add(t, to_sink[d])
+                o = add(o, fan_out[d])
+        to_sink[r], fan_out[r] = t, o
+
+    # 以某个汇结尾的路径数 = 到达其分量的路径数 × 分量内汇的个数
+    total = zero
+    for c, n_sinks in sinks_per_comp.items():
+        if log_space:
+            total = _log_add(total, from_src[c] + math.log2(n_sinks))
+        else:
+            total += from_src[c] * n_sinks
+    return PathStats(comp, log_space, to_sink, from_src, fan_out, fan_in, total)
+
+
+def path_stats(graph, sources: Iterable[int], sinks: Iterable[int],
+               log_space: bool = False) -> PathStats:
+    """按 (源集合, 汇集合, log_space) 缓存在 RmmgGraph 上。"""
+    key: Tuple[FrozenSet[int], FrozenSet[int], bool] = (
+        frozenset(sources), frozenset(sinks), log_space)
+    memo: Dict[tuple, PathStats] = graph.cached("path_stats", dict)
+    stats = memo.get(key)
+    if stats is None:
+        stats = memo[key] = compute_path_stats(graph, key[0], key[1], log_space)
+    return stats
@@ -0,0 +1,186 @@
+# rtl_fingerprint/rmmg/profile.py
+
+"""
+按查询的 explain / profile 记录（默认关闭）：
+  - 分阶段计时：select（按谓词选端点）、index（邻接表 / CSR / 掩码 / 距离表等派生结构）、
+    search（搜索本身）、materialize（从 parent 数组还原路径），阶段嵌套时只记自身时间，
+    未归入任何阶段的时间记在 other
+  - 搜索计数：扩展节点数、扫描边数、峰值 frontier、路径条数与路径节点总数
+  - 派生结构缓存命中 / 未命中（RmmgGraph.cached 的计数差）
+RmmgQueryEngine.enable_profiling(log_path=...) 打开后每次查询生成一条 QueryProfile，
+可选追加到 JSONL 文件；关闭时每个查询方法只多一次属性判断，搜索内层循环不计数。
+"""
+
+from __future__ import annotations
+import functools
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+_NULL = nullcontext()
+
+
+@dataclass
+class QueryProfile:
+    query: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    phases: Dict[str, float] = field(default_factory=dict)   # 阶段 -> 秒（自身时间）
+    total_s: float = 0.0
+    sources: int = 0
+    targets: int = 0
+    nodes_expanded: int = 0
+    edges_scanned: int = 0
+    peak_frontier: int = 0
+    index_hits: int = 0
+    index_misses: int = 0
+    paths: int = 0
+    path_nodes: int = 0                 # 返回路径的节点总数（物化代价）
+    truncated: bool = False
+    reason: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def explain(self) -> str:
+        """一行一项的可读摘要。"""
+        lines = [f"{self.query}: {self.total_s * 1e3:.2f} ms"
+                 + (f" (truncated: {self.reason})" if self.truncated else "")]
+        for name, sec in sorted(self.phases.items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {name:<12s} {sec * 1e3:9.2f} ms")
+        lines.append(f"  endpoints    {self.sources} -> {self.targets}")
+        lines.append(f"  expanded     {self.nodes_expanded} nodes, "
+                     f"{self.edges_scanned} edges, peak frontier {self.peak_frontier}")
+        lines.append(f"  index        {self.index_hits} hits, {self.index_misses} misses")
+        lines.append(f"  paths        {self.paths} ({self.path_nodes} nodes)")
+        return "\n".join(lines)
+
+
+class QueryProfiler:
+    """记录当前查询的阶段栈；嵌套的查询方法（query_custom -> bfs_paths）并入最外层记录。"""
+
+    def __init__(self, graph, log_path: Optional[str] = None, keep: int = 100):
+        self.graph = graph
+        self.log_path = log_path
+        self.keep = keep
+        self.records: List[QueryProfile] = []
+        self.current: Optional[QueryProfile] = None
+        self._stack: List[str] = []
+        self._mark = 0.0
+        self._depth = 0
+
+    # ===== 阶段计时 =========================================================
+
+    def _switch(self) -> None:
+        now = time.perf_counter()
+        top = self._stack[-1] if self._stack else "other"
+        phases = self.current.phases
+        phases[top] = phases.get(top, 0.0) + (now - self._mark)
+        self._mark = now
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if self.current is None:
+            yield
+            return
+        self._switch()
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._switch()
+            self._stack.pop()
+
+    # ===== 计数 =============================================================
+
+    def endpoints(self, sources, targets=None) -> None:
+        if self.current is not None:
+            self.current.sources += len(sources)
+            if targets is not None:
+                self.current.targets += len(targets)
+
+    def search(self, res) -> None:
+        """从 QueryResult / BfsResult 累加搜索计数。"""
+        p = self.current
+        if p is None:
+            return
+        p.nodes_expanded += getattr(res, "expanded", 0)
+        p.edges_scanned += getattr(res, "edges_scanned", 0)
+        p.peak_frontier = max(p.peak_frontier, getattr(res, "peak_frontier", 0))
+        if getattr(res, "truncated", False):
+            p.truncated = True
+            p.reason = res.reason
+
+    # ===== 一次查询的开始 / 结束 ============================================
+
+    def begin(self, query: str, params: Dict[str, Any]) -> bool:
+        """最外层返回 True；嵌套调用只加深度。"""
+        self._depth += 1
+        if self._depth > 1:
+            return False
+        self.current = QueryProfile(query, params)
+        self._hits0 = self.graph.cache_hits
+        self._misses0 = self.graph.cache_misses
+        self._start = self._mark = time.perf_counter()
+        self._stack = []
+        return True
+
+    def end(self, outer: bool, result: Any) -> None:
+        self._depth -= 1
+        if not outer:
+            return
+        p = self.current
+        self._switch()
+        p.total_s = self._mark - self._start
+        p.index_hits = self.graph.cache_hits - self._hits0
+        p.index_misses = self.graph.cache_misses - self._misses0
+        if isinstance(result, list) and all(isinstance(x, list) for x in result):
+            p.paths = len(result)
+            p.path_nodes = sum(len(x) for x in result)
+        self.current = None
+        self.records.append(p)
+        if len(self.records) > self.keep:
+            del self.records[0]
+        if self.log_path:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(p.to_dict(), default=str) + "\n")
+
+    @property
+    def last(self) -> Optional[QueryProfile]:
+        return self.records[-1] if self.records else None
+
+
+def _param_repr(v: Any) -> Any:
+    if v is None or isinstance(v, (bool, int, float, str)):
+        return v
+    if isinstance(v, (list, tuple, set, frozenset)):
+        return f"<{type(v).__name__} of {len(v)}>"
+    return type(v).__name__
+
+
+def profiled(name: str):
+    """
+    RmmgQueryEngine 查询方法的装饰器：没开 profiling 时直接调用原方法；
+    开了则以最外层调用为一条记录，标量参数记进 params。
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            prof = self.profiler
+            if prof is None:
+                return fn(self, *args, **kwargs)
+            outer = prof.begin(name, {k: _param_repr(v) for k, v in kwargs.items()})
+            result = None
+            try:
+                result = fn(self, *args, **kwargs)
+                return result
+            finally:
+                prof.end(outer, result)
+        return wrapper
+    return deco
+
+
+def phase(profiler: Optional[QueryProfiler], name: str):
+    """profiler 为 None 时返回共享的空上下文。"""
+    return _NULL if profiler is None else profiler.phase(name)
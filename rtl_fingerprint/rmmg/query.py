@@ -1,10 +1,30 @@
 # rtl_fingerprint/rmmg/query.py
 
 from __future__ import annotations
+import re
 from collections import deque, defaultdict
-from typing import Callable, Iterable, List, Dict, Tuple, Optional
-
+from typing import Any, Callable, Iterable, List, Dict, Tuple, Optional
+
+from .astar import astar_paths_on, sink_distance
+from .bits import BitsLike, edge_bit_table, propagate_bits
+from .budget import BudgetMeter, CancelToken, QueryBudget, QueryResult
+from .centrality import CentralityResult, centrality, rank_nodes
+from ..compiler_types import Fingerprint
+from .compressed import CompressedAdjacency
+from .contract import Contraction, contract_passthrough, contract_pipelines
 from .graph import RmmgGraph, RmmgNode, RmmgEdge
+from .kernels import BfsResult, level_bfs
+from .hubs import HubPolicy, HubReport, detect_hubs
+from .masks import MaskedAdjacency, TraversalMask, compile_mask, masked_view, restrict_nodes
+from .quotient import quotient_graph
+from .dominators import common_dominators, common_post_dominators, dominator_tree
+from .flow import FlowResult, max_flow_min_cut
+from .timeexp import TimedNode, time_expanded
+from .pathcount import PathStats, path_stats
+from .profile import QueryProfile, QueryProfiler, phase, profiled
+from .rpq import PathAutomaton, rpq_paths_on
+from .sketch import ConeEstimates, estimate_cones
+from .taint import GroupBy, LeakageMatrix, leakage_matrix
 
 
 NodePred = Callable[[RmmgNode], bool]
@@ -21,6 +41,8 @@ class RmmgQueryEngine:
     def __init__(self, graph: RmmgGraph):
         self.graph = graph
         self._adj = None  # 延迟构建邻接表
+        self.hub_report: Optional[HubReport] = None
+        self.profiler: Optional[QueryProfiler] = None   # enable_profiling() 后才有
 
     # ===== 公共基础方法 =====================================================
 
@@ -28,8 +50,22 @@ class RmmgQueryEngine:
         """按谓词筛选节点，返回节点 ID 列表。"""
         return [nid for nid, node in self.graph.nodes.items() if pred(node)]
 
+    def _endpoints(self, source_pred: NodePred,
+                   target_pred: NodePred) -> Tuple[List[int], List[int]]:
+        """按谓词选出源 / 汇（profile 时记为 select 阶段）。"""
+        prof = self.profiler
+        with phase(prof, "select"):
+            src_nodes = self.find_nodes(source_pred)
+            dst_nodes = self.find_nodes(target_pred)
+        if prof is not None:
+            prof.endpoints(src_nodes, dst_nodes)
+        return src_nodes, dst_nodes
+
     def build_adj_list(self) -> Dict[int, List[int]]:
-        """构建一次 src→dst 的邻接表，供多次查询复用。"""
+        """
+        构建一次 src→dst 的邻接表，供多次查询复用。
+        use_compressed_adjacency() 之后返回压缩邻接表（同样支持 get(u, default)）。
+        """
         if self._adj is not None:
             return self._adj
         adj: Dict[int, List[int]] = defaultdict(list)
@@ -38,52 +74,196 @@ class RmmgQueryEngine:
         self._adj = adj
         return adj
 
+    def use_compressed_adjacency(self, window: int = 7, max_ref_chain: int = 3,
+                                 block_size: int = 64, cache_blocks: int = 16,
+                                 release_csr: bool = False) -> CompressedAdjacency:
+        """
+        把 Python 后端用的 dict 邻接表换成 gap + varint + 引用压缩的邻接表（见 rmmg/compressed.py），
+        bfs_paths / query_* 的 python 后端照常工作，每次取后继多一次解码。
+        release_csr=True 时压缩完丢掉图上缓存的 CSR（A* / NumPy / 掩码查询需要时会重建）。
+        """
+        adj = CompressedAdjacency.from_graph(self.graph, window=window,
+                                             max_ref_chain=max_ref_chain,
+                                             block_size=block_size, cache_blocks=cache_blocks)
+        if release_csr:
+            self.graph.invalidate("csr")
+        self._adj = adj
+        st = adj.stats()
+        print(f"[RMMG-QUERY] compressed adjacency: {st['bytes']} bytes "
+              f"for {st['nodes']} nodes.")
+        return adj
+
+    def enable_profiling(self, log_path: Optional[str] = None) -> QueryProfiler:
+        """
+        打开按查询的 profile（阶段耗时、扩展 / 扫描计数、索引命中，详见 rmmg/profile.py），
+        log_path 给出时每条记录追加一行 JSON。
+        """
+        self.profiler = QueryProfiler(self.graph, log_path=log_path)
+        return self.profiler
+
+    def disable_profiling(self) -> None:
+        self.profiler = None
+
+    @property
+    def last_profile(self) -> Optional[QueryProfile]:
+        return self.profiler.last if self.profiler is not None else None
+
+    def contract_pipelines(self, keep: Optional[NodePred] = None,
+                           min_length: int = 1) -> Contraction:
+        """
+        收缩纯流水线寄存器链（详见 rmmg/contract.py），原图不变。
+        在 RmmgQueryEngine(c.graph) 上查询，结果用 c.expand_paths 还原成原图路径。
+        """
+        c = contract_pipelines(self.graph, keep=keep, min_length=min_length)
+        print(f"[RMMG-QUERY] pipeline contraction: {len(self.graph.nodes)} -> "
+              f"{len(c.graph.nodes)} nodes ({c.absorbed} registers folded into delay edges)")
+        return c
+
+    def contract_passthrough(self, keep: Optional[NodePred] = None) -> Contraction:
+        """
+        合并端口绑定形成的别名链（详见 rmmg/contract.py），原图不变；
+        合并节点的 attrs["aliases"] 保留原层次名，pretty_print_paths 会一并打印。
+        """
+        c = contract_passthrough(self.graph, keep=keep)
+        print(f"[RMMG-QUERY] pass-through contraction: {len(self.graph.nodes)} -> "
+              f"{len(c.graph.nodes)} nodes, {len(self.graph.edges)} -> "
+              f"{len(c.graph.edges)} edges")
+        return c
+
+    def detect_hubs(self, policy: Optional[HubPolicy] = None) -> HubReport:
+        """度数统计 + 标记高扇出枢纽（attrs["is_hub"]），详见 rmmg/hubs.py。"""
+        report = detect_hubs(self.graph, policy or HubPolicy())
+        self.hub_report = report
+        print(f"[RMMG-QUERY] hubs: {len(report.hubs)} nodes with out-degree >= "
+              f"{report.threshold:.0f} (or clock/reset / deny-listed)")
+        return report
+
+    @profiled("bfs_paths")
     def bfs_paths(
         self,
         sources: Iterable[int],
         targets: Iterable[int],
         max_depth: int = 50,
         max_paths: Optional[int] = None,
-    ) -> List[List[int]]:
+        backend: str = "python",
+        budget: Optional[QueryBudget] = None,
+        cancel: Optional[CancelToken] = None,
+        mask: Optional[TraversalMask] = None,
+    ) -> QueryResult:
         """
         多源 BFS，寻找从 sources 到 targets 的有向路径。
         - sources / targets: 节点 ID 集合
         - max_depth: 限制路径最大长度，防止在大图中无限扩散
         - max_paths: 最多返回多少条路径（None 表示不限）
-        返回: 每条路径是一个 node_id 列表
+        - backend: "python"（逐节点 deque）、"numpy"（kernels.level_bfs 向量化内核，
+          结果同样是每个可达 target 一条最短路径，按长度排序）
+          或 "astar"（以缓存的到 targets 距离表为启发式的 A*，只走能在剩余深度内到达 target 的节点）
+        - budget / cancel: 超时、扩展节点数、内存上限和协作式取消（见 rmmg/budget.py），
+          触发时返回已找到的部分路径，result.truncated / result.reason 说明原因
+        - mask: TraversalMask（或 restrict_nodes 得到的 CompiledMask），
+          遍历时跳过的边类 / 节点类（见 rmmg/masks.py），不复制图
+        返回: QueryResult（list 子类），每条路径是一个 node_id 列表
+        """
+        if backend == "numpy":
+            return self._bfs_paths_numpy(sources, targets, max_depth, max_paths,
+                                         budget, cancel, mask)
+        if backend == "astar":
+            return self.astar_paths(sources, targets, max_depth, max_paths, budget, cancel,
+                                    mask)
+        if backend != "python":
+            raise ValueError(f"unknown bfs backend: {backend!r}")
+        prof = self.profiler
+        with phase(prof, "index"):
+            cm = compile_mask(self.graph, mask)
+            adj = MaskedAdjacency(cm) if cm is not None else self.build_adj_list()
+        with phase(prof, "search"):
+            res = bfs_paths_on(adj, sources, targets,
+                               max_depth=max_depth, max_paths=max_paths,
+                               budget=budget, cancel=cancel, profile=prof is not None)
+        if prof is not None:
+            prof.search(res)
+        if cm is not None:
+            res.pruned_nodes = len(adj.pruned)
+            res.pruned_edges = adj.pruned_edges()
+        return res
+
+    @profiled("astar_paths")
+    def astar_paths(
+        self,
+        sources: Iterable[int],
+        targets: Iterable[int],
+        max_depth: int = 50,
+        max_paths: Optional[int] = None,
+        budget: Optional[QueryBudget] = None,
+        cancel: Optional[CancelToken] = None,
+        mask: Optional[TraversalMask] = None,
+    ) -> QueryResult:
+        """
+        目标导向版 bfs_paths：同一组 targets 的反向距离表只算一次（缓存在图上），
+        之后每次查询只扩展 g + h <= max_depth - 1 的节点。详见 rmmg/astar.py。
         """
-        adj = self.build_adj_list()
+        prof = self.profiler
+        with phase(prof, "index"):
+            table = sink_distance(self.graph, targets)
+            csr, cm = self.graph.freeze(), compile_mask(self.graph, mask)
+        with phase(prof, "search"):
+            res = astar_paths_on(csr, table, sources,
+                                 max_depth=max_depth, max_paths=max_paths,
+                                 budget=budget, cancel=cancel, mask=cm,
+                                 profile=prof is not None)
+        if prof is not None:
+            prof.search(res)
+        return res
+
+    def _bfs_paths_numpy(self, sources, targets, max_depth, max_paths,
+                         budget=None, cancel=None, mask=None) -> QueryResult:
         target_set = set(targets)
-        found_paths: List[List[int]] = []
-
-        # 初始化队列
-        q = deque()
-        for s in sources:
-            q.append((s, [s]))
-
-        visited = set(sources)
-
-        while q:
-            cur, path = q.popleft()
-            if max_paths is not None and len(found_paths) >= max_paths:
-                break
-
-            if len(path) > max_depth:
-                continue
-
-            if cur in target_set:
-                found_paths.append(path)
-                # 如果只关心最短距离，可以在这里不扩展该节点
-                # continue
-                # 这里选择仍然允许找到其它源→该目标的路径
-                continue
-
-            for nxt in adj.get(cur, []):
-                if nxt not in visited:
-                    visited.add(nxt)
-                    q.append((nxt, path + [nxt]))
+        if max_depth < 1 or not target_set:
+            return QueryResult()
+        prof = self.profiler
+        with phase(prof, "index"):
+            cm = compile_mask(self.graph, mask)
+        # 路径节点数 <= max_depth  <=>  距离 <= max_depth - 1；target 不再向外扩展
+        with phase(prof, "search"):
+            res = level_bfs(self.graph, sources, max_depth=max_depth - 1, terminal=target_set,
+                            budget=budget, cancel=cancel, mask=cm)
+        if prof is not None:
+            prof.search(res)
+        with phase(prof, "materialize"):
+            hits = sorted((int(res.dist[t]), t) for t in target_set if res.dist[t] >= 0)
+            if max_paths is not None:
+                hits = hits[:max_paths]
+            paths = [res.path_to(t) for _, t in hits]
+        return QueryResult(
+            paths,
+            truncated=res.truncated, reason=res.reason, expanded=res.expanded,
+            depth_reached=res.levels + 1, frontier_left=res.frontier_left,
+            elapsed_s=res.elapsed_s,
+            pruned_nodes=res.pruned_nodes, pruned_edges=res.pruned_edges,
+            edges_scanned=res.edges_scanned, peak_frontier=res.peak_frontier,
+        )
 
-        return found_paths
+    @profiled("reachable")
+    def reachable(
+        self,
+        sources: Iterable[int],
+        max_depth: Optional[int] = None,
+        direction_optimizing: bool = True,
+        mask: Optional[TraversalMask] = None,
+    ) -> BfsResult:
+        """
+        向量化可达性：从 sources（通常是 find_nodes 选出的集合）出发的按层 BFS，
+        返回 BfsResult（dist / parent 数组），适合一次性回答“这批源能到哪里”。
+        """
+        prof = self.profiler
+        with phase(prof, "index"):
+            cm = compile_mask(self.graph, mask)
+        with phase(prof, "search"):
+            res = level_bfs(self.graph, sources, max_depth=max_depth,
+                            direction_optimizing=direction_optimizing, mask=cm)
+        if prof is not None:
+            prof.search(res)
+        return res
 
     def pretty_print_paths(
         self,
@@ -108,6 +288,9 @@ class RmmgQueryEngine:
                     extra.append(f"w={n.width}")
                 extra_str = " ".join(extra)
                 print(f"  {nid:6d}  {n.hier_name}  {extra_str}")
+                aliases = n.attrs.get("aliases")
+                if aliases:
+                    print(f"          aka {', '.join(aliases)}")
             print()
 
     # ===== 一些常见谓词封装 ================================================
@@ -151,6 +334,58 @@ class RmmgQueryEngine:
             return bool(n.attrs.get("is_arch_visible", False))
         return _p
 
+    @staticmethod
+    def pred_micro_state() -> NodePred:
+        def _p(n: RmmgNode) -> bool:
+            return bool(n.attrs.get("is_micro_state", False))
+        return _p
+
+    @staticmethod
+    def pred_attr_range(key: str, lo: Optional[float] = None,
+                        hi: Optional[float] = None) -> NodePred:
+        """lo <= attrs[key] <= hi（两端可省略）；没有该属性的节点不满足。"""
+        def _p(n: RmmgNode) -> bool:
+            val = n.attrs.get(key)
+            if val is None:
+                return False
+            return (lo is None or val >= lo) and (hi is None or val <= hi)
+        return _p
+
+    @staticmethod
+    def pred_from_spec(spec: Any) -> NodePred:
+        """
+        把 JSON 友好的规则描述转成谓词（格式与 arch_visible_rules 一致），
+        供查询服务 / 脚本这类不能直接传 lambda 的场景使用：
+          - {"type": "prefix", "value": "work@Rob.io_commit_"}
+          - {"type": "substr", "value": "MSHR.meta_"}
+          - {"type": "regex",  "value": ".*io_dmem_.*"}
+          - {"type": "exact",  "value": "work@MSHR.meta_tag"}
+          - {"type": "attr",   "value": "is_arch_visible"}   # attrs 为真
+          - {"type": "range",  "value": "fanout_cone", "min": 1000}   # 数值属性区间
+          - [spec, spec, ...]                                # 任一满足
+        """
+        if isinstance(spec, (list, tuple)):
+            preds = [RmmgQueryEngine.pred_from_spec(s) for s in spec]
+            def _any(n: RmmgNode) -> bool:
+                return any(p(n) for p in preds)
+            return _any
+
+        rtype = spec.get("type", "substr")
+        val = spec.get("value", "")
+        if rtype == "prefix":
+            return RmmgQueryEngine.pred_hier_startswith(val)
+        if rtype == "regex":
+            return RmmgQueryEngine.pred_name_regex(val)
+        if rtype == "exact":
+            return lambda n: n.hier_name == val
+        if rtype == "attr":
+            return lambda n: bool(n.attrs.get(val, False))
+        if rtype == "range":
+            return RmmgQueryEngine.pred_attr_range(val, spec.get("min"), spec.get("max"))
+        if rtype == "substr":
+            return RmmgQueryEngine.pred_hier_contains(val)
+        raise ValueError(f"unknown predicate spec type: {rtype!r}")
+
     # 常用语义 predicate
     def pred_mshr_meta(self) -> NodePred:
         def _p(n: RmmgNode) -> bool:
@@ -201,31 +436,39 @@ class RmmgQueryEngine:
                    bool(node.attrs.get("is_arch_visible", False))
         return _pred
 
+    @profiled("query_mshr_to_rob_commit")
     def query_mshr_to_rob_commit(
         self,
         max_depth: int = 60,
         max_paths: Optional[int] = 20,
-    ) -> List[List[int]]:
+        budget: Optional[QueryBudget] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> QueryResult:
         """
         查询：MSHR 元数据信号是否能通过某条路径影响 ROB commit 流。
-        返回：每条路径是 node_id 列表。
+        返回：每条路径是 node_id 列表；budget / cancel 同 bfs_paths。
         """
-        src_nodes = self.find_nodes(self.pred_mshr_meta())
-        dst_nodes = self.find_nodes(self.pred_rob_commit_arch())
+        src_nodes, dst_nodes = self._endpoints(self.pred_mshr_meta(),
+                                               self.pred_rob_commit_arch())
 
         print(f"[RMMG-QUERY] MSHR meta sources: {len(src_nodes)}")
         print(f"[RMMG-QUERY] ROB commit targets: {len(dst_nodes)}")
 
         if not src_nodes or not dst_nodes:
-            return []
+            return QueryResult()
 
         paths = self.bfs_paths(
             sources=src_nodes,
             targets=dst_nodes,
             max_depth=max_depth,
             max_paths=max_paths,
+            budget=budget,
+            cancel=cancel,
         )
 
+        if paths.truncated:
+            print(f"[RMMG-QUERY] MSHR query truncated ({paths.reason}) after "
+                  f"expanding {paths.expanded} nodes.")
         print(f"[RMMG-QUERY] Found {len(paths)} paths from MSHR meta to ROB commit.")
         return paths
 
@@ -239,23 +482,35 @@ class RmmgQueryEngine:
             return "Rob.io_commit_uops_0" in n.hier_name and "data" in n.hier_name
         return _p
     
-    def query_dcache_to_rob_data(self, max_depth=100, max_paths=20):
-        src = self.find_nodes(self.pred_dcache_resp_data())
-        dst = self.find_nodes(self.pred_rob_commit_wdata())
+    @profiled("query_dcache_to_rob_data")
+    def query_dcache_to_rob_data(self, max_depth=100, max_paths=20,
+                                 budget: Optional[QueryBudget] = None,
+                                 cancel: Optional[CancelToken] = None) -> QueryResult:
+        src, dst = self._endpoints(self.pred_dcache_resp_data(), self.pred_rob_commit_wdata())
         print(f"[RMMG-QUERY] DCache resp sources: {len(src)}")
         print(f"[RMMG-QUERY] ROB commit data targets: {len(dst)}")
-        return self.bfs_paths(src, dst, max_depth=max_depth, max_paths=max_paths)
+        if not src or not dst:
+            return QueryResult()
+        return self.bfs_paths(src, dst, max_depth=max_depth, max_paths=max_paths,
+                              budget=budget, cancel=cancel)
 
 
     # ===== 扩展接口：自定义源/汇谓词 =======================================
 
+    @profiled("query_custom")
     def query_custom(
         self,
         source_pred: NodePred,
         target_pred: NodePred,
         max_depth: int = 50,
         max_paths: Optional[int] = None,
-    ) -> List[List[int]]:
+        backend: str = "python",
+        budget: Optional[QueryBudget] = None,
+        cancel: Optional[CancelToken] = None,
+        mask: Optional[TraversalMask] = None,
+        hubs: Optional[str] = None,
+        hierarchical: bool = False,
+    ) -> QueryResult:
         """
         通用版本：使用自定义源/汇谓词做路径查询。
         例：
@@ -264,23 +519,407 @@ class RmmgQueryEngine:
               engine.pred_hier_contains("dcache.tags"),
               max_depth=80
           )
+        hubs="skip" / "terminal"：跳过高扇出枢纽或只到达不扩展（第一次用时按默认策略识别）。
+        hierarchical=True：先在模块级商图上找源模块 → 汇模块的路线，
+        节点级搜索只进入路线上的模块（见 rmmg/quotient.py），结果与直接搜索一致。
         """
-        src_nodes = self.find_nodes(source_pred)
-        dst_nodes = self.find_nodes(target_pred)
+        if hubs is not None:
+            if self.hub_report is None:
+                self.detect_hubs()
+            hub_mask = TraversalMask.hubs(hubs)
+            mask = hub_mask if mask is None else mask | hub_mask
+
+        prof = self.profiler
+        src_nodes, dst_nodes = self._endpoints(source_pred, target_pred)
 
         print(f"[RMMG-QUERY] custom sources: {len(src_nodes)}")
         print(f"[RMMG-QUERY] custom targets: {len(dst_nodes)}")
 
         if not src_nodes or not dst_nodes:
-            return []
+            return QueryResult()
+
+        if hierarchical:
+            with phase(prof, "index"):
+                qg = quotient_graph(self.graph)
+                routes = qg.route_modules(qg.modules_of(src_nodes), qg.modules_of(dst_nodes),
+                                          max_hops=max_depth - 1)
+                mask = restrict_nodes(self.graph, mask, qg.node_filter(routes))
+            print(f"[RMMG-QUERY] hierarchical: {len(routes)}/{qg.num_modules} modules "
+                  f"on routes, {sum(mask.node_ok)} nodes searchable")
+            if not routes:
+                return QueryResult()
 
         paths = self.bfs_paths(
             sources=src_nodes,
             targets=dst_nodes,
             max_depth=max_depth,
             max_paths=max_paths,
+            backend=backend,
+            budget=budget,
+            cancel=cancel,
+            mask=mask,
         )
 
+        if paths.truncated:
+            print(f"[RMMG-QUERY] custom query truncated ({paths.reason}) after "
+                  f"expanding {paths.expanded} nodes, depth {paths.depth_reached}.")
+        if paths.pruned_nodes:
+            print(f"[RMMG-QUERY] mask pruned {paths.pruned_nodes} nodes, "
+                  f"skipped {paths.pruned_edges} edges.")
         print(f"[RMMG-QUERY] Found {len(paths)} paths for custom query.")
         return paths
 
+    @profiled("query_within_cycles")
+    def query_within_cycles(
+        self,
+        source_pred: NodePred,
+        target_pred: NodePred,
+        k: int = 3,
+        max_paths: Optional[int] = 20,
+        mask: Optional[TraversalMask] = None,
+    ) -> List[List[TimedNode]]:
+        """
+        “源状态能否在 k 个周期内影响目标”：在按需展开的时间展开图上搜索
+        （时序边推进周期，组合边不推进），返回 [(node_id, cycle), ...] 路径。
+        同一组源的已展开层会被记忆化，详见 rmmg/timeexp.py。
+        """
+        src_nodes, dst_nodes = self._endpoints(source_pred, target_pred)
+        if not src_nodes or not dst_nodes:
+            return QueryResult()
+        with phase(self.profiler, "search"):
+            paths = time_expanded(self.graph, mask).paths_within(src_nodes, dst_nodes, k,
+                                                                 max_paths=max_paths)
+        print(f"[RMMG-QUERY] {len(paths)} targets reachable within {k} cycles.")
+        return QueryResult(paths)
+
+    @profiled("query_rpq")
+    def query_rpq(
+        self,
+        source_pred: NodePred,
+        target_pred: NodePred,
+        automaton: PathAutomaton,
+        max_depth: int = 50,
+        max_paths: Optional[int] = None,
+        budget: Optional[QueryBudget] = None,
+        cancel: Optional[CancelToken] = None,
+        mask: Optional[TraversalMask] = None,
+    ) -> QueryResult:
+        """
+        带形状约束的路径查询：路径（含源和 target）要被 automaton 接受，详见 rmmg/rpq.py。
+        例：MSHR meta → 至少一个寄存器 → Rob 端口，不经过 LSU：
+          engine.query_rpq(
+              engine.pred_mshr_meta(), engine.pred_rob_commit_any(),
+              PathAutomaton.waypoints([NodeLabel(NodeClass.REG)],
+                                      avoid=NodeLabel(module="*LSU*")),
+          )
+        """
+        src_nodes, dst_nodes = self._endpoints(source_pred, target_pred)
+        if not src_nodes or not dst_nodes:
+            return QueryResult()
+        prof = self.profiler
+        with phase(prof, "index"):
+            cm = compile_mask(self.graph, mask)
+        with phase(prof, "search"):
+            paths = rpq_paths_on(self.graph, automaton, src_nodes, dst_nodes,
+                                 max_depth=max_depth, max_paths=max_paths,
+                                 budget=budget, cancel=cancel, mask=cm,
+                                 profile=prof is not None)
+        if prof is not None:
+            prof.search(paths)
+        if paths.truncated:
+            print(f"[RMMG-QUERY] path query truncated ({paths.reason}) after "
+                  f"expanding {paths.expanded} product states.")
+        print(f"[RMMG-QUERY] Found {len(paths)} paths matching the automaton.")
+        return paths
+
+    @profiled("query_bits")
+    def query_bits(
+        self,
+        source_pred: NodePred,
+        target_pred: NodePred,
+        source_bits: BitsLike = None,
+        max_depth: int = 100,
+        max_paths: Optional[int] = None,
+        budget: Optional[QueryBudget] = None,
+        cancel: Optional[CancelToken] = None,
+        mask: Optional[TraversalMask] = None,
+    ) -> QueryResult:
+        """
+        位区间精确的路径查询（图需由 build_rmmg_from_design(..., bit_precise=True) 构建，
+        否则边上没有位区间，结果与 bfs_paths 相同）。source_bits 缺省为源信号的全部位。
+        到达的位集合记在返回值的 bits 属性上：{target: IntervalSet}。详见 rmmg/bits.py。
+        """
+        src_nodes, dst_nodes = self._endpoints(source_pred, target_pred)
+        if not src_nodes or not dst_nodes:
+            return QueryResult()
+        prof = self.profiler
+        with phase(prof, "index"):
+            cm = compile_mask(self.graph, mask)
+            edge_bit_table(self.graph)
+        with phase(prof, "search"):
+            reach = propagate_bits(self.graph, {s: source_bits for s in src_nodes},
+                                   max_depth=max_depth, budget=budget, cancel=cancel, mask=cm)
+        with phase(prof, "materialize"):
+            paths = reach.paths(dst_nodes, max_paths=max_paths)
+            paths.bits = {p[-1]: reach.bits[p[-1]] for p in paths}
+        if prof is not None:
+            prof.search(paths)
+        if paths.truncated:
+            print(f"[RMMG-QUERY] bit-precise query truncated ({paths.reason}) after "
+                  f"expanding {paths.expanded} nodes.")
+        print(f"[RMMG-QUERY] Found {len(paths)} bit-precise paths.")
+        return paths
+
+    # ===== 全局分析：泄漏矩阵 ===============================================
+
+    @profiled("leakage_matrix")
+    def leakage_matrix(
+        self,
+        source_pred: Optional[NodePred] = None,
+        sink_pred: Optional[NodePred] = None,
+        group_by: GroupBy = None,
+        chunk_bits: int = 4096,
+        mask: Optional[TraversalMask] = None,
+    ) -> LeakageMatrix:
+        """
+        一次性计算 源 × 汇 可达矩阵（默认 is_micro_state × is_arch_visible），
+        group_by="module" 时按 module_path 把源合并成组。详见 rmmg/taint.py。
+        mask 生效时在掩码视图（masks.masked_view，SCC 凝聚也按掩码重算）上计算，下同。
+        """
+        src_nodes, dst_nodes = self._endpoints(source_pred or self.pred_micro_state(),
+                                               sink_pred or self.pred_arch_visible())
+        print(f"[RMMG-QUERY] leakage sources: {len(src_nodes)}, sinks: {len(dst_nodes)}")
+        with phase(self.profiler, "search"):
+            mat = leakage_matrix(masked_view(self.graph, mask), src_nodes, dst_nodes,
+                                 group_by=group_by, chunk_bits=chunk_bits)
+        print(f"[RMMG-QUERY] leakage matrix {mat.shape[0]}x{mat.shape[1]}, nnz={mat.nnz}")
+        return mat
+
+    @profiled("max_flow")
+    def max_flow(
+        self,
+        source_pred: Optional[NodePred] = None,
+        sink_pred: Optional[NodePred] = None,
+        unknown_width: int = 1,
+        mask: Optional[TraversalMask] = None,
+    ) -> FlowResult:
+        """
+        位宽加权最大流 / 最小点割（默认 is_micro_state → is_arch_visible），
+        例如 engine.max_flow(engine.pred_mshr_meta(), engine.pred_rob_commit_arch())。
+        """
+        src_nodes, dst_nodes = self._endpoints(source_pred or self.pred_micro_state(),
+                                               sink_pred or self.pred_arch_visible())
+        with phase(self.profiler, "search"):
+            csr = masked_view(self.graph, mask).freeze()
+            res = max_flow_min_cut(csr, src_nodes, dst_nodes,
+                                   unknown_width=unknown_width)
+        print(f"[RMMG-QUERY] max-flow {res.value} bits, min cut {len(res.cut_nodes)} nodes")
+        return res
+
+    @profiled("path_stats")
+    def path_stats(
+        self,
+        source_pred: Optional[NodePred] = None,
+        sink_pred: Optional[NodePred] = None,
+        log_space: bool = False,
+        mask: Optional[TraversalMask] = None,
+    ) -> PathStats:
+        """
+        源 → 汇 路径计数及 fan-in / fan-out 加权分数（默认 is_micro_state → is_arch_visible），
+        在 SCC 凝聚图上一遍 DP 得到，详见 rmmg/pathcount.py。
+        """
+        src_nodes, dst_nodes = self._endpoints(source_pred or self.pred_micro_state(),
+                                               sink_pred or self.pred_arch_visible())
+        with phase(self.profiler, "search"):
+            stats = path_stats(masked_view(self.graph, mask), src_nodes, dst_nodes,
+                               log_space=log_space)
+        print(f"[RMMG-QUERY] path stats: log2(1 + total paths) = {stats.log2(stats.total):.1f}")
+        return stats
+
+    @profiled("estimate_cones")
+    def estimate_cones(self, precision: int = 6, seed: int = 0,
+                       mask: Optional[TraversalMask] = None) -> ConeEstimates:
+        """
+        所有节点的近似扇出 / 扇入锥大小（HyperLogLog，详见 rmmg/sketch.py），
+        写入 attrs["fanout_cone"] / ["fanin_cone"]（给 mask 时写的是掩码下的估计），之后可用
+        find_nodes(pred_attr_range("fanout_cone", lo=...)) 过滤。
+        """
+        est = estimate_cones(masked_view(self.graph, mask), precision=precision, seed=seed)
+        if len(est.fanout):
+            print(f"[RMMG-QUERY] cone sketches: max fan-out ~{int(est.fanout.max())}, "
+                  f"max fan-in ~{int(est.fanin.max())}")
+        return est
+
+    @profiled("centrality")
+    def centrality(
+        self,
+        method: str = "pagerank",
+        sink_pred: Optional[NodePred] = None,
+        mask: Optional[TraversalMask] = None,
+        **params,
+    ) -> CentralityResult:
+        """
+        以汇（默认 is_arch_visible）为种子的 personalized PageRank（反向边）或 Katz 影响力，
+        分数写入 attrs["pagerank"] / attrs["katz"]，详见 rmmg/centrality.py。
+        例：engine.centrality("katz", alpha=0.05); engine.rank_nodes("katz", engine.pred_micro_state())
+        """
+        prof = self.profiler
+        with phase(prof, "select"):
+            sinks = self.find_nodes(sink_pred or self.pred_arch_visible())
+        with phase(prof, "search"):
+            res = centrality(masked_view(self.graph, mask), sinks, method=method, **params)
+        state = "converged" if res.converged else "NOT converged"
+        print(f"[RMMG-QUERY] {method} from {len(sinks)} sinks: {state} after "
+              f"{res.iterations} iterations (residual {res.residual:.2e})")
+        return res
+
+    def rank_nodes(self, key: str, pred: Optional[NodePred] = None,
+                   top: Optional[int] = None) -> List[int]:
+        """按 attrs[key]（如 "pagerank" / "katz" / "fanout_cone"）降序排列满足 pred 的节点。"""
+        nodes = self.find_nodes(pred) if pred is not None else None
+        return rank_nodes(self.graph, key, nodes, top=top)
+
+    def rank_fingerprints(self, fps: List[Fingerprint],
+                          stats: Optional[PathStats] = None) -> List[Fingerprint]:
+        """
+        用路径统计给指纹打 impact：fp.path 对应 module_path（或 hier_name 前缀）下的节点，
+        取其中经过路径最多的节点的归一化分数。匹配不到节点 / 没有路径时保留原 impact。
+        返回按 impact 降序排好的列表。
+        """
+        if stats is None:
+            stats = self.path_stats()
+        by_module: Dict[str, List[int]] = defaultdict(list)
+        for nid, n in self.graph.nodes.items():
+            by_module[n.attrs.get("module_path", "")].append(nid)
+        for fp in fps:
+            nodes = by_module.get(fp.path)
+            if nodes is None:
+                nodes = self.find_nodes(self.pred_hier_startswith(fp.path + "."))
+            score = stats.impact(nodes)
+            if score is not None:
+                fp.impact = score
+        return sorted(fps, key=lambda fp: fp.impact, reverse=True)
+
+    @profiled("common_dominators")
+    def common_dominators(self, sources: Iterable[int], sink: int,
+                          mask: Optional[TraversalMask] = None) -> List[int]:
+        """sources → sink 的所有路径都必须经过的节点（支配树，按源到汇排列）。"""
+        return common_dominators(masked_view(self.graph, mask), sources, sink)
+
+    @profiled("common_post_dominators")
+    def common_post_dominators(self, source: int, sinks: Iterable[int],
+                               mask: Optional[TraversalMask] = None) -> List[int]:
+        """source → 任一 sink 的所有路径都必须经过的节点（后支配树）。"""
+        return common_post_dominators(masked_view(self.graph, mask), source, sinks)
+
+    @profiled("choke_points")
+    def choke_points(
+        self,
+        source_pred: Optional[NodePred] = None,
+        sink_pred: Optional[NodePred] = None,
+        mask: Optional[TraversalMask] = None,
+    ) -> Dict[int, List[int]]:
+        """
+        对每个可达的汇节点（默认 is_arch_visible）给出来自源集合（默认 is_micro_state）的
+        choke point 列表；支配树只算一次，按汇逐个沿 idom 链读出。
+        可达但没有 choke point（多条互不相交的路径）的汇对应空列表，不可达的汇不出现。
+        """
+        src_nodes, dst_nodes = self._endpoints(source_pred or self.pred_micro_state(),
+                                               sink_pred or self.pred_arch_visible())
+        src_nodes = set(src_nodes)
+        tree = dominator_tree(masked_view(self.graph, mask), src_nodes)
+        out: Dict[int, List[int]] = {}
+        for t in dst_nodes:
+            if tree.reachable(t):
+                out[t] = tree.dominators(t)[:0:-1]
+        return out
+
+
+def _search_memory(queued_cells: int, queue_len: int, visited: int) -> int:
+    """估算 BFS 状态占用：队列里每个 (node, path) 元组 + path 列表，visited 集合。"""
+    return queued_cells * 8 + queue_len * 120 + visited * 60
+
+
+def bfs_paths_on(
+    adj,
+    sources: Iterable[int],
+    targets: Iterable[int],
+    max_depth: int = 50,
+    max_paths: Optional[int] = None,
+    budget: Optional[QueryBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    profile: bool = False,
+) -> QueryResult:
+    """
+    RmmgQueryEngine.bfs_paths 的核心实现，adj 只要支持 adj.get(u, default)，
+    既可以是 dict 邻接表，也可以是 CsrGraph（包括共享内存上的 CsrGraph）。
+    budget / cancel 生效时，每扩展 check_every 个节点检查一次，超限即返回部分结果。
+    profile=True 时额外统计扫描边数和峰值队列长度。
+    """
+    sources = list(sources)
+    target_set = set(targets)
+    found_paths = QueryResult()
+    meter = BudgetMeter(budget, cancel)
+    checking = meter.active
+    check_every = meter.check_every
+    max_expanded = meter.budget.max_expanded
+    reason = None
+    expanded = 0
+    depth_reached = 0
+    frontier_left = 0
+    scanned = peak = 0
+
+    # 初始化队列
+    q = deque()
+    for s in sources:
+        q.append((s, [s]))
+    queued_cells = len(sources)  # 队列中所有 path 的元素总数，用于内存估算
+
+    visited = set(sources)
+
+    while q:
+        cur, path = q.popleft()
+        queued_cells -= len(path)
+        if max_paths is not None and len(found_paths) >= max_paths:
+            break
+
+        if len(path) > max_depth:
+            continue
+        if len(path) > depth_reached:
+            depth_reached = len(path)
+
+        if cur in target_set:
+            found_paths.append(path)
+            # 如果只关心最短距离，可以在这里不扩展该节点
+            # continue
+            # 这里选择仍然允许找到其它源→该目标的路径
+            continue
+
+        if checking and (expanded % check_every == 0 or expanded == max_expanded):
+            reason = meter.exceeded(
+                expanded, _search_memory(queued_cells, len(q), len(visited)))
+            if reason is not None:
+                frontier_left = len(q) + 1
+                break
+        expanded += 1
+
+        nbrs = adj.get(cur, [])
+        if profile:
+            scanned += len(nbrs)
+            if len(q) > peak:
+                peak = len(q)
+        for nxt in nbrs:
+            if nxt not in visited:
+                visited.add(nxt)
+                q.append((nxt, path + [nxt]))
+                queued_cells += len(path) + 1
+
+    found_paths.truncated = reason is not None
+    found_paths.reason = reason
+    found_paths.expanded = expanded
+    found_paths.depth_reached = depth_reached
+    found_paths.frontier_left = frontier_left
+    found_paths.elapsed_s = meter.elapsed()
+    found_paths.edges_scanned = scanned
+    found_paths.peak_frontier = peak
+    return found_paths
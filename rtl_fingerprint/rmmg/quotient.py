@@ -0,0 +1,137 @@
+# rtl_fingerprint/rmmg/quotient.py
+
+"""
+模块级商图（quotient graph）+ 由粗到细的两阶段搜索：
+  - 每个 module 实例（module_path）一个节点，跨模块边按 (src 模块, dst 模块) 聚合，
+    直接复用 ModuleStats 的连接矩阵（边数 / 位宽和）
+  - 第一阶段：在商图上从源模块正向 BFS、从汇模块反向 BFS，
+    d_fwd(m) + d_bwd(m) <= max_hops 的模块才可能出现在某条够短的泄漏路径上
+  - 第二阶段：节点级搜索只允许进入这些模块的节点（用一个节点掩码实现，不复制图）
+每跨一次模块至少要走一条边，所以模块跳数不超过节点路径长度，剪枝不会丢路径。
+"""
+
+from __future__ import annotations
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+from .graph import RmmgGraph
+from .stats import module_stats
+
+
+class QuotientGraph:
+    def __init__(self, modules: List[str], node_module: array,
+                 indptr: array, indices: array, rindptr: array, rindices: array,
+                 edge_count: array, edge_bits: array):
+        self.modules = modules                      # 模块 ID -> module_path
+        self.index = {m: i for i, m in enumerate(modules)}
+        self.node_module = node_module              # 节点 ID -> 模块 ID
+        self.indptr = indptr                        # 模块级正向 CSR
+        self.indices = indices
+        self.rindptr = rindptr                      # 模块级反向 CSR
+        self.rindices = rindices
+        self.edge_count = edge_count                # 正向 slot -> 聚合的边数
+        self.edge_bits = edge_bits                  # 正向 slot -> 聚合的位宽和
+
+    @property
+    def num_modules(self) -> int:
+        return len(self.modules)
+
+    @classmethod
+    def from_graph(cls, g: RmmgGraph) -> "QuotientGraph":
+        st = module_stats(g)
+        modules = list(st.modules)
+        index = {m: i for i, m in enumerate(modules)}
+        node_module = array("i", [0]) * len(g.nodes)
+        for nid, n in g.nodes.items():
+            mod = n.attrs.get("module_path")
+            if mod is None:
+                mod = n.hier_name.rpartition(".")[0]
+            node_module[nid] = index[mod]
+
+        m = len(modules)
+        cells = sorted(((index[s], index[d]), c) for (s, d), c in st.matrix.items())
+        indptr = array("q", [0]) * (m + 1)
+        for (s, _), _ in cells:
+            indptr[s + 1] += 1
+        for i in range(m):
+            indptr[i + 1] += indptr[i]
+        indices = array("i", (d for (_, d), _ in cells))
+        edge_count = array("q", (c[0] for _, c in cells))
+        edge_bits = array("q", (c[1] for _, c in cells))
+
+        rcells = sorted((d, s) for (s, d), _ in cells)
+        rindptr = array("q", [0]) * (m + 1)
+        for d, _ in rcells:
+            rindptr[d + 1] += 1
+        for i in range(m):
+            rindptr[i + 1] += rindptr[i]
+        rindices = array("i", (s for _, s in rcells))
+        return cls(modules, node_module, indptr, indices, rindptr, rindices,
+                   edge_count, edge_bits)
+
+    def modules_of(self, nodes: Iterable[int]) -> Set[int]:
+        return {self.node_module[v] for v in nodes}
+
+    def successors(self, mod: int) -> List[int]:
+        return list(self.indices[self.indptr[mod]:self.indptr[mod + 1]])
+
+    def _distances(self, seeds: Iterable[int], forward: bool) -> array:
+        ptr, idx = (self.indptr, self.indices) if forward else (self.rindptr, self.rindices)
+        dist = array("i", [-1]) * self.num_modules
+        q = deque()
+        for s in seeds:
+            if dist[s] < 0:
+                dist[s] = 0
+                q.append(s)
+        while q:
+            u = q.popleft()
+            for j in range(ptr[u], ptr[u + 1]):
+                v = idx[j]
+                if dist[v] < 0:
+                    dist[v] = dist[u] + 1
+                    q.append(v)
+        return dist
+
+    def route_modules(self, src_modules: Iterable[int], dst_modules: Iterable[int],
+                      max_hops: Optional[int] = None) -> Set[int]:
+        """源模块到汇模块、模块跳数 <= max_hops 的路线上出现的所有模块。"""
+        fwd = self._distances(src_modules, forward=True)
+        bwd = self._distances(dst_modules, forward=False)
+        out = set()
+        for m in range(self.num_modules):
+            if fwd[m] < 0 or bwd[m] < 0:
+                continue
+            if max_hops is None or fwd[m] + bwd[m] <= max_hops:
+                out.add(m)
+        return out
+
+    def module_route(self, src_modules: Iterable[int], dst_module: int) -> List[str]:
+        """一条模块跳数最少的路线（module_path 列表），不可达返回 []。"""
+        src_modules = set(src_modules)
+        parent: Dict[int, int] = {s: -1 for s in src_modules}
+        q = deque(src_modules)
+        while q:
+            u = q.popleft()
+            if u == dst_module:
+                route = [u]
+                while parent[route[-1]] >= 0:
+                    route.append(parent[route[-1]])
+                return [self.modules[m] for m in reversed(route)]
+            for v in self.successors(u):
+                if v not in parent:
+                    parent[v] = u
+                    q.append(v)
+        return []
+
+    def node_filter(self, modules: Set[int]) -> bytearray:
+        """节点 ID -> 是否属于给定模块集合（0/1 表）。"""
+        keep = bytearray(self.num_modules)
+        for m in modules:
+            keep[m] = 1
+        return bytearray(keep[m] for m in self.node_module)
+
+
+def quotient_graph(g: RmmgGraph) -> QuotientGraph:
+    """缓存在图上的模块级商图；图结构变化后自动重建。"""
+    return g.cached("quotient", lambda: QuotientGraph.from_graph(g), attrs=True)
@@ -0,0 +1,243 @@
+# rtl_fingerprint/rmmg/rpq.py
+
+"""
+正则路径查询（regular path query）：路径必须满足某个“形状”，例如
+“从 MSHR meta 出发，至少经过一个寄存器，进入 Rob 端口，全程不经过 LSU”。
+  - 标签：节点用 NodeLabel（NodeClass 位 / module_path glob / hier_name glob，可取反），
+    边用 EdgeClass 位（SEQ / COMB / ADDR / PORT ...），都复用 masks.graph_classes 的预计算
+  - PathAutomaton 是标签上的 NFA：按顺序读路径上的每个节点（连同进入它的那条边），
+    源节点也要被读一次（源没有入边，带边条件的转移不能匹配源）
+  - 搜索在 (节点, 自动机状态) 的乘积图上做 BFS：途经点 / 回避集合在扩展时判定，
+    不会先枚举路径再过滤
+结果语义与 bfs_paths 一致：每个 target 一条最短的合法路径，按长度非降序；
+以接受状态到达的 target 不再向外扩展。
+"""
+
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from .budget import BudgetMeter, CancelToken, QueryBudget, QueryResult
+from .masks import CompiledMask, EdgeClass, NodeClass, graph_classes
+
+
+@dataclass(frozen=True)
+class NodeLabel:
+    classes: NodeClass = NodeClass(0)   # 命中任一位（0 = 不限）
+    module: Optional[str] = None        # module_path 的 fnmatch glob
+    name: Optional[str] = None          # hier_name 的 fnmatch glob
+    negate: bool = False
+
+    def __invert__(self) -> "NodeLabel":
+        return NodeLabel(self.classes, self.module, self.name, not self.negate)
+
+    def table(self, g) -> bytearray:
+        """
+        节点 ID -> 是否匹配（0/1 表），按标签缓存在图上（"label_tables"），
+        依赖节点类别，invalidate_attrs() 后重建。
+        """
+        tables: Dict[NodeLabel, bytearray] = g.cached("label_tables", dict, attrs=True)
+        tab = tables.get(self)
+        if tab is None:
+            tab = tables[self] = self._compute(g)
+        return tab
+
+    def _compute(self, g) -> bytearray:
+        ncls = graph_classes(g).node_class
+        out = bytearray(len(g.nodes))
+        module_ok: Dict[str, bool] = {}       # 同一模块的节点只 fnmatch 一次
+        for v in range(len(g.nodes)):
+            nd = g.nodes[v]
+            ok = not self.classes or bool(ncls[v] & self.classes)
+            if ok and self.module is not None:
+                mod = nd.attrs.get("module_path") or nd.hier_name.rpartition(".")[0]
+                ok = module_ok.get(mod)
+                if ok is None:
+                    ok = module_ok[mod] = fnmatchcase(mod, self.module)
+            if ok and self.name is not None:
+                ok = fnmatchcase(nd.hier_name, self.name)
+            out[v] = ok != self.negate
+        return out
+
+
+@dataclass(frozen=True)
+class Step:
+    """一次转移的条件：进入的节点满足 node，且进入它的边命中 edge 的任一位（0 = 不限）。"""
+    node: Optional[NodeLabel] = None
+    edge: EdgeClass = EdgeClass(0)
+
+
+StepLike = Union[Step, NodeLabel, EdgeClass]
+
+
+def _as_step(s: StepLike) -> Step:
+    if isinstance(s, Step):
+        return s
+    if isinstance(s, NodeLabel):
+        return Step(node=s)
+    return Step(edge=EdgeClass(s))
+
+
+class PathAutomaton:
+    def __init__(self, num_states: int, start: int = 0,
+                 accept: Iterable[int] = (), avoid: Optional[NodeLabel] = None):
+        self.num_states = num_states
+        self.start = start
+        self.accept = frozenset(accept)
+        self.avoid = avoid                  # 路径上任何节点（含源和 target）都不得匹配
+        self.transitions: List[List[Tuple[Step, int]]] = [[] for _ in range(num_states)]
+
+    def add(self, q: int, q2: int, step: StepLike = Step()) -> "PathAutomaton":
+        self.transitions[q].append((_as_step(step), q2))
+        return self
+
+    @classmethod
+    def waypoints(cls, waypoints: Sequence[StepLike] = (),
+                  avoid: Optional[NodeLabel] = None) -> "PathAutomaton":
+        """
+        依次经过每个途经点（节点标签或边标签）的路径，途经点之间可以有任意节点；
+        途经点可以就是源 / target 本身。例：
+          PathAutomaton.waypoints([NodeLabel(NodeClass.REG)], avoid=NodeLabel(module="*LSU*"))
+        """
+        k = len(waypoints)
+        auto = cls(k + 1, start=0, accept=[k], avoid=avoid)
+        for i, wp in enumerate(waypoints):
+            auto.add(i, i)
+            auto.add(i, i + 1, wp)
+        auto.add(k, k)
+        return auto
+
+
+class _Compiled:
+    """自动机的标签按图展开成 0/1 表；转移按状态存成 (节点表或 None, 边位, 目标状态)。"""
+
+    def __init__(self, g, auto: PathAutomaton):
+        def _table(label):
+            return None if label is None else label.table(g)
+
+        self.avoid = _table(auto.avoid)
+        self.trans = [[(_table(s.node), int(s.edge), q2) for s, q2 in row]
+                      for row in auto.transitions]
+        self.edge_class = graph_classes(g).edge_class
+
+    def initial(self, start: int, v: int) -> Set[int]:
+        return {q2 for tab, ebits, q2 in self.trans[start]
+                if not ebits and (tab is None or tab[v])}
+
+
+def rpq_paths_on(
+    g,
+    auto: PathAutomaton,
+    sources: Iterable[int],
+    targets: Iterable[int],
+    max_depth: int = 50,
+    max_paths: Optional[int] = None,
+    budget: Optional[QueryBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    mask: Optional[CompiledMask] = None,
+    profile: bool = False,
+) -> QueryResult:
+    """乘积图 BFS。max_depth 限制路径节点数；mask 的含义与 bfs_paths 相同。"""
+    csr = g.freeze()
+    comp = _Compiled(g, auto)
+    indptr, indices, pos = csr.indptr, csr.indices, csr.edge_pos
+    ecls, avoid, trans = comp.edge_class, comp.avoid, comp.trans
+    target_set = set(targets)
+    accept = auto.accept
+    S = auto.num_states
+
+    found = QueryResult()
+    meter = BudgetMeter(budget, cancel)
+    checking = meter.active
+    check_every = meter.check_every
+    max_expanded = meter.budget.max_expanded
+    reason = None
+    expanded = 0
+    depth_reached = 0
+
+    parent: Dict[int, int] = {}         # 乘积状态 v * S + q -> 父状态，源为 -1
+    hit: Set[int] = set()
+    q = deque()
+    for s in sorted(set(sources)):
+        if avoid is not None and avoid[s]:
+            continue
+        for st in sorted(comp.initial(auto.start, s)):
+            key = s * S + st
+            if key not in parent:
+                parent[key] = -1
+                q.append((key, 1))
+    pruned: Set[int] = set()
+    skipped_slots = 0
+    scanned = peak = 0
+
+    def _path(key: int) -> List[int]:
+        path = []
+        while key >= 0:
+            path.append(key // S)
+            key = parent[key]
+        path.reverse()
+        return path
+
+    while q:
+        if max_paths is not None and len(found) >= max_paths:
+            break
+        key, depth = q.popleft()
+        u, st = divmod(key, S)
+        if depth > depth_reached:
+            depth_reached = depth
+
+        if st in accept and u in target_set:
+            if u not in hit:
+                hit.add(u)
+                found.append(_path(key))
+            continue
+        if depth >= max_depth:
+            continue
+
+        if checking and (expanded % check_every == 0 or expanded == max_expanded):
+            reason = meter.exceeded(expanded, len(q) * 80 + len(parent) * 120)
+            if reason is not None:
+                break
+        expanded += 1
+
+        if mask is not None and not mask.expand_ok[u]:
+            pruned.add(u)
+            continue
+        row = trans[st]
+        if profile:
+            scanned += indptr[u + 1] - indptr[u]
+            if len(q) > peak:
+                peak = len(q)
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            if mask is not None:
+                if not mask.slot_ok[j]:
+                    skipped_slots += 1
+                    continue
+                if not mask.node_ok[v]:
+                    pruned.add(v)
+                    continue
+            if avoid is not None and avoid[v]:
+                continue
+            ec = ecls[pos[j]]
+            for tab, ebits, st2 in row:
+                if (ebits and not ec & ebits) or (tab is not None and not tab[v]):
+                    continue
+                nkey = v * S + st2
+                if nkey not in parent:
+                    parent[nkey] = key
+                    q.append((nkey, depth + 1))
+
+    found.truncated = reason is not None
+    found.reason = reason
+    found.expanded = expanded
+    found.depth_reached = depth_reached
+    found.frontier_left = len(q) + 1 if reason is not None else 0
+    found.elapsed_s = meter.elapsed()
+    found.pruned_nodes = len(pruned)
+    found.pruned_edges = skipped_slots + sum(indptr[v + 1] - indptr[v] for v in pruned)
+    found.edges_scanned = scanned
+    found.peak_frontier = peak
+    return found
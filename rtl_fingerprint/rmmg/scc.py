@@ -0,0 +1,139 @@
+# rtl_fingerprint/rmmg/scc.py
+
+"""
+强连通分量 + 凝聚图（condensation DAG）：
+  - 迭代版 Tarjan，直接跑在 CsrGraph 数组上（不会爆 Python 递归栈）
+  - 分量编号按拓扑序：边 u->v 跨分量时 comp[u] < comp[v]
+很多全局分析（taint 传播、路径计数、锥大小估计）都在 DAG 上按拓扑序做一遍 DP。
+"""
+
+from __future__ import annotations
+from array import array
+from typing import List, Sequence
+
+from .csr import CsrGraph
+
+
+class Condensation:
+    def __init__(self, comp: array, num_comps: int,
+                 member_ptr: array, members: array,
+                 dag_indptr: array, dag_indices: array, self_loop: bytearray):
+        self.comp = comp                # node -> 分量 ID（拓扑序）
+        self.num_comps = num_comps
+        self.member_ptr = member_ptr    # 分量 -> 成员节点（CSR）
+        self.members = members
+        self.dag_indptr = dag_indptr    # 分量 DAG 的后继（已去重）
+        self.dag_indices = dag_indices
+        self.self_loop = self_loop      # 分量内是否有单节点自环
+
+    def comp_members(self, c: int) -> Sequence[int]:
+        return self.members[self.member_ptr[c]:self.member_ptr[c + 1]]
+
+    def comp_successors(self, c: int) -> Sequence[int]:
+        return self.dag_indices[self.dag_indptr[c]:self.dag_indptr[c + 1]]
+
+    def comp_size(self, c: int) -> int:
+        return self.member_ptr[c + 1] - self.member_ptr[c]
+
+    def is_cyclic(self, c: int) -> bool:
+        """分量里有环（多个节点，或单节点自环）。"""
+        return self.comp_size(c) > 1 or bool(self.self_loop[c])
+
+
+def _tarjan(csr: CsrGraph) -> List[int]:
+    """返回 Tarjan 分量编号（逆拓扑序：先完成的分量编号小）。"""
+    n = csr.num_nodes
+    indptr, indices = csr.indptr, csr.indices
+    index = [-1] * n
+    low = [0] * n
+    onstack = bytearray(n)
+    comp = [-1] * n
+    stack: List[int] = []
+    counter = 0
+    ncomp = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        onstack[root] = 1
+        work = [[root, indptr[root]]]
+        while work:
+            frame = work[-1]
+            v, pos = frame
+            if pos < indptr[v + 1]:
+                frame[1] = pos + 1
+                w = indices[pos]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    onstack[w] = 1
+                    work.append([w, indptr[w]])
+                elif onstack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+
+            work.pop()
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    onstack[w] = 0
+                    comp[w] = ncomp
+                    if w == v:
+                        break
+                ncomp += 1
+    return comp
+
+
+def condense(csr: CsrGraph) -> Condensation:
+    n = csr.num_nodes
+    raw = _tarjan(csr)
+    ncomp = (max(raw) + 1) if n else 0
+    # Tarjan 先输出汇点分量，翻转后即为拓扑序
+    comp = array("i", [ncomp - 1 - c for c in raw])
+
+    member_ptr = array("q", [0]) * (ncomp + 1)
+    for c in comp:
+        member_ptr[c + 1] += 1
+    for c in range(ncomp):
+        member_ptr[c + 1] += member_ptr[c]
+    fill = array("q", member_ptr[:ncomp])
+    members = array("i", [0]) * n
+    for v in range(n):
+        c = comp[v]
+        members[fill[c]] = v
+        fill[c] += 1
+
+    indptr, indices = csr.indptr, csr.indices
+    self_loop = bytearray(ncomp)
+    dag_indptr = array("q", [0])
+    dag_indices = array("i")
+    for c in range(ncomp):
+        seen = set()
+        for v in members[member_ptr[c]:member_ptr[c + 1]]:
+            for j in range(indptr[v], indptr[v + 1]):
+                d = comp[indices[j]]
+                if d == c:
+                    if indices[j] == v:
+                        self_loop[c] = 1
+                    continue
+                if d not in seen:
+                    seen.add(d)
+                    dag_indices.append(d)
+        dag_indptr.append(len(dag_indices))
+
+    return Condensation(comp, ncomp, member_ptr, members, dag_indptr, dag_indices, self_loop)
+
+
+def condensation(g) -> Condensation:
+    """RmmgGraph 上缓存的凝聚图；传 CsrGraph 则现算。"""
+    if isinstance(g, CsrGraph):
+        return condense(g)
+    return g.cached("scc", lambda: condense(g.freeze()))
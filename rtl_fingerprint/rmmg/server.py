@@ -0,0 +1,337 @@
+# rtl_fingerprint/rmmg/server.py
+
+"""
+常驻 RMMG 查询服务：
+  - 启动时加载（或构建）一次 RmmgGraph，并预热 RmmgQueryEngine 的邻接表
+  - asyncio 前端，监听本地 Unix socket 或 localhost TCP
+  - 协议：每行一个 JSON 请求 / 每行一个 JSON 响应；
+    TCP 端口同时接受最简 HTTP（POST / 带 JSON body，GET /stats）
+  - 查询只读，放到线程池里执行，多个客户端可以并发连接
+  - 每类请求记录延迟统计（count / mean / p50 / p95 / max）
+
+启动：
+  python -m rtl_fingerprint.rmmg.server -g RmmgGraph.json --socket /tmp/rmmg.sock
+  python -m rtl_fingerprint.rmmg.server -c rtl_fingerprint/config_width_demo.yml --port 8765
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .budget import QueryBudget
+from .graph import RmmgGraph
+from .query import RmmgQueryEngine
+
+
+class LatencyStats:
+    """单类请求的延迟统计，分位数基于最近 window 次请求。"""
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, ok: bool = True) -> None:
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent.append(elapsed_ms)
+
+    def _percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        data = sorted(self.recent)
+        idx = min(len(data) - 1, int(round(q * (len(data) - 1))))
+        return data[idx]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self._percentile(0.50),
+            "p95_ms": self._percentile(0.95),
+            "max_ms": self.max_ms,
+        }
+
+
+class RmmgQueryServer:
+    """
+    把一张常驻内存的 RmmgGraph 通过 socket 暴露出去。
+    支持的 op：
+      - ping
+      - stats                              : 图规模 + 每类请求的延迟统计
+      - find   {pred, limit}               : 按谓词规则找节点
+      - node   {ids | names}               : 查节点详情
+      - query  {source, target, max_depth, max_paths,
+                [deadline_s, max_expanded, max_memory_bytes]}
+    谓词规则格式见 RmmgQueryEngine.pred_from_spec。
+    """
+
+    def __init__(self, graph: RmmgGraph, max_workers: int = 4):
+        self.graph = graph
+        self.engine = RmmgQueryEngine(graph)
+        self.engine.build_adj_list()  # 预热：之后的查询都只读
+        self.metrics: Dict[str, LatencyStats] = {}
+        self._metrics_lock = threading.Lock()   # handle_request 在多个线程池线程里并发执行
+        self.started_at = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._ops: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "ping": self._op_ping,
+            "stats": self._op_stats,
+            "find": self._op_find,
+            "node": self._op_node,
+            "query": self._op_query,
+        }
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # ===== 请求分发 =========================================================
+
+    def handle_request(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        """同步处理一个请求（线程池里执行），返回响应 dict。"""
+        t0 = time.perf_counter()
+        op: Any = ""
+        resp: Dict[str, Any] = {}
+        try:
+            if not isinstance(req, dict):
+                raise ValueError("request must be an object")
+            op = req.get("op", "")
+            resp.update(id=req.get("id"), op=op)
+            fn = self._ops.get(op) if isinstance(op, str) else None
+            if fn is None:
+                raise ValueError(f"unknown op: {op!r}")
+            resp["result"] = fn(req)
+            resp["ok"] = True
+        except Exception as exc:  # 错误回给客户端，服务不退出
+            resp["ok"] = False
+            resp["error"] = f"{type(exc).__name__}: {exc}"
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        resp["elapsed_ms"] = elapsed_ms
+        with self._metrics_lock:
+            key = op if isinstance(op, str) and op else "?"
+            self.metrics.setdefault(key, LatencyStats()).record(elapsed_ms, resp["ok"])
+        return resp
+
+    def _node_info(self, nid: int) -> Dict[str, Any]:
+        n = self.graph.nodes[nid]
+        return {"id": nid, "name": n.hier_name, "kind": n.kind,
+                "width": n.width, "attrs": n.attrs}
+
+    def _op_ping(self, req: Dict[str, Any]) -> Any:
+        return "pong"
+
+    def _op_stats(self, req: Dict[str, Any]) -> Any:
+        with self._metrics_lock:
+            latency = {op: st.to_dict() for op, st in self.metrics.items()}
+        return {
+            "nodes": len(self.graph.nodes),
+            "edges": len(self.graph.edges),
+            "uptime_s": time.time() - self.started_at,
+            "latency": latency,
+        }
+
+    def _op_find(self, req: Dict[str, Any]) -> Any:
+        pred = RmmgQueryEngine.pred_from_spec(req["pred"])
+        ids = self.engine.find_nodes(pred)
+        limit = req.get("limit")
+        if limit is not None:
+            ids = ids[:int(limit)]
+        return [self._node_info(nid) for nid in ids]
+
+    def _op_node(self, req: Dict[str, Any]) -> Any:
+        ids = list(req.get("ids", []))
+        for name in req.get("names", []):
+            nid = self.graph.get_node_id(name)
+            if nid is not None:
+                ids.append(nid)
+        return [self._node_info(int(nid)) for nid in ids if int(nid) in self.graph.nodes]
+
+    def _op_query(self, req: Dict[str, Any]) -> Any:
+        src = self.engine.find_nodes(RmmgQueryEngine.pred_from_spec(req["source"]))
+        dst = self.engine.find_nodes(RmmgQueryEngine.pred_from_spec(req["target"]))
+        budget = QueryBudget(
+            deadline_s=req.get("deadline_s"),
+            max_expanded=req.get("max_expanded"),
+            max_memory_bytes=req.get("max_memory_bytes"),
+        )
+        paths: List[List[int]] = []
+        truncated, reason = False, None
+        if src and dst:
+            paths = self.engine.bfs_paths(
+                src, dst,
+                max_depth=int(req.get("max_depth", 50)),
+                max_paths=req.get("max_paths"),
+                budget=budget,
+            )
+            truncated, reason = paths.truncated, paths.reason
+        used = sorted({nid for p in paths for nid in p})
+        return {
+            "num_sources": len(src),
+            "num_targets": len(dst),
+            "truncated": truncated,
+            "reason": reason,
+            "paths": list(paths),
+            "nodes": {str(nid): self._node_info(nid) for nid in used},
+        }
+
+    # ===== asyncio 前端 =====================================================
+
+    @staticmethod
+    def _parse_request(raw: bytes) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """解析一条 JSON 请求，返回 (req, None) 或 (None, 错误响应)。"""
+        try:
+            req = json.loads(raw)
+        except ValueError as exc:           # JSONDecodeError / 非 UTF-8
+            return None, {"ok": False, "error": f"bad json: {exc}"}
+        if not isinstance(req, dict):
+            return None, {"ok": False, "error": "bad json: request must be an object"}
+        return req, None
+
+    async def _dispatch(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.handle_request, req)
+
+    async def _handle_conn(self, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> None:
+        try:
+            first = await reader.readline()
+            if first.startswith((b"GET ", b"POST ")):
+                await self._handle_http(first, reader, writer)
+                return
+            line = first
+            while line:
+                line = line.strip()
+                if line:
+                    req, resp = self._parse_request(line)
+                    if req is not None:
+                        resp = await self._dispatch(req)
+                    writer.write(json.dumps(resp, default=str).encode() + b"\n")
+                    await writer.drain()
+                line = await reader.readline()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_http(self, request_line: bytes, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, body = await self._read_http(request_line, reader)
+        except (ValueError, asyncio.IncompleteReadError) as exc:
+            resp: Dict[str, Any] = {"ok": False, "error": f"bad request: {exc}"}
+        else:
+            if method == "GET":
+                resp = await self._dispatch({"op": path.strip("/") or "stats"})
+            else:
+                req, resp = self._parse_request(body or b"{}")
+                if req is not None:
+                    resp = await self._dispatch(req)
+        payload = json.dumps(resp, default=str).encode()
+        status = "200 OK" if resp.get("ok") else "400 Bad Request"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+            + payload
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def _read_http(request_line: bytes,
+                         reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        """读请求行、头和 body；格式不对抛 ValueError，body 不足抛 IncompleteReadError。"""
+        parts = request_line.decode("latin-1").split()
+        if len(parts) < 2:
+            raise ValueError(f"malformed request line {request_line!r}")
+        method, path = parts[:2]
+        length = 0
+        while True:
+            hdr = await reader.readline()
+            if hdr in (b"\r\n", b"\n", b""):
+                break
+            key, _, val = hdr.decode("latin-1").partition(":")
+            if key.strip().lower() == "content-length":
+                if not val.strip().isdigit():
+                    raise ValueError(f"bad Content-Length {val.strip()!r}")
+                length = int(val.strip())
+        body = await reader.readexactly(length) if length else b""
+        return method, path, body
+
+    async def start(self, socket_path: Optional[str] = None,
+                    host: str = "127.0.0.1", port: Optional[int] = None) -> None:
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self._server = await asyncio.start_unix_server(self._handle_conn, path=socket_path)
+            print(f"[RMMG-SERVER] listening on unix:{socket_path}")
+        else:
+            self._server = await asyncio.start_server(self._handle_conn, host=host, port=port or 0)
+            bound = self._server.sockets[0].getsockname()
+            print(f"[RMMG-SERVER] listening on {bound[0]}:{bound[1]}")
+
+    @property
+    def address(self) -> Any:
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self, **kwargs) -> None:
+        await self.start(**kwargs)
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        self._executor.shutdown(wait=False)
+
+
+def _load_graph(args) -> RmmgGraph:
+    if args.graph:
+        g = RmmgGraph.load_json(args.graph)
+    else:
+        from ..config import load_config
+        from ..frontend import UHDMFrontend
+        fe = UHDMFrontend(load_config(args.config))
+        fe.build_rmmg()
+        g = fe.graph
+        if args.save_graph:
+            g.save_json(args.save_graph)
+    print("[RMMG-SERVER]", g.summary())
+    return g
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RMMG query server")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("-g", "--graph", help="RmmgGraph JSON (RmmgGraph.save_json)")
+    src.add_argument("-c", "--config", help="YAML config, build graph via UHDM frontend")
+    parser.add_argument("--save-graph", help="Save the built graph as JSON for later reuse")
+    parser.add_argument("--socket", help="Unix socket path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    server = RmmgQueryServer(_load_graph(args), max_workers=args.workers)
+    try:
+        asyncio.run(server.serve_forever(socket_path=args.socket, host=args.host, port=args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+# rtl_fingerprint/rmmg/shard.py
+
+"""
+按模块层次分片的多进程图 + 分布式 BFS 协调器（一台机器上多个本地 worker 即可运行）：
+  - partition_by_module: 以 module_path 的前 level 段为不可拆分的单元，
+    按节点数从大到小贪心放进当前最轻的分片（同一子树留在同一分片里，边界边尽量少）
+  - ShardData: 一个分片只含自己的节点（连同 attrs，谓词在 worker 里求值）、
+    这些节点的全部出边（目的节点的全局 ID）以及每条出边目的节点所在的分片号；
+    跨分片的出边就是边界边
+  - write_shards 把分片写到目录里（manifest.json + 每片一个节点 JSONL 和一个 CSR 二进制文件），
+    每个 worker 进程只加载自己那一片；整图只在写分片的那一步出现一次
+  - 分布式 BFS 按轮进行：worker 收下边界消息 (节点, 距离, 父节点, 父分片)，
+    在分片内用按距离出队的堆把能走的都走完（limit 以内、本地去重），
+    只把跨分片的出边变成消息交给协调器转发；距离变小的节点会被重新扩展（label-correcting），
+    所以轮数约等于路径跨分片的次数，而不是 BFS 层数，结果仍是精确的最短距离
+  - 路径还原：父指针留在各自分片里，协调器从 target 出发逐段回溯，
+    每跨一次分片一个往返
+协调器只持有 manifest 和每轮在途的边界消息，不持有节点表或邻接数据。
+"""
+
+from __future__ import annotations
+import heapq
+import json
+import multiprocessing
+import os
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .graph import RmmgGraph, RmmgNode
+from .query import NodePred, RmmgQueryEngine
+
+Message = Tuple[int, int, int, int]   # (节点全局 ID, 距离, 父节点全局 ID, 父节点分片)；源的父节点为 -1
+PredLike = Union[NodePred, dict, list]
+
+MANIFEST = "manifest.json"
+
+
+# ===== 分片 ==================================================================
+
+def _unit_of(node, level: Optional[int]) -> str:
+    mod = node.attrs.get("module_path") or node.hier_name.rpartition(".")[0]
+    if level is None:
+        return mod
+    return ".".join(mod.split(".")[:level])
+
+
+def partition_by_module(g: RmmgGraph, num_shards: int,
+                        level: Optional[int] = None) -> List[List[int]]:
+    """分片 -> 节点 ID 列表（升序）。level=None 时以完整 module_path 为单元。"""
+    if num_shards < 1:
+        raise ValueError("num_shards must be >= 1")
+    units: Dict[str, List[int]] = defaultdict(list)
+    for nid in sorted(g.nodes):
+        units[_unit_of(g.nodes[nid], level)].append(nid)
+    shards: List[List[int]] = [[] for _ in range(num_shards)]
+    load = [0] * num_shards
+    for name in sorted(units, key=lambda u: (-len(units[u]), u)):
+        s = min(range(num_shards), key=lambda i: (load[i], i))
+        shards[s].extend(units[name])
+        load[s] += len(units[name])
+    for nodes in shards:
+        nodes.sort()
+    return shards
+
+
+@dataclass
+class ShardData:
+    index: int
+    nodes: array            # 本分片节点的全局 ID（升序）
+    indptr: array           # 本地 CSR：本地下标 -> 出边 slot 区间
+    indices: array          # slot -> 目的节点全局 ID
+    dst_shard: array        # slot -> 目的节点所在分片
+    meta: List[RmmgNode] = field(default_factory=list)   # 与 nodes 对齐的节点（含 attrs）
+
+    @property
+    def num_boundary_edges(self) -> int:
+        return sum(1 for s in self.dst_shard if s != self.index)
+
+    @classmethod
+    def build(cls, g: RmmgGraph, index: int, nodes: Sequence[int],
+              owner: Sequence[int]) -> "ShardData":
+        csr = g.freeze()
+        indptr = array("q", [0])
+        indices = array("i")
+        dst_shard = array("h")
+        for u in nodes:
+            for j in range(csr.indptr[u], csr.indptr[u + 1]):
+                v = csr.indices[j]
+                indices.append(v)
+                dst_shard.append(owner[v])
+            indptr.append(len(indices))
+        return cls(index, array("i", nodes), indptr, indices, dst_shard,
+                   [g.nodes[u] for u in nodes])
+
+    # ===== 磁盘格式 =========================================================
+
+    def save(self, directory: str) -> Dict[str, Any]:
+        """写 shard-XXX.nodes.jsonl / shard-XXX.csr，返回 manifest 里的条目。"""
+        stem = f"shard-{self.index:03d}"
+        with open(os.path.join(directory, stem + ".nodes.jsonl"), "w") as f:
+            for n in self.meta:
+                f.write(json.dumps([n.id, n.hier_name, n.kind, n.width, n.attrs],
+                                   default=str) + "\n")
+        with open(os.path.join(directory, stem + ".csr"), "wb") as f:
+            for arr in (self.nodes, self.indptr, self.indices, self.dst_shard):
+                arr.tofile(f)
+        return {"index": self.index, "nodes_file": stem + ".nodes.jsonl",
+                "csr_file": stem + ".csr", "num_nodes": len(self.nodes),
+                "num_slots": len(self.indices)}
+
+    @classmethod
+    def load(cls, directory: str, entry: Dict[str, Any]) -> "ShardData":
+        n, m = entry["num_nodes"], entry["num_slots"]
+        arrays = []
+        with open(os.path.join(directory, entry["csr_file"]), "rb") as f:
+            for code, count in (("i", n), ("q", n + 1), ("i", m), ("h", m)):
+                arr = array(code)
+                arr.fromfile(f, count)
+                arrays.append(arr)
+        meta = []
+        with open(os.path.join(directory, entry["nodes_file"])) as f:
+            for line in f:
+                node_id, hier_name, kind, width, attrs = json.loads(line)
+                node = RmmgNode(node_id, hier_name, kind, width)
+                node.attrs.update(attrs or {})
+                meta.append(node)
+        return cls(entry["index"], *arrays, meta)
+
+
+def build_shards(g: RmmgGraph, num_shards: int, level: Optional[int] = None) -> List[ShardData]:
+    parts = partition_by_module(g, num_shards, level)
+    owner = array("h", [0]) * len(g.nodes)
+    for s, nodes in enumerate(parts):
+        for v in nodes:
+            owner[v] = s
+    return [ShardData.build(g, s, nodes, owner) for s, nodes in enumerate(parts)]
+
+
+def write_shards(g: RmmgGraph, directory: str, num_shards: int = 4,
+                 level: Optional[int] = None) -> str:
+    """把 g 分片写进 directory（不存在则创建），返回 manifest 路径。"""
+    os.makedirs(directory, exist_ok=True)
+    entries = [d.save(directory) for d in build_shards(g, num_shards, level)]
+    manifest = {"format": 1, "num_shards": len(entries), "num_nodes": len(g.nodes),
+                "num_edges": len(g.edges), "level": level, "shards": entries}
+    path = os.path.join(directory, MANIFEST)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    return path
+
+
+def _as_pred(pred: PredLike) -> NodePred:
+    """worker 侧：JSON 规则（见 RmmgQueryEngine.pred_from_spec）或可 pickle 的顶层函数。"""
+    return pred if callable(pred) else RmmgQueryEngine.pred_from_spec(pred)
+
+
+# ===== worker 侧 =============================================================
+
+class _ShardState:
+    """worker 进程里的一个分片 + 当前查询的 dist / parent。"""
+
+    def __init__(self, data: ShardData):
+        self.data = data
+        self.local = {v: i for i, v in enumerate(data.nodes)}
+        n = len(data.nodes)
+        self.dist = array("i", [-1]) * n
+        self.parent = array("i", [-1]) * n
+        self.parent_shard = array("h", [-1]) * n
+        self.terminal = bytearray(n)
+        self.touched: List[int] = []
+        self.sent: Dict[int, int] = {}            # 已发往别的分片的节点 -> 发出的最小距离
+        self.limit: Optional[int] = None
+        self.relaxed = 0                          # 统计：本次查询本地松弛成功的次数
+
+    def select(self, pred: PredLike) -> List[int]:
+        p = _as_pred(pred)
+        return [n.id for n in self.data.meta if p(n)]
+
+    def begin(self, sources: Iterable[int], terminals: Iterable[int],
+              limit: Optional[int]) -> None:
+        """重置状态；sources / terminals 是全局 ID，只保留本分片的。"""
+        for i in self.touched:
+            self.dist[i] = -1
+            self.parent[i] = -1
+            self.parent_shard[i] = -1
+        self.touched = []
+        self.sent = {}
+        self.relaxed = 0
+        self.terminal = bytearray(len(self.data.nodes))
+        for v in terminals:
+            i = self.local.get(v)
+            if i is not None:
+                self.terminal[i] = 1
+        self.limit = limit
+        self._seeds = [(v, 0, -1, -1) for v in sorted(set(sources)) if v in self.local]
+
+    def step(self, incoming: List[Message]) -> Tuple[Dict[int, List[Message]],
+                                                     List[Tuple[int, int]]]:
+        """
+        收下边界消息（第一轮另加本分片的源），在分片内跑到不动点；
+        返回 (分片 -> 发往该分片的消息, 本轮距离被设置 / 变小的 terminal 及其距离)。
+        """
+        d = self.data
+        ptr, idx, dsh, nodes = d.indptr, d.indices, d.dst_shard, d.nodes
+        dist, local, me, limit = self.dist, self.local, d.index, self.limit
+        out: Dict[int, Dict[int, Message]] = defaultdict(dict)
+        hits: Dict[int, int] = {}
+        heap: List[Tuple[int, int]] = []
+
+        def relax(i: int, du: int, p: int, ps: int) -> None:
+            if 0 <= dist[i] <= du:
+                return
+            if dist[i] < 0:
+                self.touched.append(i)
+            dist[i] = du
+            self.parent[i] = p
+            self.parent_shard[i] = ps
+            self.relaxed += 1
+            if self.terminal[i]:
+                hits[nodes[i]] = du
+            elif limit is None or du < limit:
+                heapq.heappush(heap, (du, i))
+
+        if self._seeds:
+            incoming = self._seeds + list(incoming)
+            self._seeds = []
+        for v, du, p, ps in incoming:
+            relax(local[v], du, p, ps)
+        while heap:
+            du, i = heapq.heappop(heap)
+            if du != dist[i]:
+                continue                          # 已被更短的距离覆盖
+            v = nodes[i]
+            for j in range(ptr[i], ptr[i + 1]):
+                w, s = idx[j], dsh[j]
+                if s == me:
+                    relax(local[w], du + 1, v, me)
+                elif self.sent.get(w, du + 2) > du + 1:
+                    self.sent[w] = du + 1
+                    out[s][w] = (w, du + 1, v, me)
+        return {s: list(msgs.values()) for s, msgs in out.items()}, list(hits.items())
+
+    def trace(self, v: int) -> Tuple[List[int], int, int]:
+        """从 v 沿父指针走到第一个不在本分片的父节点：返回 (本地链, 该父节点或 -1, 其分片)。"""
+        chain = [v]
+        i = self.local[v]
+        while self.parent_shard[i] == self.data.index:
+            v = self.parent[i]
+            chain.append(v)
+            i = self.local[v]
+        return chain, self.parent[i], self.parent_shard[i]
+
+    def collect(self, terminals_only: bool) -> List[Tuple[int, int]]:
+        nodes = self.data.nodes
+        return [(nodes[i], self.dist[i]) for i in self.touched
+                if not terminals_only or self.terminal[i]]
+
+    def stats(self) -> Dict[str, int]:
+        d = self.data
+        return {"shard": d.index, "nodes": len(d.nodes), "edges": len(d.indices),
+                "boundary_edges": d.num_boundary_edges, "relaxed": self.relaxed}
+
+
+def _shard_worker(conn, directory: str, entry: Dict[str, Any]) -> None:
+    try:
+        state = _ShardState(ShardData.load(directory, entry))
+    except Exception as exc:      # 加载失败也回报给协调器
+        conn.send(exc)
+        return
+    conn.send("ready")
+    handlers = {
+        "select": state.select,
+        "begin": state.begin,
+        "step": state.step,
+        "trace": state.trace,
+        "collect": state.collect,
+        "stats": state.stats,
+    }
+    while True:
+        try:
+            cmd, args = conn.recv()
+        except EOFError:
+            return
+        if cmd == "close":
+            conn.close()
+            return
+        fn = handlers.get(cmd)
+        try:
+            if fn is None:
+                raise ValueError(f"unknown shard command: {cmd!r}")
+            conn.send(fn(*args))
+        except Exception as exc:   # 异常原样送回协调器重新抛出，worker 继续服务
+            conn.send(exc)
+
+
+# ===== 协调器 ================================================================
+
+class ShardedQueryEngine:
+    """
+    分片版查询引擎，从 write_shards 写出的目录启动，每个 worker 只读自己的分片。典型用法：
+      write_shards(graph, "/data/soc_shards", num_shards=8, level=2)   # 构图后做一次
+      with ShardedQueryEngine("/data/soc_shards",
+                              mp_context=multiprocessing.get_context("spawn")) as se:
+          paths = se.query_custom({"type": "substr", "value": "MSHR.meta_"},
+                                  {"type": "attr", "value": "is_arch_visible"}, max_depth=60)
+    谓词在 worker 里求值，所以要传 pred_from_spec 的 JSON 规则（或可 pickle 的顶层函数）。
+    结果语义与 RmmgQueryEngine.bfs_paths 一致（每个 target 一条最短路径，按长度排序），
+    等长路径之间选中哪一条可能与串行版本不同。
+    """
+
+    def __init__(self, directory: str, mp_context=None):
+        with open(os.path.join(directory, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        ctx = mp_context or multiprocessing.get_context()
+        self._conns = []
+        self._procs = []
+        for entry in self.manifest["shards"]:
+            parent_conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(target=_shard_worker, args=(child_conn, directory, entry),
+                               daemon=True)
+            proc.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._procs.append(proc)
+        self.num_shards = len(self._conns)
+        try:
+            for conn in self._conns:
+                res = conn.recv()
+                if isinstance(res, Exception):
+                    raise res
+        except BaseException:
+            self.close()
+            raise
+        self.rounds_run = 0               # 统计：最近一次查询的同步轮数
+        self.messages_routed = 0          # 统计：最近一次查询跨分片投递的消息数
+
+    @classmethod
+    def from_graph(cls, graph: RmmgGraph, directory: str, shards: int = 4,
+                   level: Optional[int] = None, mp_context=None) -> "ShardedQueryEngine":
+        """先 write_shards 再启动；调用方仍持有 graph，内存隔离请配合 spawn 上下文并随后释放 graph。"""
+        write_shards(graph, directory, shards, level)
+        return cls(directory, mp_context=mp_context)
+
+    # ===== 与 worker 通信 ===================================================
+
+    def _call(self, shard: int, cmd: str, *args) -> Any:
+        self._conns[shard].send((cmd, args))
+        res = self._conns[shard].recv()
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    def _broadcast(self, cmd: str, per_shard_args: Sequence[tuple]) -> List[Any]:
+        """先全部发送再逐个接收，各 worker 并行执行。"""
+        for conn, args in zip(self._conns, per_shard_args):
+            conn.send((cmd, args))
+        out = []
+        for conn in self._conns:
+            res = conn.recv()
+            if isinstance(res, Exception):
+                raise res
+            out.append(res)
+        return out
+
+    def shard_stats(self) -> List[Dict[str, int]]:
+        return self._broadcast("stats", [()] * self.num_shards)
+
+    def find_nodes(self, pred: PredLike) -> List[int]:
+        """在各 worker 上并行求值谓词，返回全局节点 ID（升序）。"""
+        found: List[int] = []
+        for part in self._broadcast("select", [(pred,)] * self.num_shards):
+            found.extend(part)
+        return sorted(found)
+
+    # ===== 分布式 BFS =======================================================
+
+    def _run(self, sources: Iterable[int], terminals: Iterable[int],
+             limit: Optional[int], max_hits: Optional[int] = None) -> None:
+        sources, terminals = sorted(set(sources)), sorted(set(terminals))
+        self._broadcast("begin", [(sources, terminals, limit)] * self.num_shards)
+
+        inbox: List[List[Message]] = [[] for _ in range(self.num_shards)]
+        best: Dict[int, int] = {}
+        rounds = routed = 0
+        first = True
+        while first or any(inbox):
+            first = False
+            replies = self._broadcast("step", [(msgs,) for msgs in inbox])
+            inbox = [[] for _ in range(self.num_shards)]
+            for out, hits in replies:
+                best.update(hits)
+                for dst, msgs in out.items():
+                    inbox[dst].extend(msgs)
+                    routed += len(msgs)
+            rounds += 1
+            if max_hits is not None and len(best) >= max_hits and any(inbox):
+                # 在途消息的距离都不小于第 max_hits 近的 target 时，前 max_hits 条已经确定
+                kth = sorted(best.values())[max_hits - 1]
+                if kth <= min(m[1] for msgs in inbox for m in msgs):
+                    break
+        self.rounds_run = rounds
+        self.messages_routed = routed
+
+    def _path_to(self, v: int, shard: int) -> List[int]:
+        path: List[int] = []
+        while v >= 0:
+            chain, v, shard = self._call(shard, "trace", v)
+            path.extend(chain)
+        path.reverse()
+        return path
+
+    def bfs_paths(
+        self,
+        sources: Iterable[int],
+        targets: Iterable[int],
+        max_depth: int = 50,
+        max_paths: Optional[int] = None,
+    ) -> List[List[int]]:
+        """分布式版 bfs_paths：target 只到达不扩展，路径节点数 <= max_depth。"""
+        targets = set(targets)
+        sources = list(sources)
+        if not sources or not targets or max_depth < 1:
+            return []
+        self._run(sources, targets, max_depth - 1, max_hits=max_paths)
+        reached = []
+        for shard, part in enumerate(self._broadcast("collect", [(True,)] * self.num_shards)):
+            reached.extend((d, t, shard) for t, d in part)
+        reached.sort()
+        if max_paths is not None:
+            reached = reached[:max_paths]
+        return [self._path_to(t, shard) for _, t, shard in reached]
+
+    def reachable(self, sources: Iterable[int],
+                  max_depth: Optional[int] = None) -> Dict[int, int]:
+        """sources 出发（距离 <= max_depth）可达的节点 -> BFS 距离。"""
+        self._run(sources, (), max_depth)
+        out: Dict[int, int] = {}
+        for part in self._broadcast("collect", [(False,)] * self.num_shards):
+            out.update(part)
+        return out
+
+    def query_custom(
+        self,
+        source_pred: PredLike,
+        target_pred: PredLike,
+        max_depth: int = 50,
+        max_paths: Optional[int] = None,
+    ) -> List[List[int]]:
+        src_nodes = self.find_nodes(source_pred)
+        dst_nodes = self.find_nodes(target_pred)
+        print(f"[RMMG-QUERY] sharded custom sources: {len(src_nodes)}, "
+              f"targets: {len(dst_nodes)}")
+        paths = self.bfs_paths(src_nodes, dst_nodes, max_depth=max_depth, max_paths=max_paths)
+        print(f"[RMMG-QUERY] {self.rounds_run} rounds over {self.num_shards} shards, "
+              f"{self.messages_routed} cross-shard messages.")
+        return paths
+
+    def close(self) -> None:
+        for conn, proc in zip(self._conns, self._procs):
+            try:
+                conn.send(("close", ()))
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._conns = []
+        self._procs = []
+
+    def __enter__(self) -> "ShardedQueryEngine":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
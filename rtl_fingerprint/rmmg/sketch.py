@@ -0,0 +1,142 @@
+# rtl_fingerprint/rmmg/sketch.py
+
+"""
+全图近似扇入 / 扇出锥大小（HyperLogLog 传播）：
+  - 每个节点按哈希落到 HLL 的一个寄存器上；一个 SCC 分量的草图 = 成员的草图取 max
+  - 在凝聚 DAG 上按“高度”分层：同一高度的分量一次性用 np.maximum.at 合并后继（或前驱）的草图，
+    扇出（正向可达集合）和扇入（反向）各一遍，每遍线性
+  - 估计值（含节点自身）写入 node.attrs["fanout_cone"] / ["fanin_cone"]，
+    find_nodes 可以配合 RmmgQueryEngine.pred_attr_range 过滤
+precision=p 时每个分量 2^p 个字节寄存器，相对误差约 1.04 / sqrt(2^p)。
+需要 NumPy（可选依赖）。
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 没装 numpy 时仍可 import 本模块，调用时报错
+    np = None
+
+from .kernels import _gather_slots, _require_numpy
+from .scc import Condensation, condensation
+
+
+@dataclass
+class ConeEstimates:
+    fanout: "np.ndarray"       # 节点 -> 估计的正向可达节点数（含自身）
+    fanin: "np.ndarray"        # 节点 -> 估计的反向可达节点数（含自身）
+    precision: int
+
+
+def _hash64(x: "np.ndarray", seed: int) -> "np.ndarray":
+    """splitmix64。"""
+    z = x.astype(np.uint64) + np.uint64((0x9E3779B97F4A7C15 * (seed + 1)) & 0xFFFFFFFFFFFFFFFF)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _seed_sketches(cond: Condensation, n: int, p: int, seed: int) -> "np.ndarray":
+    m = 1 << p
+    h = _hash64(np.arange(n, dtype=np.uint64), seed)
+    reg = (h & np.uint64(m - 1)).astype(np.int64)
+    rest = h >> np.uint64(p)
+    # rho = 剩余 64-p 位里最低位 1 的位置 + 1（全 0 时取上限）
+    rho = np.full(n, 64 - p + 1, dtype=np.uint8)
+    low = rest & (~rest + np.uint64(1))
+    nz = rest != 0
+    rho[nz] = (np.log2(low[nz].astype(np.float64)).astype(np.int64) + 1).astype(np.uint8)
+    comp = np.frombuffer(cond.comp, dtype=np.int32).astype(np.int64)
+    sk = np.zeros((cond.num_comps, m), dtype=np.uint8)
+    np.maximum.at(sk, (comp, reg), rho)
+    return sk
+
+
+def _heights(ptr: "np.ndarray", idx: "np.ndarray", order: range) -> "np.ndarray":
+    """按 order 处理，height[c] = 1 + max(height[邻居])，没有邻居为 0。"""
+    height = np.zeros(len(ptr) - 1, dtype=np.int64)
+    ptr_l, idx_l, h = ptr.tolist(), idx.tolist(), [0] * (len(ptr) - 1)
+    for c in order:
+        best = -1
+        for j in range(ptr_l[c], ptr_l[c + 1]):
+            if h[idx_l[j]] > best:
+                best = h[idx_l[j]]
+        h[c] = best + 1
+    height[:] = h
+    return height
+
+
+def _propagate(sk: "np.ndarray", ptr: "np.ndarray", idx: "np.ndarray",
+               height: "np.ndarray") -> None:
+    """高度从低到高，分量草图合并所有邻居（高度更低，已完成）的草图。"""
+    by_height = np.argsort(height, kind="stable")
+    bounds = np.searchsorted(height[by_height], np.arange(1, int(height.max(initial=0)) + 2))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        comps = by_height[lo:hi]
+        slots, owners = _gather_slots(ptr, comps)
+        if slots.size:
+            np.maximum.at(sk, owners, sk[idx[slots]])
+
+
+def _estimate(sk: "np.ndarray") -> "np.ndarray":
+    m = sk.shape[1]
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / np.sum(np.exp2(-sk.astype(np.float64)), axis=1)
+    zeros = np.count_nonzero(sk == 0, axis=1)
+    small = (raw <= 2.5 * m) & (zeros > 0)
+    est = raw.copy()
+    est[small] = m * np.log(m / zeros[small])
+    return est
+
+
+def _compute(g, precision: int, seed: int) -> ConeEstimates:
+    cond = condensation(g)
+    n = len(g.nodes)
+    ncomp = cond.num_comps
+    if n == 0:
+        empty = np.zeros(0, dtype=np.float64)
+        return ConeEstimates(empty, empty.copy(), precision)
+    dag_ptr = np.frombuffer(cond.dag_indptr, dtype=np.int64)
+    dag_idx = np.frombuffer(cond.dag_indices, dtype=np.int32).astype(np.int64)
+
+    # 反向 DAG（前驱）CSR
+    owners = np.repeat(np.arange(ncomp, dtype=np.int64), np.diff(dag_ptr))
+    order = np.argsort(dag_idx, kind="stable")
+    rdag_idx = owners[order]
+    rdag_ptr = np.zeros(ncomp + 1, dtype=np.int64)
+    np.cumsum(np.bincount(dag_idx, minlength=ncomp), out=rdag_ptr[1:])
+
+    comp = np.frombuffer(cond.comp, dtype=np.int32)
+    results: List["np.ndarray"] = []
+    # 凝聚图编号是拓扑序：扇出从汇往回（逆序），扇入从源往后（正序）
+    for ptr, idx, topo in ((dag_ptr, dag_idx, range(ncomp - 1, -1, -1)),
+                           (rdag_ptr, rdag_idx, range(ncomp))):
+        sk = _seed_sketches(cond, n, precision, seed)
+        _propagate(sk, ptr, idx, _heights(ptr, idx, topo))
+        results.append(_estimate(sk)[comp])
+
+    return ConeEstimates(results[0], results[1], precision)
+
+
+def estimate_cones(g, precision: int = 6, seed: int = 0,
+                   write_attrs: bool = True) -> ConeEstimates:
+    """
+    全部节点的近似扇出 / 扇入锥大小，按 (precision, seed) 缓存在图上；
+    write_attrs 时写回 node.attrs（四舍五入成整数）。
+    """
+    _require_numpy()
+    if not 4 <= precision <= 16:
+        raise ValueError("precision must be in [4, 16]")
+    tables: Dict[Tuple[int, int], ConeEstimates] = g.cached("cones", dict)
+    est = tables.get((precision, seed))
+    if est is None:
+        est = tables[(precision, seed)] = _compute(g, precision, seed)
+    if write_attrs:
+        for v, (fo, fi) in enumerate(zip(est.fanout.tolist(), est.fanin.tolist())):
+            attrs = g.nodes[v].attrs
+            attrs["fanout_cone"] = int(round(fo))
+            attrs["fanin_cone"] = int(round(fi))
+    return est
@@ -0,0 +1,164 @@
+# rtl_fingerprint/rmmg/taint.py
+
+"""
+全源 × 全汇泄漏矩阵：位集 taint 传播。
+  - 每个源（或源组，例如同一 module_path 的所有 micro_state）分配一个 bit
+  - 在 SCC 凝聚图上按拓扑序传播位集（Python int 当任意长位集），一遍即不动点
+  - 源很多时按 chunk_bits 分批，每批一遍线性扫描，内存有界
+  - 只在“能到达某个汇”的分量上传播，其余分量直接跳过
+结果是汇 × 源的稀疏矩阵（CSR 形式），替代大量单独的 query_custom。
+"""
+
+from __future__ import annotations
+import csv
+import json
+from array import array
+from typing import Callable, Dict, Hashable, Iterable, List, Tuple, Union
+
+from .graph import RmmgGraph, RmmgNode
+from .scc import condensation
+
+GroupBy = Union[None, str, Callable[[RmmgNode], Hashable]]
+
+
+class LeakageMatrix:
+    """
+    稀疏可达矩阵：第 i 个汇可以被哪些源标签到达。
+      - source_labels[k] / source_members[k]: 第 k 个源标签及其包含的节点
+      - sinks[i]: 第 i 个汇节点 ID
+      - indptr / indices: 汇 i 对应的源标签下标为 indices[indptr[i]:indptr[i+1]]
+    """
+
+    def __init__(self, source_labels: List[str], source_members: List[List[int]],
+                 sinks: List[int], indptr: array, indices: array):
+        self.source_labels = source_labels
+        self.source_members = source_members
+        self.sinks = sinks
+        self.indptr = indptr
+        self.indices = indices
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.sinks), len(self.source_labels)
+
+    def sources_of(self, sink_row: int) -> List[int]:
+        return list(self.indices[self.indptr[sink_row]:self.indptr[sink_row + 1]])
+
+    def pairs(self) -> Iterable[Tuple[int, int]]:
+        """逐个给出 (源标签下标, 汇节点 ID)。"""
+        for i, sink in enumerate(self.sinks):
+            for k in self.indices[self.indptr[i]:self.indptr[i + 1]]:
+                yield k, sink
+
+    def to_dict(self, graph: RmmgGraph) -> Dict[str, List[str]]:
+        """{汇 hier_name: [源标签, ...]}，只列出有泄漏的汇。"""
+        out: Dict[str, List[str]] = {}
+        for i, sink in enumerate(self.sinks):
+            row = self.sources_of(i)
+            if row:
+                out[graph.nodes[sink].hier_name] = [self.source_labels[k] for k in row]
+        return out
+
+    def dump_json(self, path: str, graph: RmmgGraph) -> None:
+        with open(path, "w") as f:
+            json.dump({"shape": self.shape, "nnz": self.nnz,
+                       "leaks": self.to_dict(graph)}, f, indent=2)
+
+    def dump_csv(self, path: str, graph: RmmgGraph) -> None:
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["source", "sink"])
+            for k, sink in self.pairs():
+                w.writerow([self.source_labels[k], graph.nodes[sink].hier_name])
+
+
+def _group_sources(graph: RmmgGraph, sources: List[int],
+                   group_by: GroupBy) -> Tuple[List[str], List[List[int]]]:
+    if group_by is None:
+        return [graph.nodes[s].hier_name for s in sources], [[s] for s in sources]
+    if group_by == "module":
+        key_fn = lambda n: n.attrs.get("module_path", "")
+    elif callable(group_by):
+        key_fn = group_by
+    else:
+        raise ValueError(f"unknown group_by: {group_by!r}")
+    groups: Dict[Hashable, List[int]] = {}
+    for s in sources:
+        groups.setdefault(key_fn(graph.nodes[s]), []).append(s)
+    return [str(k) for k in groups], list(groups.values())
+
+
+def leakage_matrix(
+    graph: RmmgGraph,
+    sources: Iterable[int],
+    sinks: Iterable[int],
+    group_by: GroupBy = None,
+    chunk_bits: int = 4096,
+) -> LeakageMatrix:
+    """
+    计算 sources（按 group_by 分组）到 sinks 的完整可达矩阵。
+    可达是自反的：某个源本身也是汇时记为可达。
+    """
+    sources = list(sources)
+    sinks = list(sinks)
+    labels, members = _group_sources(graph, sources, group_by)
+    cond = condensation(graph)
+    comp = cond.comp
+    ncomp = cond.num_comps
+
+    # 只有能到达汇的分量需要携带位集（逆拓扑序一遍）
+    relevant = bytearray(ncomp)
+    for s in sinks:
+        relevant[comp[s]] = 1
+    for c in range(ncomp - 1, -1, -1):
+        if not relevant[c]:
+            for d in cond.comp_successors(c):
+                if relevant[d]:
+                    relevant[c] = 1
+                    break
+
+    rows: List[List[int]] = [[] for _ in sinks]
+    sink_comps = [comp[s] for s in sinks]
+    for base in range(0, len(labels), chunk_bits):
+        bits = [0] * ncomp
+        first_comp = ncomp
+        for k in range(base, min(base + chunk_bits, len(labels))):
+            mask = 1 << (k - base)
+            for v in members[k]:
+                c = comp[v]
+                if relevant[c]:
+                    bits[c] |= mask
+                    if c < first_comp:
+                        first_comp = c
+        # 拓扑序传播：分量编号小的先处理
+        for c in range(first_comp, ncomp):
+            b = bits[c]
+            if not b:
+                continue
+            for d in cond.comp_successors(c):
+                if relevant[d]:
+                    bits[d] |= b
+        # 同一分量里的汇共享一份解码结果
+        decoded: Dict[int, List[int]] = {}
+        for i, c in enumerate(sink_comps):
+            row = decoded.get(c)
+            if row is None:
+                row = []
+                b = bits[c]
+                while b:
+                    low = b & -b
+                    row.append(base + low.bit_length() - 1)
+                    b ^= low
+                decoded[c] = row
+            rows[i].extend(row)
+
+    indptr = array("q", [0])
+    indices = array("i")
+    for row in rows:
+        indices.extend(row)
+        indptr.append(len(indices))
+    return LeakageMatrix(labels, members, sinks, indptr, indices)
@@ -0,0 +1,157 @@
+# rtl_fingerprint/rmmg/timeexp.py
+
+"""
+按需展开的时间展开图（time-expanded graph），回答“k 个周期内能否影响”这类问题：
+  - 状态是 (node, cycle)，0 <= cycle <= k
+  - 组合边 u -> v：(u, c) -> (v, c)；时序边（is_seq）u -> v：(u, c) -> (v, c + 1)
+  - 不物化 k 份图：搜索时直接读 CsrGraph 的邻接 + seq 标志生成后继
+  - 同一组源的展开结果按周期分层记忆化：第 c 层 = 周期 c 可达的节点及其前驱状态，
+    之后更大的 k 只需在已有层后面继续展开
+源状态只在周期 0 注入；寄存器“保持”需要图里本身有时序自环。
+"""
+
+from __future__ import annotations
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .csr import CsrGraph
+from .masks import CompiledMask, TraversalMask, compile_mask
+
+TimedNode = Tuple[int, int]       # (node_id, cycle)
+
+
+class _Unrolling:
+    """一组源的分层展开结果。layers[c]: node -> 前驱状态 (node, cycle)，源为 None。"""
+
+    def __init__(self, sources: FrozenSet[int]):
+        self.sources = sources
+        self.layers: List[Dict[int, Optional[TimedNode]]] = []
+        self.pending: Dict[int, TimedNode] = {}   # 下一周期的种子（经时序边到达）
+
+
+class TimeExpandedGraph:
+    def __init__(self, g_or_csr, max_cached_sources: int = 64,
+                 mask: Optional[CompiledMask] = None):
+        self.csr = g_or_csr if isinstance(g_or_csr, CsrGraph) else g_or_csr.freeze()
+        self.mask = mask
+        self.max_cached_sources = max_cached_sources
+        self._memo: Dict[FrozenSet[int], _Unrolling] = {}
+        self.layers_built = 0             # 统计：实际展开过的层数（不含命中缓存的）
+
+    # ===== 按需生成后继 =====================================================
+
+    def successors(self, state: TimedNode, k: Optional[int] = None) -> List[TimedNode]:
+        """(node, cycle) 的后继状态；给 k 时丢掉超过 k 的时序后继。"""
+        u, c = state
+        csr, mask = self.csr, self.mask
+        seq, pos, indices = csr.seq, csr.edge_pos, csr.indices
+        out = []
+        if mask is not None and not mask.expand_ok[u]:
+            return out
+        for j in range(csr.indptr[u], csr.indptr[u + 1]):
+            if mask is not None and not (mask.slot_ok[j] and mask.node_ok[indices[j]]):
+                continue
+            nc = c + 1 if seq[pos[j]] else c
+            if k is None or nc <= k:
+                out.append((indices[j], nc))
+        return out
+
+    # ===== 分层展开（记忆化） ===============================================
+
+    def _unrolling(self, sources: Iterable[int], k: int) -> _Unrolling:
+        key = frozenset(sources)
+        un = self._memo.get(key)
+        if un is None:
+            if len(self._memo) >= self.max_cached_sources:
+                self._memo.pop(next(iter(self._memo)))
+            un = self._memo[key] = _Unrolling(key)
+            un.pending = {s: None for s in sorted(key)}
+        while len(un.layers) <= k:
+            self._expand_layer(un)
+        return un
+
+    def _expand_layer(self, un: _Unrolling) -> None:
+        """周期 c 的种子做组合闭包，同时收集周期 c + 1 的种子。"""
+        c = len(un.layers)
+        csr, mask = self.csr, self.mask
+        indptr, indices, seq, pos = csr.indptr, csr.indices, csr.seq, csr.edge_pos
+        layer: Dict[int, Optional[TimedNode]] = dict(un.pending)
+        nxt: Dict[int, TimedNode] = {}
+        q = deque(layer)
+        while q:
+            u = q.popleft()
+            if mask is not None and not mask.expand_ok[u]:
+                continue
+            for j in range(indptr[u], indptr[u + 1]):
+                v = indices[j]
+                if mask is not None and not (mask.slot_ok[j] and mask.node_ok[v]):
+                    continue
+                if seq[pos[j]]:
+                    if v not in nxt:
+                        nxt[v] = (u, c)
+                elif v not in layer:
+                    layer[v] = (u, c)
+                    q.append(v)
+        un.layers.append(layer)
+        un.pending = nxt
+        self.layers_built += 1
+
+    # ===== 查询 =============================================================
+
+    def reachable_within(self, sources: Iterable[int], k: int) -> Dict[int, int]:
+        """周期 0 的 sources 在 k 个周期内能影响到的节点 -> 最早周期。"""
+        un = self._unrolling(sources, k)
+        first: Dict[int, int] = {}
+        for c in range(k + 1):
+            for v in un.layers[c]:
+                first.setdefault(v, c)
+        return first
+
+    def reachable_at(self, sources: Iterable[int], cycle: int) -> FrozenSet[int]:
+        """恰好在周期 cycle 受影响的节点集合。"""
+        return frozenset(self._unrolling(sources, cycle).layers[cycle])
+
+    def path_to(self, sources: Iterable[int], state: TimedNode) -> List[TimedNode]:
+        """源状态到 state 的一条路径（周期内为最少边数），state 不可达时返回 []。"""
+        v, c = state
+        un = self._unrolling(sources, c)
+        if v not in un.layers[c]:
+            return []
+        path = [state]
+        prev = un.layers[c][v]
+        while prev is not None:
+            path.append(prev)
+            prev = un.layers[prev[1]][prev[0]]
+        path.reverse()
+        return path
+
+    def paths_within(
+        self,
+        sources: Iterable[int],
+        targets: Iterable[int],
+        k: int,
+        max_paths: Optional[int] = None,
+    ) -> List[List[TimedNode]]:
+        """
+        每个 k 周期内可达的 target 一条路径（取最早到达的周期），
+        按 (周期, 路径长度) 排序。
+        """
+        sources = frozenset(sources)
+        first = self.reachable_within(sources, k)
+        hits = sorted((first[t], t) for t in set(targets) if t in first)
+        paths = [self.path_to(sources, (t, c)) for c, t in hits]
+        paths.sort(key=lambda p: (p[-1][1], len(p)))
+        return paths[:max_paths] if max_paths is not None else paths
+
+    def clear(self) -> None:
+        self._memo.clear()
+
+
+def time_expanded(g, mask: Optional[TraversalMask] = None) -> TimeExpandedGraph:
+    """RmmgGraph 上按掩码缓存的时间展开视图（图变化后连同记忆化的层一起失效）。"""
+    views: Dict[Optional[TraversalMask], TimeExpandedGraph] = g.cached("time_expanded", dict, attrs=True)
+    key = None if mask is None or mask.empty else mask
+    teg = views.get(key)
+    if teg is None:
+        teg = views[key] = TimeExpandedGraph(g, mask=compile_mask(g, key))
+    return teg
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import importlib
 from types import SimpleNamespace
-from typing import Callable, Iterator, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 UhdmModules = Tuple[object, object]
 
@@ -36,3 +36,123 @@ def get_uhdm() -> UhdmModules:
     base_mod = importlib.import_module("uhdm")
     util_mod = SimpleNamespace(vpi_iterate_gen=_build_iterate_gen(base_mod))
     return base_mod, util_mod
+
+
+_MISSING = object()
+
+
+def handle_key(obj: object) -> Optional[int]:
+    """
+    VPI handle 的稳定标识：底层 C 指针（SWIG 代理的 this，或 SwigPyObject 本身）。
+    同一个 handle 换了新的 Python 代理也得到同一个 key；没有指针的对象返回 None。
+    构图期间不调用 vpi_release_handle，指针在一次构图内不会被复用。
+    """
+    try:
+        return int(getattr(obj, "this", obj))
+    except (TypeError, ValueError):
+        return None
+
+
+class CachedVpi:
+    """
+    只读遍历（例如 RMMG 构图）用的带缓存 UHDM 访问层：
+      - vpi_get / vpi_get_str / vpi_handle 的结果和 vpi_iterate 的子对象列表按
+        (prop, handle_key(obj)) 缓存，没有底层指针的对象不缓存
+      - 返回的 handle 就是缓存里的那个代理，沿着它继续查询同样命中缓存
+      - 整数 vpi* 常量拷到实例上；vpi_scan 等其它属性原样转发，不缓存
+      - bindings 抛出的异常原样抛出，不缓存
+    """
+
+    def __init__(self, uhdm_mod: object, util_mod: Optional[object] = None):
+        self._uhdm = uhdm_mod
+        self._util = util_mod
+        for name in dir(uhdm_mod):
+            if name.startswith(("vpi", "uhdm")):
+                value = getattr(uhdm_mod, name, None)
+                if isinstance(value, int) and not isinstance(value, bool):
+                    self.__dict__[name] = value
+        self.util = SimpleNamespace(vpi_iterate_gen=self.vpi_iterate_gen)
+        self._props: Dict[Tuple[int, int], object] = {}
+        self._strs: Dict[Tuple[int, int], object] = {}
+        self._handles: Dict[Tuple[int, int], object] = {}
+        self._lists: Dict[Tuple[int, int], List[object]] = {}
+        self.calls: Dict[str, int] = dict.fromkeys(("get", "get_str", "handle", "iterate"), 0)
+        self.hits: Dict[str, int] = dict.fromkeys(self.calls, 0)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._uhdm, name)
+
+    def _cached(self, kind: str, table: Dict, prop: int, obj: object, fetch: Callable):
+        self.calls[kind] += 1
+        oid = handle_key(obj) if obj is not None else None
+        if oid is None:
+            return fetch()
+        key = (prop, oid)
+        value = table.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits[kind] += 1
+            return value
+        value = table[key] = fetch()
+        return value
+
+    # ----- 单次读取 -----------------------------------------------------------
+
+    def vpi_get(self, prop: int, obj: object):
+        return self._cached("get", self._props, prop, obj,
+                            lambda: self._uhdm.vpi_get(prop, obj))
+
+    def vpi_get_str(self, prop: int, obj: object):
+        return self._cached("get_str", self._strs, prop, obj,
+                            lambda: self._uhdm.vpi_get_str(prop, obj))
+
+    def vpi_handle(self, tag: int, obj: object):
+        return self._cached("handle", self._handles, tag, obj,
+                            lambda: self._uhdm.vpi_handle(tag, obj))
+
+    def iterate(self, tag: int, obj: object) -> List[object]:
+        """vpi_iterate 的结果列表（没有迭代器时是空列表）。"""
+        return self._cached("iterate", self._lists, tag, obj,
+                            lambda: list(_build_iterate_gen(self._uhdm)(tag, obj)))
+
+    def vpi_iterate_gen(self, tag: int, obj: object) -> Iterator[object]:
+        return iter(self.iterate(tag, obj))
+
+    # ----- 批量接口 -----------------------------------------------------------
+
+    def get_many(self, obj: object, *props: int) -> Tuple[object, ...]:
+        """同一对象的多个 vpi_get 属性。"""
+        return tuple(self.vpi_get(p, obj) for p in props)
+
+    def handles(self, tag: int, objs: Iterable[object]) -> List[object]:
+        """对每个对象取 vpi_handle(tag, o)。"""
+        return [self.vpi_handle(tag, o) for o in objs]
+
+    def iterate_handles(self, tag: int, obj: object, *handle_tags: int) -> List[Tuple[object, ...]]:
+        """
+        obj 在 tag 下的子对象，连同每个子对象的若干 handle，
+        例如 iterate_handles(vpiPort, mod, vpiHighConn, vpiLowConn)。
+        """
+        return [(child,) + tuple(self.vpi_handle(t, child) for t in handle_tags)
+                for child in self.iterate(tag, obj)]
+
+    # ----- 统计 ---------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """上次 clear 以来的 {kind: (调用次数, 命中次数)}。"""
+        return {kind: (self.calls[kind], self.hits[kind]) for kind in self.calls}
+
+    def summary(self) -> str:
+        calls = sum(self.calls.values())
+        hits = sum(self.hits.values())
+        rate = hits / calls if calls else 0.0
+        return f"{calls} vpi calls, {hits} cache hits ({rate:.0%})"
+
+    def clear(self) -> None:
+        """清空所有缓存结果并重置计数。"""
+        for table in (self._props, self._strs, self._handles, self._lists):
+            table.clear()
+        for counter in (self.calls, self.hits):
+            for kind in counter:
+                counter[kind] = 0
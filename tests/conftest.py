@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from rtl_fingerprint.rmmg.graph import RmmgGraph
+
+
+def build_graph(nodes, edges):
+    """nodes: [(hier_name, kind, width, attrs)], edges: [(src_name, dst_name, is_seq)]."""
+    g = RmmgGraph()
+    for name, kind, width, attrs in nodes:
+        nid = g.add_node(name, kind, width)
+        module_path, _, sig = name.rpartition(".")
+        g.nodes[nid].attrs.update(module_path=module_path, signal_name=sig)
+        g.nodes[nid].attrs.update(attrs)
+    for src, dst, is_seq in edges:
+        g.add_edge(g.get_node_id(src), g.get_node_id(dst), is_seq=is_seq)
+    return g
+
+
+def random_graph(n=300, e=1200, seed=7):
+    rnd = random.Random(seed)
+    g = RmmgGraph()
+    for i in range(n):
+        g.add_node(f"work@M{i % 7}.s{i}", "reg" if i % 3 == 0 else "net", 1 + i % 16)
+        g.nodes[i].attrs.update(module_path=f"work@M{i % 7}", signal_name=f"s{i}")
+    for _ in range(e):
+        g.add_edge(rnd.randrange(n), rnd.randrange(n), is_seq=rnd.random() < 0.2)
+    return g
+
+
+@pytest.fixture
+def make_random_graph():
+    return random_graph
+
+
+@pytest.fixture
+def mshr_graph():
+    """MSHR 元数据经过一级寄存器流到 ROB commit 端口的小图。"""
+    nodes = [
+        ("work@MSHR.meta_tag", "reg", 20, {"is_micro_state": True}),
+        ("work@MSHR.meta_state", "reg", 4, {"is_micro_state": True}),
+        ("work@MSHR.io_resp", "output", 20, {}),
+        ("work@LSU.clock", "input", 1, {}),
+        ("work@LSU.ldq_addr", "reg", 40, {"is_micro_state": True}),
+        ("work@LSU.io_out", "output", 40, {}),
+        ("work@Rob.io_commit_uops_0_data", "output", 64, {"is_arch_visible": True}),
+        ("work@Rob.io_commit_valid", "output", 1, {"is_arch_visible": True}),
+        ("work@Rob.unrelated", "net", 8, {}),
+    ]
+    edges = [
+        ("work@MSHR.meta_tag", "work@MSHR.io_resp", False),
+        ("work@MSHR.meta_state", "work@MSHR.io_resp", False),
+        ("work@MSHR.io_resp", "work@LSU.ldq_addr", True),
+        ("work@LSU.clock", "work@LSU.ldq_addr", False),
+        ("work@LSU.ldq_addr", "work@LSU.io_out", False),
+        ("work@LSU.io_out", "work@Rob.io_commit_uops_0_data", False),
+        ("work@LSU.io_out", "work@Rob.io_commit_valid", False),
+        ("work@Rob.unrelated", "work@Rob.io_commit_valid", False),
+    ]
+    return build_graph(nodes, edges)
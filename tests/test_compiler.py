@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+import os
+
+from conftest import build_graph
+from rtl_fingerprint.compiler import FingerprintCompiler
+from rtl_fingerprint.config import load_config
+from rtl_fingerprint.ir import RTLIR, Expr, SignalIR
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+CONFIG = os.path.join(os.path.dirname(__file__), "..", "rtl_fingerprint", "config_toy.yml")
+DCACHE = "DigitalTop.tile_prci_domain.boom_tile.dcache"
+
+
+def _toy_ir():
+    # 与 ToyFrontend.parse() 相同的两个信号
+    set_idx = Expr("xor", [Expr("slice", ["va", 11, 6]),
+                           Expr("replicate", [Expr("bit", ["va", 7]), 6])])
+    return RTLIR(signals=[
+        SignalIR(name="dcache_set_idx", expr=set_idx, module_path=DCACHE),
+        SignalIR(name="dcache_mshr_full", expr=Expr("eq", ["mshr_used", 4]),
+                 module_path=DCACHE + ".mshrs"),
+    ])
+
+
+def test_compile_fingerprints_ranks_by_rmmg_paths(tmp_path):
+    compiler = FingerprintCompiler(load_config(CONFIG))
+    prefix = str(tmp_path / "out")
+    fps = compiler.compile_fingerprints(_toy_ir(), out_prefix=prefix)
+    assert [fp.ftype for fp in fps] == ["Mapping", "Queue"]      # 模式给的 impact 0.7 / 0.6
+
+    # MSHR 计数器在 源 → 汇 路径上，dcache 本身没有路径：Queue 排到前面
+    g = build_graph(
+        [(f"{DCACHE}.mshrs.mshr_used", "reg", 3, {"is_micro_state": True}),
+         (f"{DCACHE}.set_idx", "net", 6, {}),
+         ("DigitalTop.core.io_commit", "output", 8, {"is_arch_visible": True})],
+        [(f"{DCACHE}.mshrs.mshr_used", "DigitalTop.core.io_commit", False)],
+    )
+    fps = compiler.compile_fingerprints(_toy_ir(), RmmgQueryEngine(g), out_prefix=prefix)
+    assert [fp.ftype for fp in fps] == ["Queue", "Mapping"]
+    assert fps[0].impact == 1.0
+    with open(prefix + ".fingerprints.json") as f:
+        assert [d["type"] for d in json.load(f)["fingerprints"]] == ["Queue", "Mapping"]
+
+
+def test_config_reads_rmmg_build_options(tmp_path):
+    cfg = load_config(CONFIG)
+    assert (cfg.bit_precise, cfg.addr_edges) == (False, False)
+    with open(CONFIG) as f:
+        text = f.read()
+    path = tmp_path / "cfg.yml"
+    path.write_text(text + "\nrmmg:\n  bit_precise: true\n  addr_edges: true\n")
+    cfg = load_config(str(path))
+    assert (cfg.bit_precise, cfg.addr_edges) == (True, True)
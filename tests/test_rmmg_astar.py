@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+from rtl_fingerprint.rmmg.astar import sink_distance
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+
+def _valid(g, path):
+    edges = {(e.src, e.dst) for e in g.edges}
+    return all((a, b) in edges for a, b in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("max_depth", [3, 6, 50])
+def test_astar_matches_bfs(make_random_graph, max_depth):
+    g = make_random_graph(n=600, e=1500, seed=5)
+    engine = RmmgQueryEngine(g)
+    sources, targets = range(0, 30), range(550, 600)
+    ref = engine.bfs_paths(sources, targets, max_depth=max_depth)
+    got = engine.bfs_paths(sources, targets, max_depth=max_depth, backend="astar")
+
+    assert {p[-1]: len(p) for p in got} == {p[-1]: len(p) for p in ref}
+    assert [len(p) for p in got] == sorted(len(p) for p in got)
+    assert all(p[0] in sources and _valid(g, p) for p in got)
+    assert got.expanded <= ref.expanded
+
+
+def test_sink_distance_is_cached_and_pruned(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    sinks = engine.find_nodes(engine.pred_arch_visible())
+    table = sink_distance(mshr_graph, sinks)
+    assert sink_distance(mshr_graph, reversed(sinks)) is table
+    assert table.cone_size == len(mshr_graph.nodes)
+
+    srcs = engine.find_nodes(engine.pred_hier_startswith("work@MSHR.meta_"))
+    assert engine.astar_paths(srcs, sinks, max_depth=4) == []
+    paths = engine.astar_paths(srcs, sinks, max_depth=5, max_paths=1)
+    assert len(paths) == 1 and len(paths[0]) == 5
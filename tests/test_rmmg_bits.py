@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import random
+
+from conftest import build_graph
+from rtl_fingerprint.rmmg.bits import IntervalSet, propagate_bits
+from rtl_fingerprint.rmmg.graph import RmmgGraph
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+
+def _bit_graph():
+    """
+    va[11:6] -> set_idx（逐位对齐），va[63:12] -> tag（经过运算，不对齐），
+    set_idx -> sink_a，tag -> sink_b，va -> whole（整信号边）。
+    """
+    g = build_graph(
+        [("work@TLB.va", "reg", 64, {"is_micro_state": True}),
+         ("work@TLB.set_idx", "net", 6, {}),
+         ("work@TLB.tag", "net", 52, {}),
+         ("work@TLB.sink_a", "output", 6, {"is_arch_visible": True}),
+         ("work@TLB.sink_b", "output", 52, {"is_arch_visible": True}),
+         ("work@TLB.whole", "net", 64, {})],
+        [("work@TLB.set_idx", "work@TLB.sink_a", False),
+         ("work@TLB.tag", "work@TLB.sink_b", False),
+         ("work@TLB.va", "work@TLB.whole", False)],
+    )
+    g.add_edge(0, 1, attrs={"src_bits": (6, 11), "bits_aligned": True})
+    g.add_edge(0, 2, attrs={"src_bits": (12, 63)})
+    return g
+
+
+def test_interval_set_ops():
+    a = IntervalSet([(0, 3), (8, 11), (4, 5)])
+    assert a.spans == ((0, 5), (8, 11)) and a.count == 10
+    b = IntervalSet.of(4, 9)
+    assert (a & b).spans == ((4, 5), (8, 9))
+    assert (a - b).spans == ((0, 3), (10, 11))
+    assert (a | b) == IntervalSet.of(0, 11)
+    assert (IntervalSet.of(2, 5).shift(-2)) == IntervalSet.of(0, 3)
+    assert 9 in a and 6 not in a and not IntervalSet()
+
+
+def test_interval_set_ops_random():
+    rnd = random.Random(3)
+    for _ in range(200):
+        xs = [set() for _ in range(2)]
+        sets = []
+        for bits in xs:
+            spans = []
+            for _ in range(rnd.randrange(4)):
+                lo = rnd.randrange(40)
+                hi = lo + rnd.randrange(6)
+                spans.append((lo, hi))
+                bits.update(range(lo, hi + 1))
+            sets.append(IntervalSet(spans))
+        a, b = sets
+
+        def _bits(s):
+            return {i for lo, hi in s for i in range(lo, hi + 1)}
+
+        assert _bits(a & b) == xs[0] & xs[1]
+        assert _bits(a - b) == xs[0] - xs[1]
+        assert _bits(a | b) == xs[0] | xs[1]
+
+
+def test_partial_source_bits_prune_false_paths():
+    g = _bit_graph()
+    # 只污染 va 的页内偏移 [11:6]：只能流到 set_idx 的全部 6 位
+    reach = propagate_bits(g, {0: (6, 11)})
+    assert reach.bits[1] == IntervalSet.of(0, 5)
+    assert 2 not in reach and 4 not in reach
+    assert reach.bits[5] == IntervalSet.full(64)
+
+    # va[7] 经对齐边只到 set_idx[1]
+    reach = propagate_bits(g, {0: IntervalSet.of(7)})
+    assert reach.bits[1] == IntervalSet.of(1)
+
+    # 整个 va：两条分支都可达
+    reach = propagate_bits(g, [0])
+    assert {1, 2, 3, 4} <= set(reach.bits)
+
+
+def test_without_bit_attrs_matches_bfs(make_random_graph):
+    g = make_random_graph(150, 500, seed=11)
+    adj = RmmgQueryEngine(g).build_adj_list()
+    dist = {0: 1, 1: 1}
+    frontier = [0, 1]
+    while frontier:
+        nxt = []
+        for u in frontier:
+            for v in adj.get(u, ()):
+                if v not in dist:
+                    dist[v] = dist[u] + 1
+                    nxt.append(v)
+        frontier = nxt
+    reach = propagate_bits(g, [0, 1])
+    assert set(reach.bits) == set(dist)
+    assert all(len(reach.path_to(v)) == d for v, d in dist.items())
+
+
+def test_destination_bits_feed_later_slices():
+    # a[3:0] -> b[7:4]（对齐），b[5:4] -> c；b[1:0] -> d：只有 c 可达
+    g = RmmgGraph()
+    for name, w in (("a", 4), ("b", 8), ("c", 2), ("d", 2)):
+        g.add_node(f"work@M.{name}", "net", w)
+    g.add_edge(0, 1, attrs={"src_bits": (0, 3), "dst_bits": (4, 7), "bits_aligned": True})
+    g.add_edge(1, 2, attrs={"src_bits": (4, 5), "bits_aligned": True})
+    g.add_edge(1, 3, attrs={"src_bits": (0, 1), "bits_aligned": True})
+    reach = propagate_bits(g, [0])
+    assert reach.bits[1] == IntervalSet.of(4, 7)
+    assert reach.bits[2] == IntervalSet.of(0, 1)
+    assert 3 not in reach
+    assert propagate_bits(g, {0: (2, 3)}).bits[1] == IntervalSet.of(6, 7)
+
+
+def test_query_bits():
+    g = _bit_graph()
+    engine = RmmgQueryEngine(g)
+    engine.enable_profiling()
+    paths = engine.query_bits(engine.pred_micro_state(), engine.pred_arch_visible(),
+                              source_bits=(6, 11))
+    assert [p[-1] for p in paths] == [3]
+    assert paths.bits[3] == IntervalSet.full(6)
+    assert engine.last_profile.query == "query_bits"
+    full = engine.query_bits(engine.pred_micro_state(), engine.pred_arch_visible())
+    assert sorted(p[-1] for p in full) == [3, 4]
+
+
+def test_select_offsets_non_zero_lsb():
+    from rtl_fingerprint.rmmg.bits import select_offsets
+
+    # logic [31:16] x; x[23:20] 是从 LSB 数第 4..7 位
+    assert select_offsets((20, 23), (31, 16), 16) == (4, 7)
+    # logic [0:7] y（升序）；y[0:3] 是高 4 位
+    assert select_offsets((0, 3), (0, 7), 8) == (4, 7)
+    assert select_offsets((7, 7), (0, 7), 8) == (0, 0)
+    # 越界 / 声明未知 -> 整个信号
+    assert select_offsets((40, 41), (31, 16), 16) is None
+    assert select_offsets((2, 3), None, 8) is None
+
+    # x[23:20] -> z（4 位，对齐）：换算后的边不会被丢掉
+    g = RmmgGraph()
+    g.add_node("work@M.x", "net", 16)
+    g.add_node("work@M.z", "net", 4)
+    g.add_edge(0, 1, attrs={"src_bits": select_offsets((20, 23), (31, 16), 16),
+                            "bits_aligned": True})
+    assert propagate_bits(g, [0]).bits[1] == IntervalSet.full(4)
+    assert propagate_bits(g, {0: (5, 5)}).bits[1] == IntervalSet.of(1)
+    assert 1 not in propagate_bits(g, {0: (8, 15)})
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from rtl_fingerprint.rmmg.budget import CancelToken, QueryBudget, QueryResult
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+
+@pytest.fixture
+def big_engine(make_random_graph):
+    return RmmgQueryEngine(make_random_graph(n=3000, e=12000, seed=4))
+
+
+def test_unbudgeted_query_is_complete(big_engine):
+    res = big_engine.bfs_paths([0], range(2900, 3000), max_depth=100)
+    assert not res.truncated and res.reason is None and res.frontier_left == 0
+    assert res.expanded > 0
+
+
+@pytest.mark.parametrize("backend", ["python", "numpy"])
+def test_max_expanded_returns_partial_results(big_engine, backend):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    full = big_engine.bfs_paths([0], range(2000, 3000), max_depth=100, backend=backend)
+    part = big_engine.bfs_paths([0], range(2000, 3000), max_depth=100, backend=backend,
+                                budget=QueryBudget(max_expanded=50, check_every=16))
+    assert part.truncated and part.reason == "max_expanded"
+    assert part.expanded <= 50 and part.frontier_left > 0
+    assert len(part) < len(full)
+    assert all(p in full or len(p) <= part.depth_reached for p in part)
+
+
+def test_deadline_and_memory(big_engine):
+    res = big_engine.bfs_paths([0], range(2000, 3000), budget=QueryBudget(deadline_s=0.0))
+    assert res.truncated and res.reason == "deadline"
+    res = big_engine.bfs_paths([0], range(2000, 3000), max_depth=100,
+                               budget=QueryBudget(max_memory_bytes=2000, check_every=1))
+    assert res.truncated and res.reason == "max_memory"
+
+
+def test_cancel_token(big_engine):
+    token = CancelToken()
+    token.cancel("user abort")
+    res = big_engine.query_custom(lambda n: n.id == 0, lambda n: n.id > 2000, cancel=token)
+    assert res.truncated and res.reason == "user abort" and len(res) == 0
+
+
+def test_cancel_on_signal(big_engine):
+    import os
+    import signal
+
+    token = CancelToken()
+    with token.on_signal(signal.SIGUSR1):
+        os.kill(os.getpid(), signal.SIGUSR1)
+        res = big_engine.bfs_paths([0], range(2000, 3000), cancel=token)
+    assert res.truncated and res.reason == "signal SIGUSR1"
+    assert threading.current_thread() is threading.main_thread()
+
+
+def test_canned_queries_take_budget_and_return_query_result(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    token = CancelToken()
+    token.cancel()
+    cut = engine.query_mshr_to_rob_commit(cancel=token)
+    assert isinstance(cut, QueryResult) and cut.truncated and cut.reason == "cancelled"
+    empty = engine.query_dcache_to_rob_data(budget=QueryBudget(max_expanded=1))
+    assert isinstance(empty, QueryResult) and empty == [] and not empty.truncated
+    none = engine.query_custom(engine.pred_hier_contains("nope"), engine.pred_arch_visible())
+    assert isinstance(none, QueryResult)
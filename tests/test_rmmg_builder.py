@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import sys
+import types
+
+import pytest
+
+from rtl_fingerprint.uhdm_compat import CachedVpi
+
+from test_uhdm_compat import _Obj, _fake_bindings
+
+# builder 用到的 VPI 常量（值互不相同即可）
+_CONSTS = {name: 10 + i for i, name in enumerate((
+    "vpiFullName", "vpiType", "vpiLowConn", "vpiHighConn", "vpiActual", "vpiTypespec",
+    "vpiRange", "vpiElement", "vpiNet", "vpiReg", "vpiLogicVar", "vpiMemory", "vpiRefObj",
+    "vpiModule", "vpiFile", "vpiLineNo", "vpiLeftRange", "vpiRightRange", "vpiDecompile",
+))}
+_MOD = "rtl_fingerprint.rmmg.builder"
+
+
+@pytest.fixture
+def builder(monkeypatch):
+    """builder 模块，uhdm 换成 test_uhdm_compat 的假 VPI；没装 uhdm 时用空模块顶替导入。"""
+    fresh = _MOD not in sys.modules
+    if importlib.util.find_spec("uhdm") is None:
+        monkeypatch.setitem(sys.modules, "uhdm", types.ModuleType("uhdm"))
+    mod = importlib.import_module(_MOD)
+    log = []
+    vpi = CachedVpi(_fake_bindings(log, **_CONSTS))
+    monkeypatch.setattr(mod, "uhdm", vpi)
+    monkeypatch.setattr(mod, "util", vpi.util)
+    mod._reset_build_caches()
+    monkeypatch.setattr(mod, "log", log, raising=False)
+    yield mod
+    mod._reset_build_caches()
+    if fresh:
+        sys.modules.pop(_MOD, None)
+
+
+def _scan_first_port(b, obj):
+    """改成索引之前的逐端口扫描：第一个 lowConn / highConn（或其 vpiActual）按对象或名字命中的端口。"""
+    u = b.uhdm
+    parent = u.vpi_handle(u.vpiParent, obj)
+    if parent is None:
+        return None
+    target_name = b._get_full_name(obj)
+    for port in b.util.vpi_iterate_gen(u.vpiPort, parent):
+        for tag in (u.vpiLowConn, u.vpiHighConn):
+            conn = u.vpi_handle(tag, port)
+            if conn is None:
+                continue
+            if conn is obj:
+                return port
+            if target_name and b._get_full_name(conn) == target_name:
+                return port
+            actual = u.vpi_handle(u.vpiActual, conn)
+            if actual is obj:
+                return port
+            if target_name and actual is not None and b._get_full_name(actual) == target_name:
+                return port
+    return None
+
+
+def _net(name, top, size=8):
+    return _Obj(name, parent=top, props={_CONSTS["vpiType"]: _CONSTS["vpiNet"],
+                                         2: size})
+
+
+def _ref(name, actual):
+    return _Obj(name, handles={_CONSTS["vpiActual"]: actual},
+                props={_CONSTS["vpiType"]: _CONSTS["vpiRefObj"]})
+
+
+def _port(name, top, low=None, high=None):
+    handles = {}
+    if low is not None:
+        handles[_CONSTS["vpiLowConn"]] = low
+    if high is not None:
+        handles[_CONSTS["vpiHighConn"]] = high
+    return _Obj(name, parent=top, handles=handles, props={_CONSTS["vpiType"]: 4, 2: 0})
+
+
+def test_port_index_matches_first_match_scan(builder, monkeypatch):
+    top = _Obj("top", props={_CONSTS["vpiType"]: _CONSTS["vpiModule"]})
+    a, b, c, d, e = (_net(f"top.{x}", top) for x in "abcde")
+    d_alias = _net("top.d", top)
+    top.children = [
+        _port("p0", top, low=_ref("r0", a), high=_Obj("x0")),   # 经 vpiActual 命中 a
+        _port("p1", top, low=b),                                # 对象本身命中 b
+        _port("p2", top, high=_Obj("top.c")),                   # highConn 只按名字命中 c
+        _port("p3", top, low=b),                                # b 连了多个端口
+        _port("p4", top, low=_ref("r4", b)),
+        _port("p5", top, low=d_alias),                          # 名字先命中 d …
+        _port("p6", top, high=d),                               # … 对象后命中 d
+    ]
+    monkeypatch.setattr(builder, "_width_port", lambda port: port.name)
+
+    expect = {"top.a": "p0", "top.b": "p1", "top.c": "p2", "top.d": "p5", "top.e": None}
+    for obj in (a, b, c, d, d_alias, e, _Obj("orphan")):
+        want = _scan_first_port(builder, obj)
+        got = builder._width_via_parent_port(obj)
+        assert got == (want.name if want is not None else None)
+        if obj.parent is top:
+            assert got == expect[obj.name]
+
+    # 同一实例的端口只扫一遍
+    iterations = [rec for rec in builder.log if rec[0] == "iterate" and rec[2] == "top"]
+    assert len(iterations) == 1
+
+
+def test_width_cache_skips_results_under_port_guard(builder):
+    top = _Obj("top", props={_CONSTS["vpiType"]: _CONSTS["vpiModule"]})
+    inner = _net("top.q", top, size=6)
+    port = _port("top.q_o", top, low=inner)
+    top.children = [port]
+
+    # 端口递归保护生效时得到的是截断的 1，不能进缓存
+    builder._PORT_RESOLVE_GUARD.add(builder._guard_key(port))
+    try:
+        assert builder._get_width(port) == 1
+        assert builder._get_width(inner) == 6
+    finally:
+        builder._PORT_RESOLVE_GUARD.clear()
+    assert not builder._WIDTH_CACHE
+
+    assert builder._get_width(port) == 6
+    calls = len(builder.log)
+    assert builder._get_width(port) == 6
+    assert len(builder.log) == calls and builder._WIDTH_CACHE
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+
+from rtl_fingerprint.rmmg.compressed import CompressedAdjacency, _get_varint, _put_varint
+from rtl_fingerprint.rmmg.graph import RmmgGraph
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+
+def _tiled_graph(tiles=6, per_tile=40):
+    """重复实例：每个 tile 内部相同的连接模式，相邻节点的后继表高度相似。"""
+    g = RmmgGraph()
+    for t in range(tiles):
+        for i in range(per_tile):
+            g.add_node(f"work@Tile{t}.s{i}", "reg" if i % 4 == 0 else "net", 8)
+    for t in range(tiles):
+        base = t * per_tile
+        for i in range(per_tile - 8):
+            for k in range(1, 8):
+                g.add_edge(base + i, base + i + k)
+        g.add_edge(base + per_tile - 1, (base + per_tile) % (tiles * per_tile))
+        g.add_edge(base, base + 1)          # 平行边
+    return g
+
+
+def test_varint_roundtrip():
+    buf = bytearray()
+    vals = [0, 1, 127, 128, 300, 1 << 35]
+    for v in vals:
+        _put_varint(buf, v)
+    pos, out = 0, []
+    for _ in vals:
+        v, pos = _get_varint(buf, pos)
+        out.append(v)
+    assert out == vals and pos == len(buf)
+
+
+@pytest.mark.parametrize("cache_blocks", [0, 2])
+@pytest.mark.parametrize("reverse", [False, True])
+def test_decode_matches_csr(make_random_graph, cache_blocks, reverse):
+    g = make_random_graph(300, 1500, seed=5)
+    csr = g.freeze()
+    adj = CompressedAdjacency.from_csr(csr, reverse=reverse, block_size=16,
+                                       cache_blocks=cache_blocks)
+    for u in range(csr.num_nodes):
+        want = sorted(set(csr.predecessors(u) if reverse else csr.successors(u)))
+        assert adj.successors(u) == want
+        assert list(adj.iter_successors(u)) == want
+    assert adj.get(-1, "x") == "x"
+
+
+def test_reference_compression_shrinks_tiled_graph():
+    g = _tiled_graph()
+    csr = g.freeze()
+    plain = CompressedAdjacency.from_csr(csr, window=0)
+    ref = CompressedAdjacency.from_csr(csr)
+    assert len(ref.data) < len(plain.data)
+    assert ref.stats(csr)["ratio"] > 2
+    for u in range(csr.num_nodes):
+        assert ref.successors(u) == plain.successors(u) == sorted(set(csr.successors(u)))
+
+
+def test_engine_bfs_on_compressed(make_random_graph):
+    g = make_random_graph(200, 800, seed=9)
+    engine = RmmgQueryEngine(g)
+    want = engine.bfs_paths([0, 3], range(100, 200), max_depth=20)
+    fresh = RmmgQueryEngine(g)
+    adj = fresh.use_compressed_adjacency(block_size=8, cache_blocks=4)
+    assert fresh.build_adj_list() is adj
+    got = fresh.bfs_paths([0, 3], range(100, 200), max_depth=20)
+    assert sorted((p[-1], len(p)) for p in got) == sorted((p[-1], len(p)) for p in want)
+    for p in got:
+        assert all(b in g.freeze().successors(a) for a, b in zip(p, p[1:]))
+    assert adj.cache_hits > 0
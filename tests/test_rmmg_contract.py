@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import random
+
+from rtl_fingerprint.rmmg.contract import contract_passthrough, contract_pipelines
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+from conftest import build_graph
+
+
+def _pipeline_graph():
+    """meta_tag 经两级流水寄存器到分叉点，再分两路到 Rob；t1 / s2 改变位宽，不收缩。"""
+    nodes = [
+        ("work@MSHR.meta_tag", "reg", 20, {"is_micro_state": True}),
+        ("work@P.s0", "reg", 20, {}),
+        ("work@P.s1", "reg", 20, {}),
+        ("work@P.s2", "reg", 8, {}),       # 截位：不是纯转发，保留
+        ("work@P.t0", "reg", 20, {}),
+        ("work@P.t1", "reg", 8, {}),       # 位宽变化：不是纯转发
+        ("work@P.fork", "net", 20, {}),
+        ("work@Rob.io_commit_data", "output", 20, {"is_arch_visible": True}),
+    ]
+    edges = [
+        ("work@MSHR.meta_tag", "work@P.s0", True),
+        ("work@P.s0", "work@P.s1", True),
+        ("work@P.s1", "work@P.fork", False),
+        ("work@P.fork", "work@P.t0", True),
+        ("work@P.t0", "work@P.t1", True),
+        ("work@P.t1", "work@Rob.io_commit_data", False),
+        ("work@P.fork", "work@P.s2", True),
+        ("work@P.s2", "work@Rob.io_commit_data", False),
+    ]
+    return build_graph(nodes, edges)
+
+
+def test_chain_contraction_and_expansion():
+    g = _pipeline_graph()
+    engine = RmmgQueryEngine(g)
+    c = engine.contract_pipelines()
+    names = {n.hier_name for n in c.graph.nodes.values()}
+    assert "work@P.s0" not in names and "work@P.s1" not in names and "work@P.t0" not in names
+    assert {"work@P.s2", "work@P.t1", "work@P.fork"} <= names
+    assert c.absorbed == 3 and len(g.nodes) == 8
+
+    meta = c.new_of[g.get_node_id("work@MSHR.meta_tag")]
+    fork = c.new_of[g.get_node_id("work@P.fork")]
+    (e,) = [e for e in c.graph.edges if (e.src, e.dst) == (meta, fork)]
+    assert e.is_seq and e.attrs["delay"] == 2
+    assert [g.nodes[v].hier_name for v in e.attrs["members"]] == ["work@P.s0", "work@P.s1"]
+
+    ce = RmmgQueryEngine(c.graph)
+    paths = ce.query_custom(ce.pred_micro_state(), ce.pred_arch_visible())
+    assert len(paths[0]) == 4          # meta -> fork -> s2 -> Rob
+    full = c.expand_path(paths[0])
+    assert full == engine.query_custom(engine.pred_micro_state(), engine.pred_arch_visible())[0]
+    assert [g.nodes[v].hier_name for v in full][:3] == [
+        "work@MSHR.meta_tag", "work@P.s0", "work@P.s1"]
+
+
+def test_contraction_preserves_reachability(make_random_graph):
+    g = make_random_graph(n=200, e=400, seed=2)
+    rnd = random.Random(2)
+    for k in range(40):                 # 插入长度 1~4 的流水线
+        a, b = rnd.randrange(200), rnd.randrange(200)
+        prev = a
+        for i in range(rnd.randint(1, 4)):
+            r = g.add_node(f"work@Pipe.r{k}_{i}", "reg", g.nodes[a].width)
+            g.add_edge(prev, r, is_seq=True)
+            prev = r
+        g.add_edge(prev, b)
+    c = RmmgQueryEngine(g).contract_pipelines()
+    assert c.absorbed >= 40
+    succ = {(e.src, e.dst) for e in g.edges}
+    kept = [v for v in range(200) if c.new_of[v] >= 0]
+    sources, targets = kept[:10], kept[-60:]
+    orig = RmmgQueryEngine(g).bfs_paths(sources, targets, max_depth=400)
+    small = RmmgQueryEngine(c.graph).bfs_paths([c.new_of[v] for v in sources],
+                                               [c.new_of[v] for v in targets], max_depth=400)
+    assert sorted(c.orig_of[p[-1]] for p in small) == sorted(p[-1] for p in orig)
+    for p in c.expand_paths(small):
+        assert all((a, b) in succ for a, b in zip(p, p[1:]))
+
+
+def _port_graph():
+    """Top.a 经端口桥接进子模块，子模块输出再经端口桥接回 Top.b；Top.a 还有别的读者。"""
+    g = build_graph(
+        [("work@Top.src", "reg", 8, {"is_micro_state": True}),
+         ("work@Top.a", "net", 8, {}),
+         ("work@Top.u.in", "input", 8, {}),
+         ("work@Child.in", "net", 8, {}),
+         ("work@Child.q", "reg", 8, {}),
+         ("work@Child.out", "net", 8, {}),
+         ("work@Top.u.out", "output", 8, {}),
+         ("work@Top.b", "net", 8, {}),
+         ("work@Top.other", "net", 8, {}),
+         ("work@Top.io_commit", "output", 8, {"is_arch_visible": True})],
+        [("work@Top.src", "work@Top.a", False),
+         ("work@Top.a", "work@Top.other", False),
+         ("work@Child.in", "work@Child.q", True),
+         ("work@Child.q", "work@Child.out", False),
+         ("work@Top.b", "work@Top.io_commit", False)],
+    )
+    port = [("work@Top.a", "work@Top.u.in"), ("work@Top.u.in", "work@Child.in"),
+            ("work@Child.out", "work@Top.u.out"), ("work@Top.u.out", "work@Top.b")]
+    for a, b in port:
+        g.add_edge(g.get_node_id(a), g.get_node_id(b), attrs={"role": "port"})
+    return g
+
+
+def test_passthrough_merges_port_aliases(capsys):
+    g = _port_graph()
+    engine = RmmgQueryEngine(g)
+    c = engine.contract_passthrough()
+    assert len(c.graph.nodes) == 6
+    assert c.alias_table() == {
+        "work@Top.a": ["work@Top.u.in", "work@Child.in"],
+        "work@Child.out": ["work@Top.u.out", "work@Top.b"],
+    }
+
+    ce = RmmgQueryEngine(c.graph)
+    paths = ce.query_custom(ce.pred_micro_state(), ce.pred_arch_visible())
+    assert len(paths[0]) == 5          # 原图 9 个节点：src, a, q, out, commit
+    full = c.expand_path(paths[0])
+    assert full == engine.query_custom(engine.pred_micro_state(), engine.pred_arch_visible())[0]
+
+    capsys.readouterr()
+    ce.pretty_print_paths(paths)
+    assert "aka work@Top.u.in, work@Child.in" in capsys.readouterr().out
+
+
+def test_stacked_contractions_expand_to_original():
+    g = _port_graph()
+    q = g.get_node_id("work@Child.q")
+    g.nodes[q].attrs.clear()             # q 单入单出：流水线收缩会把它收进边里
+    g.nodes[q].attrs.update(module_path="work@Child", signal_name="q")
+    c1 = contract_passthrough(g)
+    c2 = contract_pipelines(c1)          # 在上一步的收缩图上继续收缩
+    assert c2.root is g and c2.absorbed == 1
+    ce = RmmgQueryEngine(c2.graph)
+    (path,) = ce.query_custom(ce.pred_micro_state(), ce.pred_arch_visible())
+    assert len(path) == 4
+    assert [g.nodes[v].hier_name for v in c2.expand_path(path)] == [
+        "work@Top.src", "work@Top.a", "work@Top.u.in", "work@Child.in", "work@Child.q",
+        "work@Child.out", "work@Top.u.out", "work@Top.b", "work@Top.io_commit"]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pytest
+
+from conftest import build_graph
+
+from rtl_fingerprint.rmmg.dominators import (
+    common_dominators, common_post_dominators, dominator_tree,
+)
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+
+def _reaches_without(csr, sources, sink, removed):
+    seen = {s for s in sources if s != removed}
+    stack = list(seen)
+    while stack:
+        u = stack.pop()
+        for v in csr.successors(u):
+            if v != removed and v not in seen:
+                seen.add(v)
+                stack.append(v)
+    return sink in seen
+
+
+def test_mshr_choke_points(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    name = lambda ids: [mshr_graph.nodes[v].hier_name for v in ids]
+    chokes = engine.choke_points(engine.pred_hier_startswith("work@MSHR.meta_"),
+                                 engine.pred_arch_visible())
+    assert len(chokes) == 2
+    for sink, chain in chokes.items():
+        assert name(chain) == ["work@MSHR.io_resp", "work@LSU.ldq_addr", "work@LSU.io_out"]
+
+    tag = mshr_graph.get_node_id("work@MSHR.meta_tag")
+    sinks = engine.find_nodes(engine.pred_arch_visible())
+    assert name(engine.common_post_dominators(tag, sinks)) == \
+        ["work@MSHR.io_resp", "work@LSU.ldq_addr", "work@LSU.io_out"]
+
+
+@pytest.mark.parametrize("seed", [3, 11])
+def test_dominators_match_brute_force(make_random_graph, seed):
+    g = make_random_graph(n=120, e=260, seed=seed)
+    csr = g.freeze()
+    sources = [0, 1, 2]
+    tree = dominator_tree(g, sources)
+    assert dominator_tree(g, sources) is tree      # 缓存命中
+    for sink in range(3, 120):
+        if not tree.reachable(sink):
+            continue
+        expect = [d for d in range(120) if d != sink
+                  and not _reaches_without(csr, sources, sink, d)]
+        assert sorted(common_dominators(g, sources, sink)) == expect
+    assert common_post_dominators(g, 0, [0]) == []
+
+
+def test_choke_points_keep_sinks_without_choke_point():
+    # a -> c，b -> c：c 从两个源都可达，没有 choke point；d 不可达
+    g = build_graph(
+        [("work@M.a", "reg", 1, {"is_micro_state": True}),
+         ("work@M.b", "reg", 1, {"is_micro_state": True}),
+         ("work@M.c", "output", 1, {"is_arch_visible": True}),
+         ("work@M.d", "output", 1, {"is_arch_visible": True})],
+        [("work@M.a", "work@M.c", False), ("work@M.b", "work@M.c", False)],
+    )
+    assert RmmgQueryEngine(g).choke_points() == {2: []}
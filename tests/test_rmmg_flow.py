@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from rtl_fingerprint.ablation import AblationGenerator
+from rtl_fingerprint.rmmg.flow import max_flow_min_cut
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+
+def _disconnected(csr, sources, sinks, removed):
+    seen = set(s for s in sources if s not in removed)
+    stack = list(seen)
+    while stack:
+        u = stack.pop()
+        for v in csr.successors(u):
+            if v not in seen and v not in removed:
+                seen.add(v)
+                stack.append(v)
+    return not (seen & set(sinks))
+
+
+def test_mshr_bottleneck_is_narrowest_stage(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    res = engine.max_flow(engine.pred_hier_startswith("work@MSHR.meta_"),
+                          engine.pred_arch_visible())
+    # meta_tag(20) + meta_state(4) 汇入 io_resp(20)，之后 ldq_addr(40) / io_out(40)
+    assert res.value == 20
+    names = {mshr_graph.nodes[v].hier_name for v in res.cut_nodes}
+    assert names == {"work@MSHR.io_resp"}
+
+    ab = AblationGenerator()
+    ab.add_cut(mshr_graph, res.cut_nodes)
+    assert "SEVER = work@MSHR.io_resp    ; width=20" in ab.lines
+
+
+def test_cut_is_valid_and_tight(make_random_graph):
+    g = make_random_graph(n=400, e=1100, seed=12)
+    csr = g.freeze()
+    sources, sinks = list(range(0, 40)), list(range(360, 400))
+    res = max_flow_min_cut(csr, sources, sinks)
+    assert res.value > 0
+    assert _disconnected(csr, sources, sinks, set(res.cut_nodes))
+    assert sum(max(csr.width[v], 1) for v in res.cut_nodes) == res.value
+
+
+def test_unreachable_sinks_have_zero_flow(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    res = engine.max_flow(engine.pred_hier_startswith("work@Rob."),
+                          engine.pred_hier_startswith("work@MSHR."))
+    assert res.value == 0 and res.cut_nodes == []
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from rtl_fingerprint.rmmg.hubs import HubPolicy, detect_hubs
+from rtl_fingerprint.rmmg.masks import NodeClass, TraversalMask, graph_classes, masked_view
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+from rtl_fingerprint.rmmg.rpq import NodeLabel
+
+from conftest import build_graph
+
+
+def _star_graph(fanout=400):
+    """clock 扇出到一排寄存器，另有一条 a -> r0 -> out 的正常数据通路。"""
+    nodes = [("work@T.clock", "input", 1, {}), ("work@T.en", "net", 1, {}),
+             ("work@T.a", "input", 8, {}), ("work@T.out", "output", 8, {})]
+    nodes += [(f"work@T.r{i}", "reg", 8, {}) for i in range(fanout)]
+    edges = [("work@T.clock", f"work@T.r{i}", False) for i in range(fanout)]
+    edges += [("work@T.en", f"work@T.r{i}", False) for i in range(0, fanout, 50)]
+    edges += [("work@T.a", "work@T.r0", True), ("work@T.r0", "work@T.out", False)]
+    return build_graph(nodes, edges)
+
+
+def test_detect_hubs_thresholds_and_lists():
+    g = _star_graph()
+    report = detect_hubs(g, HubPolicy(min_degree=100))
+    assert [g.nodes[v].hier_name for v in report.hubs] == ["work@T.clock"]
+    assert report.reasons[report.hubs[0]] == "degree"
+    assert report.out_degree["max"] == 400
+
+    report = detect_hubs(g, HubPolicy(min_degree=1000, deny=("work@T.en",)))
+    names = {g.nodes[v].hier_name: report.reasons[v] for v in report.hubs}
+    assert names == {"work@T.clock": "clock_reset", "work@T.en": "deny"}
+
+    detect_hubs(g, HubPolicy(min_degree=1000, allow=("*.clock",)))
+    assert not g.nodes[g.get_node_id("work@T.clock")].attrs["is_hub"]
+
+
+def test_hub_pruning_is_reported():
+    g = _star_graph()
+    engine = RmmgQueryEngine(g)
+    engine.detect_hubs(HubPolicy(min_degree=100))
+    clock = [g.get_node_id("work@T.clock")]
+    regs = engine.find_nodes(engine.pred_hier_startswith("work@T.r"))
+
+    full = engine.bfs_paths(clock, regs, max_depth=3)
+    assert len(full) == 400 and full.pruned_nodes == 0
+
+    for backend in ("python", "numpy", "astar"):
+        held = engine.bfs_paths(clock, regs, max_depth=3, backend=backend,
+                                mask=TraversalMask.hubs("terminal"))
+        assert held == [] and held.pruned_nodes == 1 and held.pruned_edges == 400
+
+    a = engine.pred_hier_startswith("work@T.a")
+    out = engine.pred_hier_startswith("work@T.out")
+    assert len(engine.query_custom(a, out, hubs="skip")) == 1
+
+
+def test_detect_hubs_invalidates_attrs_caches_only():
+    g = _star_graph()
+    csr = g.freeze()
+    label = NodeLabel(NodeClass.HUB)
+    before = (graph_classes(g), label.table(g), masked_view(g, TraversalMask.hubs()))
+    assert not any(before[1])
+
+    detect_hubs(g, HubPolicy(min_degree=100))
+    after = (graph_classes(g), label.table(g), masked_view(g, TraversalMask.hubs()))
+    assert all(a is not b for a, b in zip(after, before))
+    assert after[1][g.get_node_id("work@T.clock")] == 1
+    assert g.freeze() is csr               # 结构没变，CSR 不重建
+
+    # 登记 attrs=True 的任意缓存都随 invalidate_attrs() 失效
+    stamp = g.cached("custom", object, attrs=True)
+    assert g.cached("custom", object, attrs=True) is stamp
+    g.invalidate_attrs()
+    assert g.cached("custom", object, attrs=True) is not stamp
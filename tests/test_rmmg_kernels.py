@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rtl_fingerprint.rmmg.kernels import level_bfs
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+
+def _python_dist(g, sources):
+    csr = g.freeze()
+    dist = {s: 0 for s in sources}
+    frontier = list(dist)
+    while frontier:
+        nxt = []
+        for u in frontier:
+            for v in csr.successors(u):
+                if v not in dist:
+                    dist[v] = dist[u] + 1
+                    nxt.append(v)
+        frontier = nxt
+    return dist
+
+
+@pytest.mark.parametrize("opt,alpha", [(False, 14.0), (True, 14.0), (True, 1e9)])
+def test_level_bfs_distances_match_python(make_random_graph, opt, alpha):
+    g = make_random_graph(n=400, e=2000, seed=3)
+    sources = [0, 5, 17]
+    res = level_bfs(g, sources, direction_optimizing=opt, alpha=alpha)
+    expected = _python_dist(g, sources)
+    assert {int(v): int(res.dist[v]) for v in res.reached()} == expected
+    succ = g.freeze().successors
+    for v in expected:
+        path = res.path_to(v)
+        assert len(path) - 1 == expected[v] and path[0] in sources
+        assert all(b in list(succ(a)) for a, b in zip(path, path[1:]))
+    if not opt:
+        assert res.bottomup_steps == 0
+    elif alpha > 1e6:
+        assert res.bottomup_steps > 0
+
+
+def test_numpy_backend_matches_python_paths(make_random_graph):
+    g = make_random_graph(n=500, e=1500, seed=11)
+    engine = RmmgQueryEngine(g)
+    sources = engine.find_nodes(lambda n: n.id % 37 == 0)
+    targets = list(range(300, 360))
+    for depth in (1, 3, 6, 50):
+        py = engine.bfs_paths(sources, targets, max_depth=depth)
+        vec = engine.bfs_paths(sources, targets, max_depth=depth, backend="numpy")
+        assert {p[-1]: len(p) for p in py} == {p[-1]: len(p) for p in vec}
+    assert len(engine.bfs_paths(sources, targets, max_paths=4, backend="numpy")) == 4
+
+
+def test_reachable_respects_depth(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    src = engine.find_nodes(RmmgQueryEngine.pred_hier_startswith("work@MSHR.meta_"))
+    res = engine.reachable(src, max_depth=2)
+    names = {mshr_graph.nodes[int(v)].hier_name for v in res.reached()}
+    assert "work@LSU.ldq_addr" in names
+    assert "work@LSU.io_out" not in names
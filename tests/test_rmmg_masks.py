@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import pytest
+
+from rtl_fingerprint.rmmg.graph import RmmgGraph
+from rtl_fingerprint.rmmg.dominators import common_dominators
+from rtl_fingerprint.rmmg.flow import max_flow_min_cut
+from rtl_fingerprint.rmmg.masks import (
+    EdgeClass, NodeClass, TraversalMask, compile_mask, graph_classes, masked_view,
+)
+from rtl_fingerprint.rmmg.pathcount import path_stats
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+from rtl_fingerprint.rmmg.scc import condensation
+from rtl_fingerprint.rmmg.taint import leakage_matrix
+
+from conftest import build_graph
+
+
+def _filtered_graph(g, mask):
+    """参考实现：真的复制一张去掉被屏蔽边的图。"""
+    cls = graph_classes(g)
+    h = RmmgGraph()
+    for v in range(len(g.nodes)):
+        n = g.nodes[v]
+        h.add_node(n.hier_name, n.kind, n.width)
+    for eid, e in enumerate(g.edges):
+        if cls.edge_class[eid] & mask.exclude_edges:
+            continue
+        if cls.node_class[e.dst] & mask.exclude_nodes:
+            continue
+        if cls.node_class[e.src] & mask.terminal_nodes:
+            continue
+        h.add_edge(e.src, e.dst, is_seq=e.is_seq)
+    return h
+
+
+def test_mshr_masks(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    src = engine.pred_hier_startswith("work@MSHR.meta_")
+    dst = engine.pred_arch_visible()
+    assert len(engine.query_custom(src, dst)) == 2
+    assert engine.query_custom(src, dst, mask=TraversalMask.comb_only()) == []
+
+    clk = engine.pred_hier_startswith("work@LSU.clock")
+    assert len(engine.query_custom(clk, dst)) == 2
+    for backend in ("python", "numpy", "astar"):
+        assert engine.query_custom(clk, dst, backend=backend,
+                                   mask=TraversalMask.no_clock_reset()) == []
+
+    # micro_state 作为终点：到达 ldq_addr 后不再往下走
+    stop = TraversalMask(terminal_nodes=NodeClass.MICRO_STATE)
+    assert engine.query_custom(src, dst, mask=stop) == []
+    assert engine.query_within_cycles(src, dst, k=3, mask=stop) == []
+    assert len(engine.query_within_cycles(src, dst, k=3)) == 2
+
+
+def test_memory_roles_and_json(tmp_path):
+    g = build_graph(
+        [("work@C.raddr", "net", 6, {}), ("work@C.wdata", "net", 64, {}),
+         ("work@C.data", "memory", 64, {}), ("work@C.rdata", "net", 64, {})],
+        [("work@C.wdata", "work@C.data", True), ("work@C.data", "work@C.rdata", False)],
+    )
+    g.add_edge(g.get_node_id("work@C.raddr"), g.get_node_id("work@C.rdata"),
+               attrs={"role": "addr"})
+    path = tmp_path / "g.json"
+    g.save_json(str(path))
+    g = RmmgGraph.load_json(str(path))
+    assert g.edges[2].attrs == {"role": "addr"}
+
+    cls = graph_classes(g)
+    assert cls.edge_class[0] & EdgeClass.TO_MEMORY and cls.edge_class[0] & EdgeClass.MEM_DATA
+    assert cls.edge_class[1] & EdgeClass.FROM_MEMORY
+    assert cls.edge_class[2] & EdgeClass.ADDR and not cls.edge_class[2] & EdgeClass.MEM_ADDR
+
+    engine = RmmgQueryEngine(g)
+    raddr = [g.get_node_id("work@C.raddr")]
+    rdata = [g.get_node_id("work@C.rdata")]
+    assert engine.bfs_paths(raddr, rdata, mask=TraversalMask(exclude_edges=EdgeClass.ADDR)) == []
+    assert compile_mask(g, TraversalMask()) is None
+
+
+@pytest.mark.parametrize("mask", [
+    TraversalMask.comb_only(),
+    TraversalMask(exclude_nodes=NodeClass.REG),
+    TraversalMask(terminal_nodes=NodeClass.NET) | TraversalMask.comb_only(),
+])
+def test_masked_backends_match_filtered_copy(make_random_graph, mask):
+    g = make_random_graph(n=300, e=900, seed=21)
+    ref = RmmgQueryEngine(_filtered_graph(g, mask))
+    engine = RmmgQueryEngine(g)
+    sources, targets = range(1, 40, 3), range(200, 300)
+    expect = {p[-1]: len(p) for p in ref.bfs_paths(sources, targets, max_depth=8)}
+    for backend in ("python", "numpy", "astar"):
+        got = engine.bfs_paths(sources, targets, max_depth=8, backend=backend, mask=mask)
+        assert {p[-1]: len(p) for p in got} == expect
+    assert compile_mask(g, mask) is compile_mask(g, mask)
+
+
+@pytest.mark.parametrize("mask", [
+    TraversalMask.comb_only(),
+    TraversalMask(exclude_nodes=NodeClass.REG),
+    TraversalMask(terminal_nodes=NodeClass.NET) | TraversalMask.comb_only(),
+])
+def test_masked_analyses_match_filtered_copy(make_random_graph, mask):
+    g = make_random_graph(n=200, e=500, seed=8)
+    ref = _filtered_graph(g, mask)
+    view = masked_view(g, mask)
+    assert masked_view(g, mask) is view and masked_view(g, None) is g
+    sources, sinks = list(range(1, 40, 3)), list(range(150, 200))
+
+    assert condensation(view).num_comps == condensation(ref).num_comps
+    assert path_stats(view, sources, sinks).total == path_stats(ref, sources, sinks).total
+    assert list(leakage_matrix(view, sources, sinks).pairs()) == \
+        list(leakage_matrix(ref, sources, sinks).pairs())
+    flow, expect = max_flow_min_cut(view.freeze(), sources, sinks), \
+        max_flow_min_cut(ref.freeze(), sources, sinks)
+    assert (flow.value, sorted(flow.cut_nodes)) == (expect.value, sorted(expect.cut_nodes))
+    for t in sinks[:10]:
+        assert common_dominators(view, sources, t) == common_dominators(ref, sources, t)
+
+
+def test_engine_analyses_take_mask(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    src = engine.pred_hier_startswith("work@MSHR.meta_")
+    comb = TraversalMask.comb_only()
+    assert engine.max_flow(src, engine.pred_arch_visible()).value == 20
+    assert engine.max_flow(src, engine.pred_arch_visible(), mask=comb).value == 0
+    assert engine.leakage_matrix(src, mask=comb).nnz == 0
+    assert engine.path_stats(src, mask=comb).total == 0
+    assert engine.choke_points(src, mask=comb) == {}
+    assert len(engine.choke_points(src)) == 2
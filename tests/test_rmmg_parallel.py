@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from rtl_fingerprint.rmmg.budget import CancelToken, QueryBudget, QueryResult
+from rtl_fingerprint.rmmg.masks import TraversalMask
+from rtl_fingerprint.rmmg.parallel import (ParallelQueryEngine, SharedCsrGraph,
+                                           merge_partition_paths)
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+
+def test_csr_matches_adj_list(make_random_graph):
+    g = make_random_graph()
+    csr = g.freeze()
+    adj = RmmgQueryEngine(g).build_adj_list()
+    for u in range(len(g.nodes)):
+        assert list(csr.get(u)) == adj.get(u, [])
+    assert g.freeze() is csr
+    g.add_edge(0, 1)
+    assert g.freeze() is not csr
+
+
+def test_shared_view_is_zero_copy(make_random_graph):
+    g = make_random_graph()
+    shared = SharedCsrGraph.create(g.freeze())
+    try:
+        other = SharedCsrGraph.attach(shared.meta)
+        assert isinstance(other.csr.indices, memoryview)
+        assert list(other.csr.successors(5)) == list(g.freeze().successors(5))
+        other.close()
+    finally:
+        shared.close()
+
+
+def test_parallel_bfs_matches_serial(make_random_graph):
+    g = make_random_graph()
+    engine = RmmgQueryEngine(g)
+    sources = list(range(0, 40))
+    targets = list(range(250, 300))
+    serial = engine.bfs_paths(sources, targets, max_depth=8)
+    with ParallelQueryEngine(g, workers=2) as pe:
+        par = pe.bfs_paths(sources, targets, max_depth=8, partitions=4)
+        assert {p[-1]: len(p) for p in par} == {p[-1]: len(p) for p in serial}
+        limited = pe.bfs_paths(sources, targets, max_depth=8, max_paths=5)
+        assert sorted(map(len, limited)) == sorted(map(len, serial))[:5]
+        many = pe.run_queries([([1], targets, 8, None), ([2], targets, 8, None)])
+        assert many[0] == engine.bfs_paths([1], targets, max_depth=8)
+        assert many[1] == engine.bfs_paths([2], targets, max_depth=8)
+
+
+def test_parallel_returns_query_result_with_stats(make_random_graph):
+    g = make_random_graph()
+    engine = RmmgQueryEngine(g)
+    sources, targets = list(range(0, 40)), list(range(250, 300))
+    mask = TraversalMask.comb_only()
+    with ParallelQueryEngine(g, workers=2) as pe:
+        par = pe.bfs_paths(sources, targets, max_depth=8, partitions=4)
+        assert isinstance(par, QueryResult) and not par.truncated
+        assert par.expanded > 0 and par.depth_reached >= max(map(len, par))
+
+        serial = engine.bfs_paths(sources, targets, max_depth=8, mask=mask)
+        masked = pe.bfs_paths(sources, targets, max_depth=8, partitions=4, mask=mask)
+        assert {p[-1]: len(p) for p in masked} == {p[-1]: len(p) for p in serial}
+        assert masked.pruned_edges > 0
+
+        capped = pe.bfs_paths(sources, targets, max_depth=8, partitions=4,
+                              budget=QueryBudget(max_expanded=3, check_every=1))
+        assert capped.truncated and capped.reason == "max_expanded"
+        assert capped.expanded <= 4 * 3
+
+        token = CancelToken()
+        token.cancel("stop")
+        stopped = pe.bfs_paths(sources, targets, max_depth=8, cancel=token)
+        assert stopped.truncated and stopped.reason == "stop"
+        # 取消只影响那一次调用
+        assert pe.run_queries([([1], targets, 8, None)])[0] == \
+            engine.bfs_paths([1], targets, max_depth=8)
+
+
+def test_merge_partition_paths_aggregates_stats():
+    a = QueryResult([[0, 5]], expanded=3, depth_reached=2, peak_frontier=4)
+    b = QueryResult([[1, 2, 6]], truncated=True, reason="deadline", expanded=7,
+                    depth_reached=3, peak_frontier=1)
+    res = merge_partition_paths([a, b])
+    assert res == [[0, 5], [1, 2, 6]]
+    assert (res.truncated, res.reason, res.expanded, res.depth_reached, res.peak_frontier) \
+        == (True, "deadline", 10, 3, 4)
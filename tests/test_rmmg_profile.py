@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+
+def test_profiling_off_by_default(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    engine.query_custom(engine.pred_micro_state(), engine.pred_arch_visible())
+    assert engine.profiler is None and engine.last_profile is None
+
+
+@pytest.mark.parametrize("backend", ["python", "numpy", "astar"])
+def test_query_custom_profile(mshr_graph, tmp_path, backend):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    engine = RmmgQueryEngine(mshr_graph)
+    log = tmp_path / "profile.jsonl"
+    engine.enable_profiling(log_path=str(log))
+    paths = engine.query_custom(engine.pred_micro_state(), engine.pred_arch_visible(),
+                                backend=backend)
+
+    prof = engine.last_profile
+    assert prof.query == "query_custom" and prof.params["backend"] == backend
+    assert (prof.sources, prof.targets) == (3, 2)
+    assert {"select", "index", "search"} <= set(prof.phases)
+    assert prof.total_s >= sum(prof.phases.values()) - 1e-9
+    assert prof.nodes_expanded > 0 and prof.edges_scanned > 0 and prof.peak_frontier > 0
+    assert prof.paths == len(paths) and prof.path_nodes == sum(map(len, paths))
+    assert "query_custom" in prof.explain()
+
+    # 同一个图再查一次：派生结构全部命中缓存，嵌套的 bfs_paths 不单独成记录
+    engine.query_custom(engine.pred_micro_state(), engine.pred_arch_visible(),
+                        backend=backend)
+    assert engine.last_profile.index_misses == 0
+    assert len(engine.profiler.records) == 2
+    lines = [json.loads(x) for x in log.read_text().splitlines()]
+    assert [x["query"] for x in lines] == ["query_custom", "query_custom"]
+
+
+def test_nested_and_direct_calls(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    engine.enable_profiling()
+    engine.bfs_paths([0], [6, 7])
+    assert engine.last_profile.query == "bfs_paths"
+    engine.max_flow()
+    assert engine.last_profile.query == "max_flow"
+    assert "search" in engine.last_profile.phases
+    engine.disable_profiling()
+    engine.bfs_paths([0], [6, 7])
+    assert engine.last_profile is None
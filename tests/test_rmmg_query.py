@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+
+
+def test_mshr_to_rob_commit_runs(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    paths = engine.query_mshr_to_rob_commit()
+    assert sorted(mshr_graph.nodes[p[-1]].hier_name for p in paths) == [
+        "work@Rob.io_commit_uops_0_data", "work@Rob.io_commit_valid"]
+    assert all(mshr_graph.nodes[p[0]].hier_name.startswith("work@MSHR.meta_") for p in paths)
+
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from rtl_fingerprint.rmmg.graph import RmmgGraph
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+from rtl_fingerprint.rmmg.quotient import quotient_graph
+
+
+def _many_modules(n_mod=40, per_mod=15, seed=9):
+    """模块 M0 -> M1 -> ... 主干，外加随机的旁支模块（大多连不到汇）。"""
+    rnd = random.Random(seed)
+    g = RmmgGraph()
+    for m in range(n_mod):
+        for i in range(per_mod):
+            nid = g.add_node(f"work@M{m}.s{i}", "net", 4)
+            g.nodes[nid].attrs.update(module_path=f"work@M{m}", signal_name=f"s{i}")
+    node = lambda m, i: m * per_mod + i
+    for m in range(n_mod):
+        for _ in range(per_mod * 2):
+            g.add_edge(node(m, rnd.randrange(per_mod)), node(m, rnd.randrange(per_mod)))
+    for m in range(9):
+        g.add_edge(node(m, rnd.randrange(per_mod)), node(m + 1, rnd.randrange(per_mod)))
+    for m in range(10, n_mod):
+        g.add_edge(node(rnd.randrange(10), rnd.randrange(per_mod)), node(m, 0))
+    return g
+
+
+def test_module_routes():
+    g = _many_modules()
+    qg = quotient_graph(g)
+    assert qg.num_modules == 40
+    src = qg.modules_of(range(15))                 # M0
+    dst = {qg.index["work@M9"]}
+    assert qg.route_modules(src, dst) == {qg.index[f"work@M{i}"] for i in range(10)}
+    assert qg.route_modules(src, dst, max_hops=8) == set()
+    assert qg.module_route(src, qg.index["work@M3"]) == ["work@M0", "work@M1", "work@M2",
+                                                         "work@M3"]
+
+
+@pytest.mark.parametrize("max_depth", [12, 30])
+def test_hierarchical_matches_flat(max_depth):
+    g = _many_modules()
+    engine = RmmgQueryEngine(g)
+    src = engine.pred_hier_startswith("work@M0.")
+    dst = engine.pred_hier_startswith("work@M9.")
+    flat = engine.query_custom(src, dst, max_depth=max_depth)
+    hier = engine.query_custom(src, dst, max_depth=max_depth, hierarchical=True)
+    assert {p[-1]: len(p) for p in hier} == {p[-1]: len(p) for p in flat}
+    assert hier.expanded < flat.expanded
+    assert hier.pruned_nodes > 0
+
+
+def test_hierarchical_on_random_graph(make_random_graph):
+    g = make_random_graph(n=300, e=700, seed=2)
+    engine = RmmgQueryEngine(g)
+    src = engine.pred_hier_startswith("work@M1.")
+    dst = engine.pred_hier_startswith("work@M5.")
+    for backend in ("python", "numpy", "astar"):
+        flat = engine.query_custom(src, dst, max_depth=6, backend=backend)
+        hier = engine.query_custom(src, dst, max_depth=6, backend=backend, hierarchical=True)
+        assert {p[-1]: len(p) for p in hier} == {p[-1]: len(p) for p in flat}
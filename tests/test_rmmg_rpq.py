@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from rtl_fingerprint.rmmg.masks import EdgeClass, NodeClass
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+from rtl_fingerprint.rmmg.rpq import NodeLabel, PathAutomaton, Step, rpq_paths_on
+
+from conftest import build_graph
+
+
+def _two_route_graph():
+    """meta 到 Rob 有两条路：短路经 LSU 的寄存器，长路经 PTW 的组合逻辑再过一个寄存器。"""
+    nodes = [
+        ("work@MSHR.meta_tag", "reg", 20, {}),
+        ("work@LSU.q", "reg", 20, {}),
+        ("work@PTW.a", "net", 20, {}),
+        ("work@PTW.b", "net", 20, {}),
+        ("work@PTW.r", "reg", 20, {}),
+        ("work@Rob.io_commit_data", "output", 20, {}),
+    ]
+    edges = [
+        ("work@MSHR.meta_tag", "work@LSU.q", True),
+        ("work@LSU.q", "work@Rob.io_commit_data", False),
+        ("work@MSHR.meta_tag", "work@PTW.a", False),
+        ("work@PTW.a", "work@PTW.b", False),
+        ("work@PTW.b", "work@Rob.io_commit_data", False),
+        ("work@PTW.a", "work@PTW.r", True),
+        ("work@PTW.r", "work@Rob.io_commit_data", False),
+    ]
+    return build_graph(nodes, edges)
+
+
+def _names(g, path):
+    return [g.nodes[v].hier_name.split("@")[1] for v in path]
+
+
+def test_waypoint_and_avoid():
+    g = _two_route_graph()
+    engine = RmmgQueryEngine(g)
+    src = engine.pred_hier_contains("meta_tag")
+    dst = engine.pred_hier_contains("io_commit")
+
+    # 不加约束：最短路经过 LSU
+    free = engine.query_rpq(src, dst, PathAutomaton.waypoints())
+    assert _names(g, free[0]) == ["MSHR.meta_tag", "LSU.q", "Rob.io_commit_data"]
+
+    # 不经过 LSU：走 PTW 的组合路径
+    no_lsu = PathAutomaton.waypoints(avoid=NodeLabel(module="*LSU"))
+    assert _names(g, engine.query_rpq(src, dst, no_lsu)[0]) == [
+        "MSHR.meta_tag", "PTW.a", "PTW.b", "Rob.io_commit_data"]
+
+    # 源之后至少一个寄存器，且不经过 LSU：只能走 PTW.r
+    auto = PathAutomaton.waypoints(
+        [Step(), NodeLabel(NodeClass.REG)], avoid=NodeLabel(module="*LSU"))
+    assert _names(g, engine.query_rpq(src, dst, auto)[0]) == [
+        "MSHR.meta_tag", "PTW.a", "PTW.r", "Rob.io_commit_data"]
+
+    # 边标签：必须经过一条时序边
+    seq = PathAutomaton.waypoints([EdgeClass.SEQ], avoid=NodeLabel(module="*LSU"))
+    assert len(engine.query_rpq(src, dst, seq)[0]) == 4
+
+    # 回避所有寄存器之后无路可走（源本身也是寄存器）
+    assert engine.query_rpq(src, dst, PathAutomaton.waypoints(
+        avoid=NodeLabel(NodeClass.REG))) == []
+
+
+def test_unconstrained_matches_bfs(make_random_graph):
+    g = make_random_graph()
+    engine = RmmgQueryEngine(g)
+    sources, targets = list(range(0, 20)), list(range(250, 300))
+    expect = engine.bfs_paths(sources, targets, max_depth=8)
+    got = rpq_paths_on(g, PathAutomaton.waypoints(), sources, targets, max_depth=8)
+    assert sorted(p[-1] for p in got) == sorted(p[-1] for p in expect)
+    assert sorted(map(len, got)) == sorted(map(len, expect))
+
+
+def test_state_revisits_allow_cycles():
+    """同一节点可以在不同自动机状态下各访问一次：b 要在经过 w 之后才接受。"""
+    g = build_graph(
+        [(f"work@T.{x}", "net", 1, {}) for x in "sabw"],
+        [("work@T.s", "work@T.a", False), ("work@T.a", "work@T.b", False),
+         ("work@T.a", "work@T.w", False), ("work@T.w", "work@T.a", False)],
+    )
+    auto = PathAutomaton.waypoints([NodeLabel(name="*.w")])
+    res = rpq_paths_on(g, auto, [g.get_node_id("work@T.s")], [g.get_node_id("work@T.b")])
+    assert _names(g, res[0]) == ["T.s", "T.a", "T.w", "T.a", "T.b"]
+
+
+def test_label_tables_cached_on_graph():
+    g = _two_route_graph()
+    label = NodeLabel(NodeClass.REG, module="*PTW")
+    tab = label.table(g)
+    assert list(tab) == [0, 0, 0, 0, 1, 0]
+    # 等值的标签命中同一张表
+    assert NodeLabel(NodeClass.REG, module="*PTW").table(g) is tab
+    # 图变更后重算
+    g.add_node("work@PTW.r2", "reg", 4)
+    tab2 = label.table(g)
+    assert tab2 is not tab and len(tab2) == len(g.nodes) and tab2[-1] == 1
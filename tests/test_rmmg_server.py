@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from rtl_fingerprint.rmmg.client import RmmgQueryClient, parse_pred_arg
+from rtl_fingerprint.rmmg.graph import RmmgGraph
+from rtl_fingerprint.rmmg.server import RmmgQueryServer
+
+
+@pytest.fixture
+def running_server(mshr_graph, tmp_path):
+    server = RmmgQueryServer(mshr_graph, max_workers=2)
+    sock = str(tmp_path / "rmmg.sock")
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def _run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start(socket_path=sock))
+        ready.set()
+        loop.run_forever()
+
+    t = threading.Thread(target=_run, daemon=True)
+    t.start()
+    ready.wait(5)
+    yield server, sock
+    # 让已断开的连接处理协程跑完，再停 loop
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    t.join(5)
+    server.close()
+
+
+def test_query_and_metrics_over_unix_socket(running_server):
+    server, sock = running_server
+    with RmmgQueryClient(socket_path=sock, timeout=5) as client:
+        assert client.ping() == "pong"
+        res = client.query(parse_pred_arg("exact:work@MSHR.meta_tag"),
+                           parse_pred_arg("prefix:work@Rob.io_commit_"), max_depth=10)
+        names = [[res["nodes"][str(n)]["name"] for n in p] for p in res["paths"]]
+        assert ["work@MSHR.meta_tag", "work@MSHR.io_resp", "work@LSU.ldq_addr",
+                "work@LSU.io_out", "work@Rob.io_commit_uops_0_data"] in names
+
+        with pytest.raises(RuntimeError):
+            client.request("nope")
+
+        stats = client.stats()
+        assert stats["nodes"] == len(server.graph.nodes)
+        assert stats["latency"]["query"]["count"] == 1
+        assert stats["latency"]["nope"]["errors"] == 1
+
+
+def test_concurrent_clients(running_server):
+    _, sock = running_server
+    results = []
+
+    def _worker():
+        with RmmgQueryClient(socket_path=sock, timeout=5) as client:
+            found = client.find({"type": "attr", "value": "is_arch_visible"})
+            results.append(sorted(n["name"] for n in found))
+
+    threads = [threading.Thread(target=_worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert len(results) == 8
+    assert all(r == ["work@Rob.io_commit_uops_0_data", "work@Rob.io_commit_valid"] for r in results)
+
+
+def test_graph_json_roundtrip(mshr_graph, tmp_path):
+    path = tmp_path / "g.json"
+    mshr_graph.save_json(str(path))
+    g = RmmgGraph.load_json(str(path))
+    assert g.summary() == mshr_graph.summary()
+    nid = g.get_node_id("work@MSHR.meta_tag")
+    assert g.nodes[nid].attrs["is_micro_state"] is True
+
+
+def _exchange(server, raw: bytes) -> bytes:
+    """起一个 TCP 服务，发一段原始字节（随后半关闭），读完整个回复。"""
+    async def _run() -> bytes:
+        await server.start(port=0)
+        host, port = server.address[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(raw)
+        await writer.drain()
+        writer.write_eof()
+        data = await reader.read()
+        writer.close()
+        server._server.close()
+        return data
+    return asyncio.run(_run())
+
+
+def test_http_malformed_body_gets_400(mshr_graph):
+    server = RmmgQueryServer(mshr_graph, max_workers=2)
+
+    def _post(body: bytes) -> bytes:
+        return _exchange(server, b"POST / HTTP/1.1\r\nContent-Length: %d\r\n\r\n"
+                         % len(body) + body)
+
+    try:
+        for body in (b"{not json", b"[1, 2]"):
+            head, _, payload = _post(body).partition(b"\r\n\r\n")
+            assert head.startswith(b"HTTP/1.1 400")
+            assert json.loads(payload)["error"].startswith("bad json")
+        ok = _post(b'{"op": "ping"}')
+        assert ok.startswith(b"HTTP/1.1 200") and b'"pong"' in ok
+    finally:
+        server.close()
+
+
+@pytest.mark.parametrize("raw", [
+    b"GET \r\n\r\n",                                            # 请求行只有一个 token
+    b"POST / HTTP/1.1\r\nContent-Length: abc\r\n\r\n{}",          # 非整数 Content-Length
+    b"POST / HTTP/1.1\r\nContent-Length: 50\r\n\r\n{\"op\": 1}",   # body 比声明的短
+])
+def test_http_malformed_headers_get_400(mshr_graph, raw):
+    server = RmmgQueryServer(mshr_graph, max_workers=2)
+    try:
+        head, _, payload = _exchange(server, raw).partition(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.1 400")
+        assert json.loads(payload)["error"].startswith("bad request")
+    finally:
+        server.close()
+
+
+def test_line_protocol_survives_bad_requests(mshr_graph):
+    server = RmmgQueryServer(mshr_graph, max_workers=2)
+    try:
+        raw = _exchange(server, b'[1]\n"x"\n\xff\xfe\n{"op": "ping"}\n')
+        resps = [json.loads(line) for line in raw.splitlines()]
+        assert [r["ok"] for r in resps] == [False, False, False, True]
+        assert all(r["error"].startswith("bad json") for r in resps[:3])
+        assert resps[3]["result"] == "pong"
+    finally:
+        server.close()
+
+
+def test_handle_request_rejects_non_object(mshr_graph):
+    server = RmmgQueryServer(mshr_graph, max_workers=1)
+    try:
+        resp = server.handle_request([1])
+        assert resp["ok"] is False and "object" in resp["error"]
+        assert server.handle_request({"op": ["x"]})["ok"] is False
+    finally:
+        server.close()
+
+
+def test_metrics_are_consistent_under_threads(mshr_graph):
+    server = RmmgQueryServer(mshr_graph, max_workers=2)
+    try:
+        threads = [threading.Thread(target=lambda: [server.handle_request({"op": "ping"})
+                                                    for _ in range(200)])
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+        assert server.handle_request({"op": "stats"})["result"]["latency"]["ping"]["count"] \
+            == 1600
+    finally:
+        server.close()
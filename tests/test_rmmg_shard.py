@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+
+import pytest
+
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+from rtl_fingerprint.rmmg.shard import (
+    ShardedQueryEngine, build_shards, partition_by_module, write_shards,
+)
+
+
+def test_partition_keeps_modules_together(make_random_graph):
+    g = make_random_graph()
+    parts = partition_by_module(g, 3)
+    assert sorted(v for p in parts for v in p) == sorted(g.nodes)
+    owner = {v: s for s, p in enumerate(parts) for v in p}
+    by_module = {}
+    for v, n in g.nodes.items():
+        by_module.setdefault(n.attrs["module_path"], set()).add(owner[v])
+    assert all(len(s) == 1 for s in by_module.values())
+    # 贪心装箱：最重分片不超过平均负载 + 最大单元
+    unit = max(sum(1 for n in g.nodes.values() if n.attrs["module_path"] == m)
+               for m in by_module)
+    assert max(map(len, parts)) <= len(g.nodes) / 3 + unit
+
+    shards = build_shards(g, 3)
+    assert sum(len(s.indices) for s in shards) == len(g.edges)
+    assert sum(s.num_boundary_edges for s in shards) == sum(
+        1 for e in g.edges if owner[e.src] != owner[e.dst])
+
+
+@pytest.fixture
+def sharded(make_random_graph, tmp_path):
+    g = make_random_graph(n=400, e=1100, seed=11)
+    with ShardedQueryEngine.from_graph(g, str(tmp_path), shards=3) as se:
+        yield g, se
+
+
+def test_distributed_bfs_matches_serial(sharded):
+    g, se = sharded
+    engine = RmmgQueryEngine(g)
+    sources, targets = list(range(0, 15)), list(range(300, 400))
+    for depth in (3, 6, 50):
+        expect = engine.bfs_paths(sources, targets, max_depth=depth)
+        got = se.bfs_paths(sources, targets, max_depth=depth)
+        assert sorted((len(p), p[-1]) for p in got) == sorted((len(p), p[-1]) for p in expect)
+        succ = {(e.src, e.dst) for e in g.edges}
+        for p in got:
+            assert p[0] in sources and all((a, b) in succ for a, b in zip(p, p[1:]))
+    limited = se.bfs_paths(sources, targets, max_paths=5)
+    assert [len(p) for p in limited] == sorted(len(p) for p in
+                                               engine.bfs_paths(sources, targets))[:5]
+    assert se.messages_routed > 0
+
+
+def test_distributed_reachable_and_stats(sharded):
+    g, se = sharded
+    adj = RmmgQueryEngine(g).build_adj_list()
+    expect, frontier = {0: 0, 1: 0}, [0, 1]
+    for d in range(1, 5):
+        frontier = [v for u in frontier for v in adj.get(u, []) if v not in expect
+                    and expect.setdefault(v, d) == d]
+    assert se.reachable([0, 1], max_depth=4) == expect
+    stats = se.shard_stats()
+    assert sum(s["nodes"] for s in stats) == len(g.nodes)
+    assert sum(s["edges"] for s in stats) == len(g.edges)
+
+
+def test_workers_load_shards_from_disk(make_random_graph, tmp_path):
+    g = make_random_graph(n=300, e=800, seed=5)
+    write_shards(g, str(tmp_path), num_shards=3)
+    assert os.path.exists(tmp_path / "manifest.json")
+    expect = RmmgQueryEngine(g).query_custom(RmmgQueryEngine.pred_from_spec(
+        {"type": "prefix", "value": "work@M1."}), RmmgQueryEngine.pred_from_spec(
+        {"type": "prefix", "value": "work@M4."}), max_depth=8)
+    # spawn：worker 不继承本进程的图，只能从目录里读自己的分片
+    with ShardedQueryEngine(str(tmp_path),
+                            mp_context=multiprocessing.get_context("spawn")) as se:
+        assert not hasattr(se, "graph")
+        assert se.find_nodes({"type": "prefix", "value": "work@M1."}) == sorted(
+            v for v, n in g.nodes.items() if n.hier_name.startswith("work@M1."))
+        got = se.query_custom({"type": "prefix", "value": "work@M1."},
+                              {"type": "prefix", "value": "work@M4."}, max_depth=8)
+        assert sorted((len(p), p[-1]) for p in got) == sorted(
+            (len(p), p[-1]) for p in expect)
+
+
+def test_only_boundary_edges_become_messages(make_random_graph, tmp_path):
+    g = make_random_graph(n=200, e=600, seed=2)
+    with ShardedQueryEngine.from_graph(g, str(tmp_path), shards=1) as se:
+        assert len(se.reachable([0], max_depth=None)) > 1
+        assert se.messages_routed == 0 and se.rounds_run == 1
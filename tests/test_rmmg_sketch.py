@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+from rtl_fingerprint.rmmg.sketch import estimate_cones
+
+
+def _exact_cone(g, v, forward):
+    csr = g.freeze()
+    ptr, idx = (csr.indptr, csr.indices) if forward else (csr.rindptr, csr.rindices)
+    seen, stack = {v}, [v]
+    while stack:
+        u = stack.pop()
+        for j in range(ptr[u], ptr[u + 1]):
+            if idx[j] not in seen:
+                seen.add(idx[j])
+                stack.append(idx[j])
+    return len(seen)
+
+
+def test_estimates_close_to_exact(make_random_graph):
+    g = make_random_graph(n=2000, e=2600, seed=3)
+    est = estimate_cones(g, precision=10)
+    assert estimate_cones(g, precision=10) is est
+    for v in range(0, 2000, 97):
+        for forward, vals in ((True, est.fanout), (False, est.fanin)):
+            exact = _exact_cone(g, v, forward)
+            assert abs(vals[v] - exact) <= max(2.0, 0.15 * exact)
+
+
+def test_small_cones_and_attr_filter(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    engine.estimate_cones()
+    tag = mshr_graph.get_node_id("work@MSHR.meta_tag")
+    commit = mshr_graph.get_node_id("work@Rob.io_commit_valid")
+    # 小锥由线性计数校正，误差在一个节点以内
+    assert abs(mshr_graph.nodes[tag].attrs["fanout_cone"] - 6) <= 1
+    assert abs(mshr_graph.nodes[commit].attrs["fanin_cone"] - 8) <= 1
+
+    wide = engine.find_nodes(engine.pred_attr_range("fanout_cone", lo=5))
+    spec = engine.pred_from_spec({"type": "range", "value": "fanout_cone", "min": 5})
+    assert wide == engine.find_nodes(spec)
+    assert tag in wide and commit not in wide
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import csv
+import json
+
+from rtl_fingerprint.rmmg.stats import module_stats
+
+
+def _naive_debug(g, substr):
+    ids = {nid for nid, n in g.nodes.items() if substr in n.attrs["module_path"]}
+    return (len(ids),
+            sum(1 for e in g.edges if e.dst in ids),
+            sum(1 for e in g.edges if e.src in ids))
+
+
+def test_debug_counts_match_full_scan(make_random_graph):
+    g = make_random_graph(n=200, e=900, seed=2)
+    st = module_stats(g)
+    for substr in ("work@M1", "work@M", "nope"):
+        assert st.debug_counts(substr) == _naive_debug(g, substr)
+    assert module_stats(g) is st
+
+
+def test_connectivity_matrix_and_export(mshr_graph, tmp_path):
+    st = module_stats(mshr_graph)
+    mshr = st.modules["work@MSHR"]
+    assert mshr.kinds["reg"] == 2 and mshr.internal_edges == 2
+    assert (mshr.out_edges, mshr.out_bits) == (1, 20)
+    assert st.matrix[("work@LSU", "work@Rob")] == [2, 41]
+
+    st.dump_json(str(tmp_path / "s.json"))
+    data = json.loads((tmp_path / "s.json").read_text())
+    assert {m["module"] for m in data["modules"]} == {"work@MSHR", "work@LSU", "work@Rob"}
+    st.dump_csv(str(tmp_path / "m.csv"), str(tmp_path / "x.csv"))
+    rows = list(csv.DictReader(open(tmp_path / "x.csv")))
+    assert {"src_module": "work@MSHR", "dst_module": "work@LSU", "edges": "1", "bits": "20"} in rows
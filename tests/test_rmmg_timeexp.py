@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from rtl_fingerprint.rmmg.query import RmmgQueryEngine
+from rtl_fingerprint.rmmg.timeexp import TimeExpandedGraph, time_expanded
+
+from conftest import build_graph
+
+
+def test_mshr_commit_needs_one_cycle(mshr_graph):
+    engine = RmmgQueryEngine(mshr_graph)
+    src = engine.pred_hier_startswith("work@MSHR.meta_tag")
+    dst = engine.pred_arch_visible()
+    assert engine.query_within_cycles(src, dst, k=0) == []
+
+    paths = engine.query_within_cycles(src, dst, k=3)
+    assert len(paths) == 2
+    names = [(mshr_graph.nodes[v].hier_name, c) for v, c in paths[0]]
+    assert names[:4] == [("work@MSHR.meta_tag", 0), ("work@MSHR.io_resp", 0),
+                         ("work@LSU.ldq_addr", 1), ("work@LSU.io_out", 1)]
+    assert all(c == 1 for _, c in paths[0][2:])
+
+
+def test_layers_are_memoized_and_cycle_exact():
+    # a -seq-> b -seq-> c -seq-> a（环），b -comb-> d
+    nodes = [(f"work@T.{x}", "reg", 1, {}) for x in "abcd"]
+    g = build_graph(nodes, [("work@T.a", "work@T.b", True), ("work@T.b", "work@T.c", True),
+                            ("work@T.b", "work@T.d", False), ("work@T.c", "work@T.a", True)])
+    a, b, c, d = range(4)
+    teg = TimeExpandedGraph(g)
+    assert teg.reachable_at([a], 0) == {a}
+    assert teg.reachable_at([a], 1) == {b, d}
+    assert teg.reachable_at([a], 3) == {a}
+    built = teg.layers_built
+    assert teg.reachable_within([a], 2) == {a: 0, b: 1, d: 1, c: 2}
+    assert teg.layers_built == built          # 已展开的层直接复用
+    assert teg.path_to([a], (d, 4)) == [(a, 0), (b, 1), (c, 2), (a, 3), (b, 4), (d, 4)]
+    assert teg.path_to([a], (c, 4)) == []
+    assert teg.successors((b, 0)) == [(c, 1), (d, 0)]
+    assert teg.successors((b, 0), k=0) == [(d, 0)]
+    assert time_expanded(g) is time_expanded(g)
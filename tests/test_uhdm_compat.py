@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import itertools
+from types import SimpleNamespace
+
+from rtl_fingerprint.uhdm_compat import CachedVpi, handle_key
+
+_POINTERS = itertools.count(0x1000, 8)
+
+
+class _Obj:
+    """假的 SWIG 代理：this 是底层指针，同一指针可以有多个代理。"""
+
+    def __init__(self, name, children=(), parent=None, handles=None, props=None, this=None):
+        self.this = next(_POINTERS) if this is None else this
+        self.name = name
+        self.children = list(children)
+        self.parent = parent
+        self.handles = dict(handles or {})   # tag -> handle（vpiParent 之外）
+        self.props = dict(props or {})       # vpi_get 的属性，缺省是 len(name)
+
+
+def _fake_bindings(log, **consts):
+    """
+    最小的 VPI 形状：vpi_get_str 都返回名字、vpiParent handle、子对象迭代。
+    consts 给出额外的 vpi* 常量（其它 handle 从 obj.handles 取，没有就是 None）。
+    """
+    def vpi_get(prop, obj):
+        log.append(("get", prop, obj.name))
+        return obj.props.get(prop, len(obj.name))
+
+    def vpi_get_str(prop, obj):
+        log.append(("get_str", prop, obj.name))
+        return obj.name
+
+    def vpi_handle(tag, obj):
+        log.append(("handle", tag, obj.name))
+        return obj.parent if tag == ns.vpiParent else obj.handles.get(tag)
+
+    def vpi_iterate(tag, obj):
+        log.append(("iterate", tag, obj.name))
+        return iter(obj.children) if obj.children else None
+
+    def vpi_scan(it):
+        return next(it, None)
+
+    ns = SimpleNamespace(vpiName=1, vpiSize=2, vpiParent=3, vpiPort=4, vpiFlag=True,
+                         vpi_get=vpi_get, vpi_get_str=vpi_get_str, vpi_handle=vpi_handle,
+                         vpi_iterate=vpi_iterate, vpi_scan=vpi_scan, **consts)
+    return ns
+
+
+def test_cached_reads_and_stats():
+    log = []
+    raw = _fake_bindings(log)
+    vpi = CachedVpi(raw)
+    mod = _Obj("top")
+    a, b = _Obj("a", parent=mod), _Obj("b", parent=mod)
+    mod.children = [a, b]
+
+    assert vpi.vpiName == 1 and "vpiFlag" not in vpi.__dict__
+    for _ in range(3):
+        assert vpi.vpi_get_str(vpi.vpiName, a) == "a"
+        assert vpi.vpi_get(vpi.vpiSize, a) == 1
+        assert vpi.vpi_handle(vpi.vpiParent, a) is mod
+        assert [x.name for x in vpi.util.vpi_iterate_gen(vpi.vpiPort, mod)] == ["a", "b"]
+    assert vpi.iterate(vpi.vpiPort, a) == []
+    assert len(log) == 5
+    assert vpi.stats() == {"get": (3, 2), "get_str": (3, 2), "handle": (3, 2),
+                           "iterate": (4, 2)}
+
+    assert vpi.get_many(b, vpi.vpiSize, vpi.vpiName) == (1, 1)
+    assert vpi.iterate_handles(vpi.vpiPort, mod, vpi.vpiParent) == [(a, mod), (b, mod)]
+    assert vpi.handles(vpi.vpiParent, [a, b]) == [mod, mod]
+    assert "cache hits" in vpi.summary()
+
+    vpi.clear()
+    assert vpi.stats()["get"] == (0, 0) and not vpi._props
+    vpi.vpi_get_str(vpi.vpiName, a)
+    assert log[-1] == ("get_str", 1, "a")
+
+
+def test_errors_are_not_cached():
+    calls = []
+    raw = _fake_bindings([])
+
+    def flaky(prop, obj):
+        calls.append(obj)
+        raise RuntimeError("no such property")
+
+    raw.vpi_get_str = flaky
+    vpi = CachedVpi(raw)
+    obj = _Obj("x")
+    for _ in range(2):
+        try:
+            vpi.vpi_get_str(vpi.vpiName, obj)
+        except RuntimeError:
+            pass
+    assert len(calls) == 2
+
+
+def test_cache_keys_on_underlying_handle():
+    log = []
+    vpi = CachedVpi(_fake_bindings(log))
+    mod = _Obj("top")
+    a = _Obj("a", parent=mod)
+    proxy = _Obj("a", parent=mod, this=a.this)      # 同一 handle 的新代理
+    assert handle_key(proxy) == handle_key(a) == a.this
+    assert vpi.vpi_get_str(vpi.vpiName, a) == vpi.vpi_get_str(vpi.vpiName, proxy)
+    assert vpi.vpi_handle(vpi.vpiParent, proxy) is vpi.vpi_handle(vpi.vpiParent, a)
+    assert len(log) == 2 and vpi.hits["get_str"] == 1 and vpi.hits["handle"] == 1
+    assert not hasattr(vpi, "_pinned")
+
+    # 没有底层指针的对象照常查询，但不缓存
+    bare = SimpleNamespace(name="bare", parent=None, children=[], handles={}, props={})
+    assert handle_key(bare) is None
+    for _ in range(2):
+        assert vpi.vpi_get_str(vpi.vpiName, bare) == "bare"
+    assert log[-2:] == [("get_str", 1, "bare")] * 2